@@ -1,9 +1,35 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import json
-import re
 import os
-import shutil
+import multiprocessing
+from citk2.core import (
+    SaveDocument, SaveFormatError, default_saved_games_path,
+    VARIABLES, INT_VARS, COMPLEX_COUNTRY_ATTRS, COMPLEX_CHARACTER_ATTRS,
+    COUNTRY_OPTIONS, POSITION_OPTIONS, STATUS_OPTIONS, TRAIT_OPTIONS,
+    LOYALTY_VARS, DEBT_VARS, USA_VARS,
+    parse_known_traitors, format_known_traitors
+)
+from citk2.forms import AttributeForm, RowSpec
+from citk2.search import ListboxFilter
+from citk2.background import BackgroundLoader
+from citk2.cache import ParseCache
+from citk2.workspace import Workspace, workspace_key
+from citk2.watcher import FolderWatcher, file_stat
+from citk2.watcher import ADDED as SAVE_ADDED, REMOVED as SAVE_REMOVED
+from citk2.profiling import profiler
+from citk2.diagnostics import DiagnosticsWindow
+from citk2.diff import ADDED, REMOVED, SECTIONS, diff_documents
+from citk2.diffview import DiffWindow
+from citk2.browserview import SaveBrowser
+from citk2.saveindex import SaveIndex
+from citk2.query import QueryEngine, parse_conditions
+from citk2.queryview import QueryWindow
+from citk2.rules import QUICK_ACTION_RULES, RuleError, compile_rules, load_rules, matching
+from citk2.records import COMPACT_MIN_BYTES
+from citk2.graph import format_names
+
+# How often the main thread collects what the folder watcher found
+WATCH_POLL_MS = 500
 
 class CITK2SaveEditor:
     def __init__(self, root):
@@ -13,89 +39,54 @@ class CITK2SaveEditor:
         self.root.minsize(1200, 700)
         self.root.configure(bg="#8B0000")
         
-        # Define variables and their display names
-        self.variables = {
-            "population": "Population (millions)",
-            "defcon": "DEFCON Level",
-            "politicalPower": "Political Power",
-            "reserve": "Reserve",
-            "refinancingRate": "Refinancing Rate (%)",
-            "export": "Export",
-            "healthCare": "Healthcare Funding",
-            "education": "Education Funding",
-            "ecology": "Ecology Funding",
-            "militaryStaffLoyalty": "Military Leadership Loyalty",
-            "armyStaffLoyalty": "Army Loyalty",
-            "specialServicesLoyalty": "Special Services Loyalty",
-            "specialServices": "Special Services Funding",
-            "radicalsPower": "Radicals Power",
-            "freedomLevel": "Civil Liberties",
-            "liberalizationLevel": "Liberalization",
-            "educationAccess": "Education Access",
-            "healthCareAccess": "Health Care Access",
-            "selfFulfillment": "Self Fulfillment",
-            "luxuryGoodsLevel": "Luxury Goods Access",
-            "orderLevel": "Law and Order Level",
-            "firstNeedsGoods": "Essential Goods Access",
-            "housingLevel": "Housing Level",
-            "employmentLevel": "Employment Level",
-            "agroEffectiveness": "Agro Effectiveness",
-            "servicesEffectiveness": "Services Effectiveness",
-            "lightIndustryEffectiveness": "Light Industry Power",
-            "heavyIndustryEffectiveness": "Heavy Industry Power",
-            "armyIndustryEffectiveness": "Military Industrial Complex Power",
-            "intelligentsiaLoyalty": "Intelligentsia Loyalty",
-            "spiritualContentment": "Spiritual Contentment",
-            "unityLevel": "Consensus Unity",
-            "forgeryLevel": "Forgery",
-            "armyQuantityLevel": "Army Quantity",
-            "warheadsQuantity": "Warhead Quantity",
-            "combatability": "Combatability",
-            "competitivenessLevel": "Competitiveness",
-            "corruptionLevel": "Corruption",
-            "americanArmyLevel": "American Army Combat Readiness",
-            "americanEconomyLevel": "American Economy Stability",
-            "americanPopularHappiness": "American Popular Satisfaction",
-            "priceIndex": "Inflation",
-            "usLoan": "US Loan",
-            "fraLoan": "France Loan",
-            "imfLoan": "IMF Loan"
-        }
-        
-        # Identify integer variables
-        self.int_vars = {
-            "population", "defcon", "reserve", "refinancingRate", 
-            "usLoan", "fraLoan", "imfLoan"
-        }
-        
-        # Define complex attributes for countries and characters
-        self.complex_country_attrs = {
-            'pointOfInfluence': ['USA', 'France', 'USSR', 'China', 'Britain']
-        }
-        self.complex_character_attrs = {
-            'charLevel': ['Diplomacy', 'Intrigue', 'Thrift'],
-            'charExp': ['Diplomacy', 'Intrigue', 'Thrift'],
-            'customCharacterInfo': ['politicName', 'politicSurname', 'pictureNumber', 'wasEnoughPoints']
-        }
-        
-        # Define possible values for combo boxes
-        self.country_options = ["Russia", "Ukraine", "Belarus", "Kazakhstan", "Uzbekistan", "Georgia", "Azerbaijan", "Lithuania", "Estonia", "Latvia", "Moldova", "Kyrgyzstan", "Tajikistan", "Armenia", "Turkmenistan"]
-        self.position_options = ["ChairmanOfTheSupremeCouncil", "SecondSecretary", "ChairmanOfTheCouncilOfMinisters", "ForeignSecretary", "ChairmanOfTheKGB", "MinisterOfDefense", "MinisterOfIndustry", "MinisterForYouthAffairs", "MinisterOfFinance", "GRU", "MinisterOfAgriculture", "MinisterOfEducation", "MinisterOfInternalAffairs",None]
-        self.status_options = ["Alive", "Dead", "Imprisoned", "Exiled", "Retired"]
-        self.trait_options = ["Ascetic", "Atlantophile", "Atlantophobe", "Chauvinist", "Compromise", "ConspiracyTheorist", "Dissident", "Economical", "EffectiveManager", "GlasnostActivist", "Hedonist", "Idealist", "InefficientManager", "Industrialist", "Intelligent", "Maoist", "Monarchist", "NuclearScientist", "Orientalist", "Partocrat", "Peaceful", "Peoplefavorite", "ProConservative", "ProLiberalDemocrat", "ProMarket", "ProNationalDemocrat", "ProNeostalinist", "ProNeotrotskist", "ProReformist", "ProSocialPatriot", "Radical", "RocketBuilder", "Schemer", "StrongArm", "Technocrat", "Unambitious", "Uncompromising", "Voluntarist"]
+        # Variable definitions and option lists live in the headless core
+        self.variables = VARIABLES
+        self.int_vars = INT_VARS
+        self.complex_country_attrs = COMPLEX_COUNTRY_ATTRS
+        self.complex_character_attrs = COMPLEX_CHARACTER_ATTRS
+        self.country_options = COUNTRY_OPTIONS
+        self.position_options = POSITION_OPTIONS
+        self.status_options = STATUS_OPTIONS
+        self.trait_options = TRAIT_OPTIONS
         
         # Create GUI elements
         self.create_widgets()
         self.current_file = None
-        self.saved_games_path = os.path.join(
-            os.environ['USERPROFILE'], 
-            'AppData', 'LocalLow', 'Nostalgames', 'CrisisInTheKremlin2', 'saved_games'
-        )
-        self.data = None
-        self.original_content = ""
+        self.saved_games_path = default_saved_games_path()
+        self.doc = None  # Loaded SaveDocument
+        self.loader = BackgroundLoader(self.root)
+        self.parse_cache = ParseCache()
+        # Summaries of the saves in saved_games for the save browser
+        self.save_index = SaveIndex()
+        self.browser = None
+        self.query_engine = QueryEngine(self.save_index)
+        # Every opened save stays loaded, self.doc is the active one
+        self.workspace = Workspace(self.load_document)
+        self.open_save_paths = []
         self.current_country = None
         self.current_character = None
-        self.json_match = None  # Store JSON match for exact replacement
+        # Text last shown in each widget, edits are what differs from it
+        self.shown_main = {}
+        self.country_shown = {}
+        self.character_shown = {}
+        self.traits_shown = []
+        # Value labels of the character form's relation rows
+        self.relation_labels = []
+        # Entity lists filled for the current document, see fill_entity_lists()
+        self.lists_filled = set()
+        # Saves changed by the game are reloaded one at a time on their own thread
+        self.reloader = BackgroundLoader(self.root)
+        self.reload_queue = []
+        # Workspace key -> (mtime, size) of the file as the editor last wrote it
+        self.own_writes = {}
+        self.watcher = FolderWatcher(self.saved_games_path)
+        self.watcher.start()
+        self.root.after(WATCH_POLL_MS, self.poll_watcher)
+
+    @property
+    def data(self):
+        """Decoded JSON of the loaded save, or None"""
+        return self.doc.data if self.doc else None
 
     def create_widgets(self):
         # Configure styles
@@ -117,6 +108,9 @@ class CITK2SaveEditor:
         # Create notebook for tabs
         notebook = ttk.Notebook(self.root)
         notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.notebook = notebook
+        # Entity lists are filled when their tab is first shown
+        notebook.bind("<<NotebookTabChanged>>", self.fill_entity_lists)
         
         # Create main tab for variables
         main_tab = ttk.Frame(notebook, style="Red.TFrame")
@@ -126,11 +120,13 @@ class CITK2SaveEditor:
         # Create countries tab
         countries_tab = ttk.Frame(notebook, style="Red.TFrame")
         notebook.add(countries_tab, text="Countries")
+        self.countries_tab = countries_tab
         self.create_countries_tab(countries_tab)
         
         # Create characters tab
         characters_tab = ttk.Frame(notebook, style="Red.TFrame")
         notebook.add(characters_tab, text="Characters")
+        self.characters_tab = characters_tab
         self.create_characters_tab(characters_tab)
         
         # Create button frame
@@ -161,6 +157,89 @@ class CITK2SaveEditor:
             style="Gold.TButton"
         )
         reset_btn.pack(side="left", padx=20, pady=5, expand=True)
+        
+        undo_btn = ttk.Button(
+            button_frame, 
+            text="Undo", 
+            command=self.undo,
+            style="Gold.TButton"
+        )
+        undo_btn.pack(side="left", padx=20, pady=5, expand=True)
+        
+        redo_btn = ttk.Button(
+            button_frame, 
+            text="Redo", 
+            command=self.redo,
+            style="Gold.TButton"
+        )
+        redo_btn.pack(side="left", padx=20, pady=5, expand=True)
+        
+        self.root.bind("<Control-z>", lambda e: self.undo())
+        self.root.bind("<Control-y>", lambda e: self.redo())
+        self.root.bind("<Control-Shift-Z>", lambda e: self.redo())
+        
+        compare_btn = ttk.Button(
+            button_frame, 
+            text="Compare...", 
+            command=self.compare_file,
+            style="Gold.TButton"
+        )
+        compare_btn.pack(side="left", padx=20, pady=5, expand=True)
+        
+        search_btn = ttk.Button(
+            button_frame, 
+            text="Search Saves...", 
+            command=self.search_saves,
+            style="Gold.TButton"
+        )
+        search_btn.pack(side="left", padx=20, pady=5, expand=True)
+        
+        diagnostics_btn = ttk.Button(
+            button_frame, 
+            text="Diagnostics", 
+            command=self.open_diagnostics,
+            style="Gold.TButton"
+        )
+        diagnostics_btn.pack(side="left", padx=20, pady=5, expand=True)
+        
+        # Status bar with load progress
+        status_frame = ttk.Frame(self.root, style="Gold.TFrame")
+        status_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        
+        self.status_var = tk.StringVar(value="No file loaded")
+        ttk.Label(
+            status_frame, 
+            textvariable=self.status_var, 
+            style="Gold.TLabel"
+        ).pack(side="left", padx=5, pady=2)
+        
+        self.progress = ttk.Progressbar(status_frame, mode="determinate", maximum=100, length=200)
+        self.progress.pack(side="right", padx=5, pady=2)
+        
+        # Switch between the saves open in the workspace
+        close_btn = ttk.Button(
+            status_frame, 
+            text="Close Save", 
+            command=self.close_save,
+            style="Gold.TButton"
+        )
+        close_btn.pack(side="right", padx=5, pady=2)
+        
+        self.open_saves_var = tk.StringVar()
+        self.open_saves_combo = ttk.Combobox(
+            status_frame, 
+            textvariable=self.open_saves_var, 
+            state="readonly", 
+            width=40,
+            style="Gold.TCombobox"
+        )
+        self.open_saves_combo.pack(side="right", padx=5, pady=2)
+        self.open_saves_combo.bind("<<ComboboxSelected>>", self.on_switch_save)
+        ttk.Label(
+            status_frame, 
+            text="Open saves:", 
+            style="Gold.TLabel"
+        ).pack(side="right", padx=5, pady=2)
 
     def create_main_tab(self, parent):
         # Create frame for action buttons
@@ -204,6 +283,15 @@ class CITK2SaveEditor:
         )
         breakthrough_btn.pack(side="left", padx=5, pady=5, expand=True)
         
+        presets_btn = ttk.Button(
+            action_frame, 
+            text="Run Several...", 
+            command=self.open_presets,
+            style="Gold.TButton",
+            width=20
+        )
+        presets_btn.pack(side="left", padx=5, pady=5, expand=True)
+        
         # Create scrollable canvas
         canvas = tk.Canvas(parent, bg="#B22222", highlightthickness=0)
         scrollbar = ttk.Scrollbar(parent, orient="vertical", command=canvas.yview)
@@ -252,6 +340,7 @@ class CITK2SaveEditor:
                 entry = ttk.Entry(row_frame, width=12, style="Gold.TEntry")
                 entry.pack(side="left", fill="x", expand=True)
                 self.entries[var_id] = entry
+                entry.bind("<KeyRelease>", self.update_title)
                 
                 # Set validation based on variable type
                 if var_id in self.int_vars:
@@ -308,6 +397,7 @@ class CITK2SaveEditor:
         )
         self.country_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         list_scroll.config(command=self.country_listbox.yview)
+        self.country_filter = ListboxFilter(self.country_listbox, self.root)
         
         # Bind single click instead of double click
         self.country_listbox.bind("<ButtonRelease-1>", self.on_country_select)
@@ -325,6 +415,7 @@ class CITK2SaveEditor:
         self.country_attr_container = ttk.Frame(attr_canvas, style="Red.TFrame")
         attr_canvas.create_window((0, 0), window=self.country_attr_container, anchor="nw")
         
+        self.country_form = AttributeForm(self.country_attr_container)
         self.country_attr_container.bind(
             "<Configure>",
             lambda e: attr_canvas.configure(scrollregion=attr_canvas.bbox("all"))
@@ -409,6 +500,33 @@ class CITK2SaveEditor:
         character_search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         character_search_entry.bind("<KeyRelease>", self.filter_characters)
         
+        # Select every character matching conditions, e.g. homeLand == Ukraine and traits contains Radical
+        select_frame = ttk.Frame(list_frame, style="Gold.TFrame")
+        select_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        
+        ttk.Label(
+            select_frame, 
+            text="Select Where:", 
+            style="Gold.TLabel"
+        ).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.character_where_var = tk.StringVar()
+        character_where_entry = ttk.Entry(
+            select_frame, 
+            textvariable=self.character_where_var,
+            width=15,
+            style="Gold.TEntry"
+        )
+        character_where_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        character_where_entry.bind("<Return>", self.select_characters_where)
+        
+        ttk.Button(
+            select_frame, 
+            text="Select", 
+            command=self.select_characters_where,
+            style="Gold.TButton"
+        ).pack(side=tk.LEFT, padx=(5, 0))
+        
         ttk.Label(list_frame, text="Characters", style="Gold.TLabel", font=("Arial", 10, "bold")).pack(pady=(0, 5))
         
         # Character listbox with scrollbar
@@ -423,10 +541,11 @@ class CITK2SaveEditor:
             selectbackground="#8B0000",
             selectforeground="#FFD700",
             font=("Arial", 9),
-            selectmode=tk.SINGLE
+            selectmode=tk.EXTENDED
         )
         self.character_listbox.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         list_scroll.config(command=self.character_listbox.yview)
+        self.character_filter = ListboxFilter(self.character_listbox, self.root)
         
         # Bind single click instead of double click
         self.character_listbox.bind("<ButtonRelease-1>", self.on_character_select)
@@ -444,6 +563,7 @@ class CITK2SaveEditor:
         self.character_attr_container = ttk.Frame(attr_canvas, style="Red.TFrame")
         attr_canvas.create_window((0, 0), window=self.character_attr_container, anchor="nw")
         
+        self.character_form = AttributeForm(self.character_attr_container)
         self.character_attr_container.bind(
             "<Configure>",
             lambda e: attr_canvas.configure(scrollregion=attr_canvas.bbox("all"))
@@ -514,6 +634,14 @@ class CITK2SaveEditor:
         )
         isolate_btn.pack(fill=tk.X, padx=2, pady=2)
         
+        befriend_btn = ttk.Button(
+            char_actions_frame, 
+            text="Befriend", 
+            command=lambda: self.set_character_relations(100.0),
+            style="Gold.TButton"
+        )
+        befriend_btn.pack(fill=tk.X, padx=2, pady=2)
+        
         # NEW: Supreme Leader button between Isolate and Save Character Changes
         supreme_btn = ttk.Button(
             char_actions_frame, 
@@ -597,42 +725,26 @@ class CITK2SaveEditor:
         
     def filter_countries(self, event=None):
         """Filter country list based on search text"""
-        if not hasattr(self, 'all_countries'):
-            return
-            
-        search_text = self.country_search_var.get().lower()
-        self.country_listbox.delete(0, tk.END)
-        
-        if not search_text:
-            # Show all countries if search is empty
-            for country in self.all_countries:
-                self.country_listbox.insert(tk.END, country)
-        else:
-            # Filter countries that match search text
-            for country in self.all_countries:
-                if search_text in country.lower():
-                    self.country_listbox.insert(tk.END, country)
+        self.country_filter.request(self.country_search_var.get())
 
     def filter_characters(self, event=None):
         """Filter character list based on search text"""
-        if not hasattr(self, 'all_characters'):
-            return
-            
-        search_text = self.character_search_var.get().lower()
-        self.character_listbox.delete(0, tk.END)
-        
-        if not search_text:
-            # Show all characters if search is empty
-            for character in self.all_characters:
-                self.character_listbox.insert(tk.END, character)
-        else:
-            # Filter characters that match search text
-            for character in self.all_characters:
-                if search_text in character.lower():
-                    self.character_listbox.insert(tk.END, character)
+        self.character_filter.request(self.character_search_var.get())
 
     def open_file(self):
-        """Open a CITK2 save file from default directory"""
+        """Pick a save from the default directory in the save browser"""
+        if not os.path.isdir(self.saved_games_path):
+            self.open_file_dialog()
+            return
+        if self.browser is not None and self.browser.window.winfo_exists():
+            self.browser.window.lift()
+            return
+        self.browser = SaveBrowser(
+            self.root, self.save_index, self.saved_games_path, self.open_path, self.open_file_dialog
+        )
+
+    def open_file_dialog(self):
+        """Open a CITK2 save file from anywhere"""
         initial_dir = self.saved_games_path
         if not os.path.exists(initial_dir):
             initial_dir = os.path.expanduser("~")
@@ -643,191 +755,535 @@ class CITK2SaveEditor:
         )
         if not file_path:
             return
+        self.open_path(file_path)
+
+    def open_path(self, file_path):
+        """Load a save in the background, or switch to it if it is open"""
+        if file_path in self.workspace:
+            self.switch_save(file_path)
+            return
             
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            
-            # Extract JSON-like data from the file
-            match = re.search(r"({.*})", content, re.DOTALL)
-            if not match:
-                messagebox.showerror("Error", "Invalid save file format")
-                return
-                
-            data = json.loads(match.group(1))
-            self.data = data  # Store entire data
-            self.original_content = content  # Store original content
-            self.current_file = file_path
-            self.json_match = match  # Store regex match for exact replacement
-            
-            # Populate main variables
-            for var_id in self.variables:
-                if var_id in data:
-                    self.entries[var_id].delete(0, tk.END)
-                    self.entries[var_id].insert(0, str(data[var_id]))
-                # Handle potential typo in save files
-                elif var_id == "warheadsQuantity" and "warheadQuantity" in data:
-                    self.entries[var_id].delete(0, tk.END)
-                    self.entries[var_id].insert(0, str(data["warheadQuantity"]))
-            
-            # Populate country list
-            if "countries" in data:
-                self.all_countries = list(data["countries"].keys())  # Store for filtering
-                self.country_listbox.delete(0, tk.END)
-                for country_tag in self.all_countries:
-                    self.country_listbox.insert(tk.END, country_tag)
-            
-            # Populate character list
-            if "characters" in data:
-                self.all_characters = list(data["characters"].keys())  # Store for filtering
-                self.character_listbox.delete(0, tk.END)
-                for character_name in self.all_characters:
-                    self.character_listbox.insert(tk.END, character_name)
-            
-            messagebox.showinfo("Success", "Comrade! File loaded successfully!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load file:\n{str(e)}")
+        # Picking another file while one is loading cancels the first load
+        self.status_var.set(f"Loading {os.path.basename(file_path)}...")
+        self.progress["value"] = 0
+        self.loader.load(
+            file_path,
+            on_done=lambda doc: self.on_file_loaded(file_path, doc),
+            on_error=self.on_load_failed,
+            on_progress=self.on_load_progress,
+            load=self.load_document
+        )
+
+    def load_document(self, file_path, progress=None):
+        """Runs on the loader thread: lazy parse or cache hit, compact large saves"""
+        doc = self.parse_cache.load(file_path, progress, lazy=True)
+        if os.path.getsize(file_path) >= COMPACT_MIN_BYTES:
+            doc.compact()
+        return doc
+
+    def compare_file(self):
+        """Show what changed between another save and the loaded one"""
+        if not self.doc:
+            messagebox.showwarning("Warning", "No file loaded")
+            return
+        if self.loader.busy():
+            messagebox.showwarning("Warning", "Wait for the save to finish loading")
+            return
+        
+        file_path = filedialog.askopenfilename(
+            initialdir=os.path.dirname(self.current_file),
+            title="Compare with",
+            filetypes=[("CITK2 Save Files", "*.citk2save"), ("All Files", "*.*")]
+        )
+        if not file_path:
+            return
+        
+        self.status_var.set(f"Loading {os.path.basename(file_path)} to compare...")
+        self.progress["value"] = 0
+        self.loader.load(
+            file_path,
+            on_done=lambda other: self.show_diff(file_path, other),
+            on_error=self.on_load_failed,
+            on_progress=self.on_load_progress,
+            load=self.load_document
+        )
+
+    def search_saves(self):
+        """Query the countries, characters or variables of every save"""
+        if not os.path.isdir(self.saved_games_path):
+            messagebox.showwarning("Warning", f"No saved_games folder at {self.saved_games_path}")
+            return
+        QueryWindow(self.root, self.query_engine, self.saved_games_path, self.open_path)
+
+    @profiler.timed("editor.show_diff")
+    def show_diff(self, other_path, other):
+        self.progress["value"] = 100
+        changes = diff_documents(other, self.doc)
+        self.status_var.set(f"{len(changes)} changes since {os.path.basename(other_path)}")
+        DiffWindow(
+            self.root, changes, os.path.basename(other_path), os.path.basename(self.current_file)
+        )
+
+    def poll_watcher(self):
+        """Handle saves the game wrote since the last poll"""
+        for kind, path in self.watcher.drain():
+            self.on_save_changed(kind, path)
+        self.root.after(WATCH_POLL_MS, self.poll_watcher)
+
+    def on_save_changed(self, kind, path):
+        """Queue a reload of an open save that changed on disk"""
+        name = os.path.basename(path)
+        if kind == SAVE_ADDED:
+            self.status_var.set(f"New save: {name}")
+            return
+        if path not in self.workspace:
+            return
+        if kind == SAVE_REMOVED:
+            self.status_var.set(f"{name} was deleted on disk")
+            return
+        if self.own_writes.get(workspace_key(path)) == file_stat(path):
+            return
+        if path not in self.reload_queue:
+            self.reload_queue.append(path)
+        self.reload_next()
+
+    def reload_next(self):
+        if self.reloader.busy() or not self.reload_queue:
+            return
+        path = self.reload_queue.pop(0)
+        old = self.workspace.get(path)
+        if old is None:
+            self.reload_next()
+            return
+        sections = [section for section in SECTIONS if old.is_decoded(section)]
+        self.reloader.load(
+            path,
+            on_done=lambda doc: self.on_save_reloaded(path, doc),
+            on_error=lambda error: self.on_reload_failed(path, error),
+            load=lambda file_path, progress=None: self.reload_document(file_path, sections, progress)
+        )
+
+    def reload_document(self, file_path, sections, progress=None):
+        """Runs on the reload thread: load, then decode what the old copy had decoded"""
+        doc = self.load_document(file_path, progress)
+        for section in sections:
+            doc.data.get(section)
+        return doc
+
+    def on_reload_failed(self, path, error):
+        # Most likely caught mid-write; the next change will try again
+        self.status_var.set(f"Could not reload {os.path.basename(path)}: {error}")
+        self.reload_next()
+
+    @profiler.timed("editor.on_save_reloaded")
+    def on_save_reloaded(self, path, doc):
+        """Swap in a reloaded save, updating only what changed"""
+        old = self.workspace.get(path)
+        name = os.path.basename(path)
+        if old is None:
+            pass
+        elif old.is_modified() or (old is self.doc and self.has_pending_edits()):
+            self.status_var.set(f"{name} changed on disk, keeping your unsaved edits")
+        else:
+            # Sections never decoded are not shown anywhere, there is nothing to update
+            sections = [section for section in SECTIONS if old.is_decoded(section)]
+            changes = diff_documents(old, doc, sections)
+            self.workspace.replace(path, doc)
+            if old is self.doc:
+                self.apply_reload(doc, changes)
+            self.status_var.set(f"Reloaded {name}: {len(changes)} changes")
+        self.reload_next()
+
+    def has_pending_edits(self):
+        """True if an entry or form shows something not yet in the document"""
+        return self.main_entries_edited() or any(
+            self.widget_state(widget) != shown.get(key)
+            for entries, shown in (
+                (self.country_entries, self.country_shown),
+                (self.character_entries, self.character_shown)
+            )
+            for key, widget in entries.items()
+        )
+
+    def apply_reload(self, doc, changes):
+        """Show a reloaded active save without losing the selections"""
+        self.doc = doc
+        doc.history.on_change = self.update_title
+        self.refresh_main_entries({
+            change.path[0] for change in changes if change.path[0] not in SECTIONS
+        })
+        for section, names, list_filter, current, show in (
+            ("countries", doc.country_tags, self.country_filter, "current_country",
+             self.on_country_select),
+            ("characters", doc.character_names, self.character_filter, "current_character",
+             self.on_character_select)
+        ):
+            entities = set()
+            relist = False
+            for change in changes:
+                if change.path[0] != section:
+                    continue
+                if len(change.path) == 1 or (len(change.path) == 2 and change.kind in (ADDED, REMOVED)):
+                    relist = True
+                if len(change.path) > 1:
+                    entities.add(change.path[1])
+            if relist and section in self.lists_filled:
+                items = names()
+                if section == "countries":
+                    self.all_countries = items
+                    query = self.country_search_var.get()
+                else:
+                    self.all_characters = items
+                    query = self.character_search_var.get()
+                # All at once, so the selection can be put back straight away
+                list_filter.set_items(items, query, chunk_size=max(len(items), 1))
+            name = getattr(self, current)
+            if name is None or not (relist or name in entities):
+                continue
+            if not list_filter.select(name):
+                # Gone from the save, or no longer matching the search
+                setattr(self, current, None)
+                list_filter.listbox.selection_clear(0, tk.END)
+            show(None)
+        self.update_title()
+
+    def on_load_progress(self, fraction):
+        self.progress["value"] = fraction * 100
+
+    def on_load_failed(self, error):
+        self.progress["value"] = 0
+        self.status_var.set("Load failed")
+        if isinstance(error, SaveFormatError):
+            messagebox.showerror("Error", "Invalid save file format")
+        else:
+            messagebox.showerror("Error", f"Failed to load file:\n{str(error)}")
+
+    def on_file_loaded(self, file_path, doc):
+        """Install a document finished by the background loader"""
+        self.commit_main_entries()
+        self.workspace.add(file_path, doc)
+        profiler.context.update({
+            "file_bytes": os.path.getsize(file_path),
+            "open_saves": len(self.workspace)
+        })
+        for section in ("countries", "characters"):
+            # Unknown until a lazily loaded section is decoded
+            profiler.context[section] = (
+                len(doc.data.get(section, {})) if doc.is_decoded(section) else None
+            )
+        self.install_document(file_path, doc)
+        self.progress["value"] = 100
+        self.status_var.set(f"Loaded {os.path.basename(file_path)}")
+        messagebox.showinfo("Success", "Comrade! File loaded successfully!")
+
+    def install_document(self, file_path, doc):
+        """Make doc the document every tab shows and edits"""
+        self.doc = doc
+        self.current_file = file_path
+        self.shown_main = {}
+        doc.history.on_change = self.update_title
+        self.current_country = None
+        self.current_character = None
+        self.country_entries = {}
+        self.character_entries = {}
+        self.trait_combos = []
+        self.relation_labels = []
+        self.country_form.clear()
+        self.character_form.clear()
+        self.populate_from_document()
+
+    def refresh_open_saves(self):
+        """List the workspace in the switcher, marking saves with unsaved edits"""
+        self.open_save_paths = self.workspace.paths()
+        modified = set(self.workspace.modified())
+        self.open_saves_combo["values"] = [
+            os.path.basename(path) + (" *" if path in modified else "")
+            for path in self.open_save_paths
+        ]
+        if self.current_file in self.open_save_paths:
+            self.open_saves_combo.current(self.open_save_paths.index(self.current_file))
+
+    def on_switch_save(self, event=None):
+        index = self.open_saves_combo.current()
+        if 0 <= index < len(self.open_save_paths):
+            self.switch_save(self.open_save_paths[index])
+
+    def switch_save(self, file_path):
+        """Show another open save, keeping edits of the current one in memory"""
+        if self.loader.busy():
+            messagebox.showwarning("Warning", "Wait for the save to finish loading")
+            self.refresh_open_saves()
+            return
+        self.commit_main_entries()
+        doc = self.workspace.switch(file_path)
+        self.install_document(doc.path, doc)
+        self.status_var.set(f"Switched to {os.path.basename(doc.path)}")
+
+    def close_save(self):
+        """Close the active save, asking first if it has unsaved edits"""
+        if not self.doc:
+            return
+        self.commit_main_entries()
+        if self.doc.is_modified() and not messagebox.askyesno(
+            "Unsaved Changes", f"Close {os.path.basename(self.current_file)} without saving?"
+        ):
+            return
+        doc = self.workspace.close(self.current_file)
+        if doc is not None:
+            self.install_document(doc.path, doc)
+            return
+        # Nothing left open
+        self.doc = None
+        self.current_file = None
+        self.reset_values()
+        self.shown_main = {}
+        self.country_filter.set_items([], "")
+        self.character_filter.set_items([], "")
+        self.country_form.clear()
+        self.character_form.clear()
+        self.refresh_open_saves()
+        self.open_saves_var.set("")
+        self.update_title()
+        self.status_var.set("No file loaded")
+
+    @profiler.timed("editor.populate_from_document")
+    def populate_from_document(self):
+        """Fill the main entries and entity lists from the loaded document"""
+        # Populate main variables
+        self.refresh_main_entries(self.variables)
+        
+        self.country_filter.set_items([], "")
+        self.character_filter.set_items([], "")
+        self.lists_filled = set()
+        self.fill_entity_lists()
+
+    def fill_entity_lists(self, event=None):
+        """Fill the country and character lists once they are needed.
+
+        Saves are opened lazily, so a list is filled (and its section
+        decoded) when its tab is shown, unless the section was already read.
+        """
+        if not self.doc:
+            return
+        shown = self.notebook.select()
+        
+        # Populate country list
+        if "countries" not in self.lists_filled and self.doc.has_countries() and (
+            shown == str(self.countries_tab) or self.doc.is_decoded("countries")
+        ):
+            self.lists_filled.add("countries")
+            self.all_countries = self.doc.country_tags()  # Store for filtering
+            self.country_filter.set_items(self.all_countries, self.country_search_var.get())
+        
+        # Populate character list
+        if "characters" not in self.lists_filled and self.doc.has_characters() and (
+            shown == str(self.characters_tab) or self.doc.is_decoded("characters")
+        ):
+            self.lists_filled.add("characters")
+            self.all_characters = self.doc.character_names()  # Store for filtering
+            self.character_filter.set_items(self.all_characters, self.character_search_var.get())
+
+    def refresh_main_entries(self, var_ids):
+        """Copy main variable values from the document into their entries"""
+        for var_id in var_ids:
+            value = self.doc.get_variable(var_id)
+            if value is None or var_id not in self.entries:
+                continue
+            self.entries[var_id].delete(0, tk.END)
+            self.entries[var_id].insert(0, str(value))
+            self.shown_main[var_id] = str(value)
+        self.update_title()
+
+    def main_entries_edited(self):
+        """True if a main variable entry differs from the value it showed"""
+        return any(
+            entry.get() != self.shown_main.get(var_id, "") for var_id, entry in self.entries.items()
+        )
+
+    def update_title(self, event=None):
+        """Show the file name and a * while there are unsaved changes"""
+        title = "Crisis in the Kremlin 2 Save Editor"
+        if self.doc and self.current_file:
+            unsaved = self.doc.is_modified() or self.main_entries_edited()
+            title += f" - {os.path.basename(self.current_file)}{' *' if unsaved else ''}"
+            self.refresh_open_saves()
+        self.root.title(title)
+
+    def widget_state(self, widget):
+        """Current value of a form widget, comparable with what it showed"""
+        if isinstance(widget, ttk.Checkbutton):
+            return widget.var.get()
+        return widget.get()
 
     def save_file(self):
         """Save changes back to file with backup"""
         if not self.current_file:
             messagebox.showwarning("Warning", "No file loaded")
             return
+        if self.loader.busy():
+            messagebox.showwarning("Warning", "Wait for the save to finish loading")
+            return
             
+        if not self.commit_main_entries():
+            return
         try:
-            # Create backup
-            backup_path = self.current_file + ".bak"
-            shutil.copyfile(self.current_file, backup_path)
-            
-            # Update main variables in data
-            for var_id, entry in self.entries.items():
-                value = entry.get()
-                if not value:
-                    continue
-                    
-                if var_id in self.int_vars:
-                    self.data[var_id] = int(value)
-                else:
-                    self.data[var_id] = float(value)
-            
-            # Convert data back to JSON with ensure_ascii=False to preserve Russian characters
-            new_json = json.dumps(self.data, separators=(',', ':'), indent=None, ensure_ascii=False)
-            
-            # Replace JSON portion in content using exact match
-            if self.json_match:
-                new_content = self.original_content.replace(
-                    self.json_match.group(0), new_json
-                )
-            else:
-                # Fallback to regex if match not stored
-                new_content = re.sub(r"{.*}", new_json, self.original_content, flags=re.DOTALL)
-            
-            # Write back to file
-            with open(self.current_file, "w", encoding="utf-8") as f:
-                f.write(new_content)
-        
+            backup_path = self.doc.save(self.current_file)
+            self.own_writes[workspace_key(self.current_file)] = file_stat(self.current_file)
+            if backup_path is None:
+                self.update_title()
+                messagebox.showinfo("Save", "No changes to save")
+                return
             messagebox.showinfo("Success", f"Comrade! File saved successfully!\nBackup created at {backup_path}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file:\n{str(e)}")
 
+    def commit_main_entries(self):
+        """Copy edited main variable entries into the document as one undo step.
+
+        Entries that are not numbers ("-", "1.5" for an int) are left
+        unapplied and reported; returns False if there were any.
+        """
+        if not self.doc:
+            return True
+        rejected = []
+        with self.doc.step("Main variables"):
+            for var_id, entry in self.entries.items():
+                value = entry.get()
+                if not value or value == self.shown_main.get(var_id):
+                    continue
+                try:
+                    self.doc.set_variable(var_id, value)
+                except ValueError:
+                    rejected.append(f"{var_id}: {value!r}")
+                    continue
+                self.shown_main[var_id] = value
+        if rejected:
+            messagebox.showerror("Error", "Not applied, not a valid number:\n" + "\n".join(rejected))
+            return False
+        return True
+
+    def undo(self):
+        """Revert the last edit or quick action"""
+        if not self.doc:
+            return
+        step = self.doc.undo()
+        if step is None:
+            self.status_var.set("Nothing to undo")
+            return
+        self.refresh_after_history(step)
+        self.status_var.set(f"Undid {step.label or 'edit'}")
+
+    def redo(self):
+        """Re-apply the last undone edit or quick action"""
+        if not self.doc:
+            return
+        step = self.doc.redo()
+        if step is None:
+            self.status_var.set("Nothing to redo")
+            return
+        self.refresh_after_history(step)
+        self.status_var.set(f"Redid {step.label or 'edit'}")
+
+    def refresh_after_history(self, step):
+        """Show the values an undo or redo changed"""
+        self.refresh_main_entries([path[0] for path in step.paths if len(path) == 1])
+        entities = {path[:2] for path in step.paths if len(path) > 1}
+        if ("countries", self.current_country) in entities:
+            self.on_country_select(None)
+        if ("characters", self.current_character) in entities:
+            self.on_character_select(None)
+
+    def open_diagnostics(self):
+        """Show hot-path timings collected by the profiler"""
+        DiagnosticsWindow(self.root, profiler)
+
     def reset_values(self):
         """Reset all entry fields"""
         for entry in self.entries.values():
             entry.delete(0, tk.END)
 
+    @profiler.timed("editor.on_country_select")
     def on_country_select(self, event):
         """Handle country selection from listbox"""
-        # Clear previous attributes
-        for widget in self.country_attr_container.winfo_children():
-            widget.destroy()
-        
         # Get selected country
         selection = self.country_listbox.curselection()
         if not selection:
+            self.country_form.clear()
             return
             
         country_tag = self.country_listbox.get(selection[0])
         # Only proceed if we have a valid country
         if not country_tag:
+            self.country_form.clear()
             return
             
         self.current_country = country_tag
-        country_data = self.data["countries"][country_tag]
-        
-        # Create a new frame to hold all attributes
-        self.country_attr_frame = ttk.Frame(self.country_attr_container, style="Red.TFrame")
-        self.country_attr_frame.pack(fill="both", expand=True)
-        
-        # Display country tag
-        tag_frame = ttk.Frame(self.country_attr_frame, style="Gold.TFrame")
-        tag_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(
-            tag_frame, 
-            text=f"Editing: {country_tag}", 
-            style="Gold.TLabel",
-            font=("Arial", 11, "bold")
-        ).pack()
+        country_data = self.doc.country(country_tag)
         
-        # Create attribute entries
-        self.country_entries = {}
+        # Display country tag, then one row per attribute
+        specs = [RowSpec(RowSpec.TITLE, f"Editing: {country_tag}")]
+        keys = [None]
         for attr, value in country_data.items():
             # Skip complex attributes (handled separately)
             if attr in self.complex_country_attrs:
                 continue
-                
-            # Create frame for this attribute
-            frame = ttk.Frame(self.country_attr_frame, style="Red.TFrame")
-            frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            # Create label
-            label = ttk.Label(frame, text=f"{attr}:", width=25, anchor="e", style="Gold.TLabel")
-            label.pack(side=tk.LEFT, padx=(0, 5))
-            
-            # Create entry based on value type
-            if isinstance(value, bool):
-                var = tk.BooleanVar(value=value)
-                entry = ttk.Checkbutton(frame, variable=var, style="Gold.TCheckbutton")
-                entry.var = var  # Store var for later access
-            elif value is None:
-                entry = ttk.Entry(frame, width=20, style="Gold.TEntry")
-                entry.insert(0, "null")
-            else:
-                entry = ttk.Entry(frame, width=20, style="Gold.TEntry")
-                entry.insert(0, str(value))
-                
-            entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            self.country_entries[attr] = entry
+            specs.append(self.value_row_spec(attr, value))
+            keys.append(attr)
         
         # Add complex attributes
         for complex_attr, sub_attrs in self.complex_country_attrs.items():
             if complex_attr not in country_data:
                 continue
-                
-            # Header for complex attribute
-            complex_frame = ttk.Frame(self.country_attr_frame, style="Gold.TFrame")
-            complex_frame.pack(fill=tk.X, padx=5, pady=5)
-            ttk.Label(
-                complex_frame, 
-                text=f"{complex_attr}:", 
-                style="Gold.TLabel",
-                font=("Arial", 10, "bold")
-            ).pack(anchor="w")
-            
-            # Create sub-attributes
+            specs.append(RowSpec(RowSpec.HEADER, f"{complex_attr}:"))
+            keys.append(None)
             for sub_attr in sub_attrs:
-                frame = ttk.Frame(self.country_attr_frame, style="Red.TFrame")
-                frame.pack(fill=tk.X, padx=20, pady=2)
-                
-                # Create label
-                label = ttk.Label(frame, text=f"{sub_attr}:", width=20, anchor="e", style="Gold.TLabel")
-                label.pack(side=tk.LEFT, padx=(0, 5))
-                
-                # Create entry
                 sub_value = country_data[complex_attr].get(sub_attr, 0.0)
-                entry = ttk.Entry(frame, width=15, style="Gold.TEntry")
-                entry.insert(0, str(sub_value))
-                entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-                self.country_entries[f"{complex_attr}_{sub_attr}"] = entry
+                specs.append(RowSpec(RowSpec.ENTRY, f"{sub_attr}:", str(sub_value), indent=True))
+                keys.append(f"{complex_attr}_{sub_attr}")
+        
+        widgets = self.country_form.show(specs)
+        self.country_entries = {
+            key: widget for key, widget in zip(keys, widgets) if key is not None
+        }
+        self.country_shown = {
+            key: self.widget_state(widget) for key, widget in self.country_entries.items()
+        }
+
+    def value_row_spec(self, attr, value, options=None):
+        """Pick the widget for a plain attribute based on its value"""
+        if isinstance(value, bool):
+            return RowSpec(RowSpec.CHECK, f"{attr}:", value)
+        if options is not None:
+            return RowSpec(RowSpec.COMBO, f"{attr}:", value if value else "", options)
+        if value is None:
+            return RowSpec(RowSpec.ENTRY, f"{attr}:", "null")
+        return RowSpec(RowSpec.ENTRY, f"{attr}:", str(value))
+
+    def changed_values(self, section, entries, shown, complex_attrs, skip=()):
+        """[(field path, value)] of the entries edited since shown.
+
+        Text is converted with the document's schema for the section, and
+        all of it before anything is written, so a value that does not fit
+        its field leaves the whole form unsaved.
+        """
+        schema = self.doc.schema(section)
+        sub_fields = {
+            f"{complex_attr}_{sub_attr}": (complex_attr, sub_attr)
+            for complex_attr, sub_attrs in complex_attrs.items()
+            for sub_attr in sub_attrs
+        }
+        changes = []
+        for key, entry in entries.items():
+            # Unchanged since shown, nothing to convert
+            if key in skip or self.widget_state(entry) == shown.get(key):
+                continue
+            path = sub_fields.get(key, (key,))
+            if isinstance(entry, ttk.Checkbutton):
+                value = entry.var.get()
+            else:
+                value = schema.convert(path, entry.get())
+            changes.append((path, value))
+        return changes
 
     def save_country(self):
         """Save changes to the currently selected country"""
@@ -835,214 +1291,145 @@ class CITK2SaveEditor:
             return
             
         try:
-            country_data = self.data["countries"][self.current_country]
+            tag = self.current_country
+            changes = self.changed_values(
+                "countries", self.country_entries, self.country_shown, self.complex_country_attrs
+            )
             
-            # Update simple attributes
-            for attr, entry in self.country_entries.items():
-                # Skip complex sub-attributes
-                if any(key in attr for key in self.complex_country_attrs):
-                    continue
-                    
-                # Get value based on widget type
-                if isinstance(entry, ttk.Checkbutton):
-                    value = entry.var.get()
-                else:
-                    value_str = entry.get()
-                    if value_str == "null":
-                        value = None
-                    elif value_str.lower() == "true":
-                        value = True
-                    elif value_str.lower() == "false":
-                        value = False
-                    else:
-                        try:
-                            value = int(value_str)
-                        except ValueError:
-                            try:
-                                value = float(value_str)
-                            except ValueError:
-                                value = value_str
-                
-                # Update data
-                country_data[attr] = value
-            
-            # Update complex attributes
-            for complex_attr in self.complex_country_attrs:
-                if complex_attr not in country_data:
-                    continue
-                    
-                for sub_attr in self.complex_country_attrs[complex_attr]:
-                    entry_key = f"{complex_attr}_{sub_attr}"
-                    if entry_key not in self.country_entries:
-                        continue
-                        
-                    value_str = self.country_entries[entry_key].get()
-                    try:
-                        # Convert to float only if contains decimal
-                        value = float(value_str) if '.' in value_str else int(value_str)
-                        country_data[complex_attr][sub_attr] = value
-                    except (ValueError, TypeError):
-                        pass  # Keep original value on error
+            with self.doc.step(f"Edit {tag}"):
+                for path, value in changes:
+                    self.doc.set(("countries", tag) + path, value)
             
+            self.country_shown = {
+                key: self.widget_state(widget) for key, widget in self.country_entries.items()
+            }
             messagebox.showinfo("Success", f"{self.current_country} updated successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save country:\n{str(e)}")
 
+    @profiler.timed("editor.on_character_select")
     def on_character_select(self, event):
         """Handle character selection from listbox"""
-        # Clear previous attributes
-        for widget in self.character_attr_container.winfo_children():
-            widget.destroy()
-        
         # Get selected character
         selection = self.character_listbox.curselection()
         if not selection:
+            self.character_form.clear()
+            return
+        
+        if len(selection) > 1:
+            # Several selected: the buttons act on all of them, nothing to edit field by field
+            self.current_character = None
+            self.character_form.show([RowSpec(RowSpec.TITLE, f"{len(selection)} characters selected")])
+            self.character_entries = {}
+            self.character_shown = {}
+            self.trait_combos = []
+            self.traits_shown = []
+            self.relation_labels = []
             return
             
         char_name = self.character_listbox.get(selection[0])
         # Only proceed if we have a valid character
         if not char_name:
+            self.character_form.clear()
             return
             
         self.current_character = char_name
-        char_data = self.data["characters"][char_name]
-        
-        # Create a new frame to hold all attributes
-        self.character_attr_frame = ttk.Frame(self.character_attr_container, style="Red.TFrame")
-        self.character_attr_frame.pack(fill="both", expand=True)
-        
-        # Display character name
-        name_frame = ttk.Frame(self.character_attr_frame, style="Gold.TFrame")
-        name_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(
-            name_frame, 
-            text=f"Editing: {char_name}", 
-            style="Gold.TLabel",
-            font=("Arial", 11, "bold")
-        ).pack()
-        
-        # Create attribute entries
-        self.character_entries = {}
+        char_data = self.doc.character(char_name)
+        
+        # Display character name, then one row per attribute
+        specs = [RowSpec(RowSpec.TITLE, f"Editing: {char_name}")]
+        keys = [None]
+        combo_options = {
+            "homeLand": self.country_options,
+            "desiredPosition": self.position_options,
+            "status": self.status_options
+        }
         for attr, value in char_data.items():
-            # Skip complex attributes (handled separately)
-            if attr in self.complex_character_attrs:
-                continue
-                
-            # Create frame for this attribute
-            frame = ttk.Frame(self.character_attr_frame, style="Red.TFrame")
-            frame.pack(fill=tk.X, padx=5, pady=2)
-            
-            # Create label
-            label = ttk.Label(frame, text=f"{attr}:", width=25, anchor="e", style="Gold.TLabel")
-            label.pack(side=tk.LEFT, padx=(0, 5))
-            
-            # Create entry based on value type
-            if isinstance(value, bool):
-                var = tk.BooleanVar(value=value)
-                entry = ttk.Checkbutton(frame, variable=var, style="Gold.TCheckbutton")
-                entry.var = var  # Store var for later access
-            elif attr == "homeLand":
-                combo = ttk.Combobox(frame, width=18, style="Gold.TCombobox")
-                combo['values'] = self.country_options
-                combo.set(value if value else "")
-                entry = combo
-            elif attr == "desiredPosition":
-                combo = ttk.Combobox(frame, width=18, style="Gold.TCombobox")
-                combo['values'] = self.position_options
-                combo.set(value if value else "")
-                entry = combo
-            elif attr == "status":
-                combo = ttk.Combobox(frame, width=18, style="Gold.TCombobox")
-                combo['values'] = self.status_options
-                combo.set(value if value else "")
-                entry = combo
-            elif attr == "traits":
-                # Skip here, handle separately below
+            # Skip complex attributes and traits (handled separately)
+            if attr in self.complex_character_attrs or attr == "traits":
                 continue
-            elif attr == "knownTraitors":
+            if attr == "knownTraitors" and not isinstance(value, bool):
                 # Convert list to comma-separated string
-                if isinstance(value, list):
-                    value_str = ",".join(map(str, value))
-                else:
-                    value_str = str(value)
-                entry = ttk.Entry(frame, width=20, style="Gold.TEntry")
-                entry.insert(0, value_str)
-            elif value is None:
-                entry = ttk.Entry(frame, width=20, style="Gold.TEntry")
-                entry.insert(0, "null")
+                spec = RowSpec(RowSpec.ENTRY, f"{attr}:", format_known_traitors(value))
             else:
-                entry = ttk.Entry(frame, width=20, style="Gold.TEntry")
-                entry.insert(0, str(value))
-                
-            entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            self.character_entries[attr] = entry
-        
-        # Add traits section with combo boxes
-        traits_frame = ttk.Frame(self.character_attr_frame, style="Gold.TFrame")
-        traits_frame.pack(fill=tk.X, padx=5, pady=5)
-        ttk.Label(
-            traits_frame, 
-            text="Traits:", 
-            style="Gold.TLabel",
-            font=("Arial", 10, "bold")
-        ).pack(anchor="w")
+                spec = self.value_row_spec(attr, value, combo_options.get(attr))
+            specs.append(spec)
+            keys.append(attr)
         
-        self.trait_combos = []
+        # Add traits section with combo boxes, only for existing traits
+        specs.append(RowSpec(RowSpec.HEADER, "Traits:"))
+        keys.append(None)
         traits = char_data.get("traits", [])
-        
-        # Create combo boxes only for existing traits
         for i, trait in enumerate(traits, 1):
-            frame = ttk.Frame(self.character_attr_frame, style="Red.TFrame")
-            frame.pack(fill=tk.X, padx=20, pady=2)
-            
-            label = ttk.Label(frame, text=f"Trait {i}:", width=20, anchor="e", style="Gold.TLabel")
-            label.pack(side=tk.LEFT, padx=(0, 5))
-            
-            combo = ttk.Combobox(frame, width=18, style="Gold.TCombobox")
-            combo['values'] = self.trait_options
-            combo.set(trait if trait else "")
-            combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            self.trait_combos.append(combo)
+            specs.append(RowSpec(
+                RowSpec.COMBO, f"Trait {i}:", trait if trait else "", self.trait_options, indent=True
+            ))
+            keys.append(("traits", i))
+        
+        # Who this character knows about and who knows about them
+        specs.append(RowSpec(RowSpec.HEADER, "Relations:"))
+        keys.append(None)
+        for label, text in self.relation_rows(char_name):
+            specs.append(RowSpec(RowSpec.INFO, label, text, indent=True))
+            keys.append(("relations", label))
         
         # Add complex attributes
         for complex_attr, sub_attrs in self.complex_character_attrs.items():
             if complex_attr not in char_data:
                 continue
-                
-            # Header for complex attribute
-            complex_frame = ttk.Frame(self.character_attr_frame, style="Gold.TFrame")
-            complex_frame.pack(fill=tk.X, padx=5, pady=5)
-            ttk.Label(
-                complex_frame, 
-                text=f"{complex_attr}:", 
-                style="Gold.TLabel",
-                font=("Arial", 10, "bold")
-            ).pack(anchor="w")
-            
-            # Create sub-attributes
+            specs.append(RowSpec(RowSpec.HEADER, f"{complex_attr}:"))
+            keys.append(None)
             for sub_attr in sub_attrs:
-                frame = ttk.Frame(self.character_attr_frame, style="Red.TFrame")
-                frame.pack(fill=tk.X, padx=20, pady=2)
-                
-                # Create label
-                label = ttk.Label(frame, text=f"{sub_attr}:", width=20, anchor="e", style="Gold.TLabel")
-                label.pack(side=tk.LEFT, padx=(0, 5))
-                
-                # Create appropriate widget based on sub-attribute type
                 sub_value = char_data[complex_attr].get(sub_attr, "")
-                
                 if complex_attr == "customCharacterInfo" and sub_attr == "wasEnoughPoints":
-                    # Create checkbox for boolean value
-                    var = tk.BooleanVar(value=sub_value)
-                    entry = ttk.Checkbutton(frame, variable=var, style="Gold.TCheckbutton")
-                    entry.var = var
+                    # Checkbox for boolean value
+                    spec = RowSpec(RowSpec.CHECK, f"{sub_attr}:", sub_value, indent=True)
                 else:
-                    # Create entry for other values
-                    entry = ttk.Entry(frame, width=15, style="Gold.TEntry")
-                    entry.insert(0, str(sub_value))
-                
-                entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-                self.character_entries[f"{complex_attr}_{sub_attr}"] = entry
+                    spec = RowSpec(RowSpec.ENTRY, f"{sub_attr}:", str(sub_value), indent=True)
+                specs.append(spec)
+                keys.append(f"{complex_attr}_{sub_attr}")
+        
+        widgets = self.character_form.show(specs)
+        self.character_entries = {}
+        self.trait_combos = []
+        self.relation_labels = []
+        for key, widget in zip(keys, widgets):
+            if isinstance(key, tuple) and key[0] == "relations":
+                self.relation_labels.append(widget)
+            elif isinstance(key, tuple):
+                self.trait_combos.append(widget)
+            elif key is not None:
+                self.character_entries[key] = widget
+        self.character_shown = {
+            key: self.widget_state(widget) for key, widget in self.character_entries.items()
+        }
+        self.traits_shown = [combo.get() for combo in self.trait_combos]
+
+    def relation_rows(self, name):
+        """(label, text) rows describing a character's place in the traitor graph"""
+        graph = self.doc.traitor_graph()
+        character_id = graph.ids.get(name)
+        known = [
+            other if other is not None else f"#{traitor_id}"
+            for traitor_id, other in graph.known_traitors(name)
+        ]
+        known_by = sorted(graph.known_by(character_id)) if character_id is not None else []
+        cluster = sorted(graph.cluster(name) - {name})
+        return [
+            ("Knows about:", format_names(known)),
+            ("Known by:", format_names(known_by)),
+            ("Knows dead:", format_names(graph.knows_dead(name))),
+            ("Mutual cluster:", format_names(cluster))
+        ]
+
+    def refresh_relations(self):
+        """Rewrite the relation rows of the shown character after an edit"""
+        if not self.current_character or not self.relation_labels:
+            return
+        if self.current_character not in self.data.get("characters", {}):
+            return
+        for widget, (_, text) in zip(self.relation_labels, self.relation_rows(self.current_character)):
+            widget.configure(text=text)
 
     def save_character(self):
         """Save changes to the currently selected character"""
@@ -1050,189 +1437,76 @@ class CITK2SaveEditor:
             return
             
         try:
-            char_data = self.data["characters"][self.current_character]
+            name = self.current_character
+            # Traits come from the combo boxes, knownTraitors is a comma-separated list
+            changes = self.changed_values(
+                "characters", self.character_entries, self.character_shown,
+                self.complex_character_attrs, skip=("traits", "knownTraitors")
+            )
             
-            # Update simple attributes
-            for attr, entry in self.character_entries.items():
-                # Skip complex sub-attributes
-                if any(key in attr for key in self.complex_character_attrs):
-                    continue
-                    
-                # Special handling for traits (handled separately)
-                if attr == "traits":
-                    continue
-                    
-                # Handle knownTraitors as comma-separated list to prevent issues
-                if attr == "knownTraitors":
-                    value_str = entry.get()
-                    if value_str == "null":
-                        value = None
-                    elif value_str == "":
-                        value = []
-                    else:
-                        try:
-                            # Convert comma-separated string back to list of integers
-                            value = [int(x.strip()) for x in value_str.split(",") if x.strip()]
-                        except ValueError:
-                            value = []
-                    char_data[attr] = value
-                    continue
-                    
-                # Get value based on widget type
-                if isinstance(entry, ttk.Checkbutton):
-                    value = entry.var.get()
-                elif isinstance(entry, ttk.Combobox):
-                    value = entry.get()
-                    # Convert to appropriate type if needed
-                    if value == "null":
-                        value = None
-                    elif value.lower() == "true":
-                        value = True
-                    elif value.lower() == "false":
-                        value = False
-                    elif value.isdigit():
-                        value = int(value)
-                    else:
-                        try:
-                            value = float(value)
-                        except ValueError:
-                            pass  # Keep as string
-                else:  # Regular entry
-                    value_str = entry.get()
-                    if value_str == "null":
-                        value = None
-                    elif value_str.lower() == "true":
-                        value = True
-                    elif value_str.lower() == "false":
-                        value = False
-                    else:
-                        try:
-                            value = int(value_str)
-                        except ValueError:
-                            try:
-                                value = float(value_str)
-                            except ValueError:
-                                value = value_str
+            with self.doc.step(f"Edit {name}"):
+                for path, value in changes:
+                    self.doc.set(("characters", name) + path, value)
                 
-                # Update data
-                char_data[attr] = value
-            
-            # Update traits from combo boxes - filter out empty values
-            traits_list = []
-            for combo in self.trait_combos:
-                trait = combo.get().strip()
-                if trait:  # Only add non-empty traits
-                    traits_list.append(trait)
-            char_data["traits"] = traits_list
+                entry = self.character_entries.get("knownTraitors")
+                if entry is not None and self.widget_state(entry) != self.character_shown.get("knownTraitors"):
+                    self.doc.set_character_field(name, "knownTraitors", parse_known_traitors(entry.get()))
             
-            # Update complex attributes
-            for complex_attr in self.complex_character_attrs:
-                if complex_attr not in char_data:
-                    continue
-                    
-                for sub_attr in self.complex_character_attrs[complex_attr]:
-                    entry_key = f"{complex_attr}_{sub_attr}"
-                    if entry_key not in self.character_entries:
-                        continue
-                        
-                    # Get value based on widget type
-                    entry = self.character_entries[entry_key]
-                    
-                    if isinstance(entry, ttk.Checkbutton):
-                        # Checkbox value
-                        value = entry.var.get()
-                    else:
-                        # Entry value
-                        value_str = entry.get()
-                        if complex_attr == "customCharacterInfo":
-                            # Special handling for customCharacterInfo types
-                            if sub_attr == "wasEnoughPoints":
-                                value = value_str.lower() in ['true', '1']
-                            elif sub_attr == "pictureNumber":
-                                try:
-                                    value = int(value_str)
-                                except (ValueError, TypeError):
-                                    value = 0
-                            else:
-                                value = value_str  # Keep as string for name/surname
-                        else:
-                            try:
-                                # Convert to float only if contains decimal
-                                value = float(value_str) if '.' in value_str else int(value_str)
-                            except (ValueError, TypeError):
-                                value = value_str  # Keep as string on error
-                    
-                    # Update the complex attribute
-                    char_data[complex_attr][sub_attr] = value
+                # Update traits from combo boxes - filter out empty values
+                if [combo.get() for combo in self.trait_combos] != self.traits_shown:
+                    traits_list = []
+                    for combo in self.trait_combos:
+                        trait = combo.get().strip()
+                        if trait:  # Only add non-empty traits
+                            traits_list.append(trait)
+                    self.doc.set_character_field(name, "traits", traits_list)
             
+            self.character_shown = {
+                key: self.widget_state(widget) for key, widget in self.character_entries.items()
+            }
+            self.traits_shown = [combo.get() for combo in self.trait_combos]
+            self.refresh_relations()
             messagebox.showinfo("Success", f"{self.current_character} updated successfully!")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save character:\n{str(e)}")
 
     # ====== FUNCTIONS FOR ACTION BUTTONS ======
     
-    def loyal_to_cause(self):
-        """Set loyalty variables to 100"""
-        loyal_vars = [
-            "specialServicesLoyalty", 
-            "militaryStaffLoyalty", 
-            "armyStaffLoyalty", 
-            "intelligentsiaLoyalty"
-        ]
-        
-        for var in loyal_vars:
+    def apply_main_action(self, action, var_ids, text):
+        """Run a main-variable quick action and mirror it into the entries"""
+        if self.doc:
+            action(self.doc)
+            self.refresh_main_entries(var_ids)
+            return
+        # No save loaded yet, just pre-fill the entries
+        for var in var_ids:
             if var in self.entries:
                 self.entries[var].delete(0, tk.END)
-                self.entries[var].insert(0, "100")
-        
+                self.entries[var].insert(0, text)
+    
+    def loyal_to_cause(self):
+        """Set loyalty variables to 100"""
+        self.apply_main_action(SaveDocument.loyal_to_cause, LOYALTY_VARS, "100")
         messagebox.showinfo("Loyal to the Cause", "Loyalty variables set to 100!")
 
     def clear_debt(self):
         """Set all loan variables to 0"""
-        debt_vars = ["usLoan", "fraLoan", "imfLoan"]
-        
-        for var in debt_vars:
-            if var in self.entries:
-                self.entries[var].delete(0, tk.END)
-                self.entries[var].insert(0, "0")
-        
+        self.apply_main_action(SaveDocument.clear_debt, DEBT_VARS, "0")
         messagebox.showinfo("Clear Debt", "All loans cleared!")
 
     def fall_of_usa(self):
         """Set American variables to 0"""
-        usa_vars = [
-            "americanArmyLevel", 
-            "americanEconomyLevel", 
-            "americanPopularHappiness"
-        ]
-        
-        for var in usa_vars:
-            if var in self.entries:
-                self.entries[var].delete(0, tk.END)
-                self.entries[var].insert(0, "0")
-        
+        self.apply_main_action(SaveDocument.fall_of_usa, USA_VARS, "0")
         messagebox.showinfo("Fall of the USA", "American variables set to 0!")
         
     def scientific_breakthrough(self):
         """Set all technology points to 1000"""
-        if not self.data or "technologies" not in self.data:
+        if not self.data or not self.doc.has_technologies():
             messagebox.showwarning("Warning", "No technology data available")
             return
             
         try:
-            # Iterate through all technology categories
-            for category, tech_list in self.data["technologies"].items():
-                # Iterate through each technology level in the category
-                for tech in tech_list:
-                    # Set all point types to 1000
-                    if "investedCost" in tech:
-                        tech["investedCost"] = {
-                            "militaryPoints": 1000,
-                            "physicPoints": 1000,
-                            "cyberneticPoints": 1000,
-                            "civilPoints": 1000
-                        }
-            
+            self.doc.scientific_breakthrough()
             messagebox.showinfo("Scientific Breakthrough", 
                                "All technology points set to 1000!")
         except Exception as e:
@@ -1240,127 +1514,206 @@ class CITK2SaveEditor:
 
     def diplomatic_superparty(self):
         """Set relationshipWithPlayer to 100 for all active countries"""
-        if not self.data or "countries" not in self.data:
+        if not self.data or not self.doc.has_countries():
             messagebox.showwarning("Warning", "No country data available")
             return
             
-        count = 0
-        for country_tag, country_data in self.data["countries"].items():
-            if country_data.get("activeInGame", False):
-                if "relationshipWithPlayer" in country_data:
-                    country_data["relationshipWithPlayer"] = 100
-                    count += 1
-        
+        count = self.doc.diplomatic_superparty()
         messagebox.showinfo("Diplomatic Superparty", 
                            f"Set relationship to 100 for {count} active countries!")
 
     def mass_alignment(self):
         """Set foreignPolicyVector to 100 for all active countries"""
-        if not self.data or "countries" not in self.data:
+        if not self.data or not self.doc.has_countries():
             messagebox.showwarning("Warning", "No country data available")
             return
             
-        count = 0
-        for country_tag, country_data in self.data["countries"].items():
-            if country_data.get("activeInGame", False):
-                if "foreignPolicyVector" in country_data:
-                    country_data["foreignPolicyVector"] = 100
-                    count += 1
-        
+        count = self.doc.mass_alignment()
         messagebox.showinfo("Mass Alignment", 
                            f"Set foreign policy to 100 for {count} active countries!")
 
     def liberalization_vector_0(self):
         """Set liberalizationVector to 0 for all active countries"""
-        if not self.data or "countries" not in self.data:
+        if not self.data or not self.doc.has_countries():
             messagebox.showwarning("Warning", "No country data available")
             return
             
-        count = 0
-        for country_tag, country_data in self.data["countries"].items():
-            if country_data.get("activeInGame", False):
-                if "liberalizationVector" in country_data:
-                    country_data["liberalizationVector"] = 0
-                    count += 1
-        
+        count = self.doc.liberalization_vector_0()
         messagebox.showinfo("Liberalization Vector 0", 
                            f"Set liberalization to 0 for {count} active countries!")
         
     def liberalization_vector_100(self):
         """Set liberalizationVector to 100 for all active countries"""
-        if not self.data or "countries" not in self.data:
+        if not self.data or not self.doc.has_countries():
             messagebox.showwarning("Warning", "No country data available")
             return
             
-        count = 0
-        for country_tag, country_data in self.data["countries"].items():
-            if country_data.get("activeInGame", False):
-                if "liberalizationVector" in country_data:
-                    country_data["liberalizationVector"] = 100
-                    count += 1
-        
+        count = self.doc.liberalization_vector_100()
         messagebox.showinfo("Liberalization Vector 100", 
                            f"Set liberalization to 100 for {count} active countries!")
 
-    def set_character_status(self, status):
-        """Set status for the selected character"""
-        if not self.current_character or not self.data:
+    def selected_characters(self):
+        """Names of the selected characters, or None after warning that there are none"""
+        if not self.data:
             messagebox.showwarning("Warning", "No character selected")
-            return
-            
-        if "characters" not in self.data or self.current_character not in self.data["characters"]:
+            return None
+        if not self.doc.has_characters():
             messagebox.showwarning("Warning", "Character data not available")
+            return None
+        characters = self.data["characters"]
+        names = [name for name in self.character_filter.selected_items() if name in characters]
+        if not names:
+            messagebox.showwarning("Warning", "No character selected")
+            return None
+        return names
+
+    def edit_selected_characters(self, attr, value, title, what):
+        """Set attr on every selected character as one undo step, with one summary"""
+        names = self.selected_characters()
+        if names is None:
             return
-            
-        # Update the status
-        char_data = self.data["characters"][self.current_character]
-        char_data["status"] = status
+        
+        if len(names) > 1:
+            count = self.doc.set_characters_fields(names, {attr: value})
+            self.status_var.set(f"{what} for {count} characters")
+            messagebox.showinfo(title, f"{what} for {count} characters!")
+            return
+        
+        name = names[0]
+        if attr == "status":
+            self.doc.set_character_status(name, value)
+        elif attr == "power":
+            self.doc.set_character_power(name, value)
+        else:
+            self.doc.set_characters_fields(names, {attr: value})
         
         # Update the UI if we're currently editing this character
-        if "status" in self.character_entries:
-            self.character_entries["status"].set(status)
+        entry = self.character_entries.get(attr) if name == self.current_character else None
+        if isinstance(entry, ttk.Combobox):
+            entry.set(value)
+        elif entry is not None:
+            entry.delete(0, tk.END)
+            entry.insert(0, str(value))
+        if entry is not None:
+            self.character_shown[attr] = self.widget_state(entry)
+        self.refresh_relations()
         
-        messagebox.showinfo("Status Changed", 
-                           f"{self.current_character} status set to {status}!")
+        messagebox.showinfo(title, f"{name} {what}!")
+
+    def set_character_status(self, status):
+        """Set status for the selected characters"""
+        self.edit_selected_characters("status", status, "Status Changed", f"status set to {status}")
 
     def set_character_power(self, power_value):
-        """Set power for the selected character"""
-        if not self.current_character or not self.data:
-            messagebox.showwarning("Warning", "No character selected")
+        """Set power for the selected characters"""
+        self.edit_selected_characters("power", power_value, "Power Changed", f"power set to {power_value}")
+
+    def set_character_relations(self, relations):
+        """Set relations to the player for the selected characters"""
+        self.edit_selected_characters(
+            "relationsToPlayer", relations, "Relations Changed", f"relations set to {relations:g}"
+        )
+
+    def select_characters_where(self, event=None):
+        """Select every character matching the conditions in the Select Where box"""
+        if not self.data or not self.doc.has_characters():
+            messagebox.showwarning("Warning", "No character data available")
             return
-            
-        if "characters" not in self.data or self.current_character not in self.data["characters"]:
-            messagebox.showwarning("Warning", "Character data not available")
+        try:
+            where = parse_conditions(self.character_where_var.get())
+            names = matching(self.data["characters"], where)
+        except RuleError as e:
+            messagebox.showerror("Error", f"Invalid conditions:\n{str(e)}")
             return
-            
-        # Update the power
-        char_data = self.data["characters"][self.current_character]
-        char_data["power"] = power_value
-        
-        # Update the UI if we're currently editing this character
-        if "power" in self.character_entries:
-            self.character_entries["power"].delete(0, tk.END)
-            self.character_entries["power"].insert(0, str(power_value))
         
-        messagebox.showinfo("Power Changed", 
-                           f"{self.current_character} power set to {power_value}!")
-    
+        # Show the whole list, so no match is hidden by the search box
+        self.character_search_var.set("")
+        self.character_filter.cancel()
+        self.character_filter.apply("")
+        count = self.character_filter.select_many(names)
+        self.on_character_select(None)
+        self.status_var.set(f"{count} characters selected")
+
     def supreme_leader(self):
         """Set all characters' relations to player to 100"""
-        if not self.data or "characters" not in self.data:
+        if not self.data or not self.doc.has_characters():
             messagebox.showwarning("Warning", "No character data available")
             return
             
-        count = 0
-        for char_name, char_data in self.data["characters"].items():
-            if "relationsToPlayer" in char_data:
-                char_data["relationsToPlayer"] = 100
-                count += 1
-        
+        count = self.doc.supreme_leader()
         messagebox.showinfo("Supreme Leader", 
                            f"Set relations to 100 for {count} characters!")
 
+    def open_presets(self):
+        """Pick several quick actions or a preset file and apply them in one pass"""
+        if not self.doc:
+            messagebox.showwarning("Warning", "No save file loaded")
+            return
+        
+        window = tk.Toplevel(self.root)
+        window.title("Run Several Actions")
+        window.configure(bg="#8B0000")
+        window.transient(self.root)
+        
+        rules_frame = ttk.Frame(window, style="Gold.TFrame")
+        rules_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        choices = []
+        
+        def add_rules(rules, checked):
+            for rule in rules:
+                var = tk.BooleanVar(value=checked)
+                ttk.Checkbutton(
+                    rules_frame, 
+                    text=rule.name, 
+                    variable=var,
+                    style="Gold.TCheckbutton"
+                ).pack(anchor="w", padx=5, pady=2)
+                choices.append((rule, var))
+        
+        def load_file():
+            path = filedialog.askopenfilename(
+                parent=window,
+                filetypes=[("Preset Files", "*.json"), ("All Files", "*.*")]
+            )
+            if not path:
+                return
+            try:
+                add_rules(load_rules(path), True)
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Error", f"Failed to load preset:\n{str(e)}", parent=window)
+        
+        def apply():
+            rules = [rule for rule, var in choices if var.get()]
+            if not rules:
+                return
+            try:
+                with self.doc.step("Run Several"):
+                    counts = compile_rules(rules).apply(self.doc)
+            except RuleError as e:
+                messagebox.showerror("Error", f"Invalid preset:\n{str(e)}", parent=window)
+                return
+            var_ids = [field for rule in rules if rule.target == "variables" for field in rule.assign]
+            self.refresh_main_entries(var_ids)
+            window.destroy()
+            summary = "\n".join(f"{name}: {count} changed" for name, count in counts.items())
+            messagebox.showinfo("Actions Applied", summary)
+        
+        add_rules(QUICK_ACTION_RULES, False)
+        
+        button_frame = ttk.Frame(window, style="Gold.TFrame")
+        button_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
+        for text, command in (("Load Preset File...", load_file), ("Apply", apply), ("Cancel", window.destroy)):
+            ttk.Button(
+                button_frame, 
+                text=text, 
+                command=command,
+                style="Gold.TButton"
+            ).pack(side="left", padx=10, pady=5, expand=True)
+
 if __name__ == "__main__":
+    # Cross-save search parses in spawned processes; in the frozen exe they
+    # must run the worker, not start another editor
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = CITK2SaveEditor(root)
     root.mainloop()
\ No newline at end of file
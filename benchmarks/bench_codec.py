@@ -0,0 +1,144 @@
+"""Compare saving through the stdlib json round trip with the patch writer.
+
+Usage: python benchmarks/bench_codec.py [SAVE ...] [--characters N] [--repeat N]
+
+Without SAVE a save is generated and some of its numbers are rewritten
+the way Python would not write them (trailing zeros, upper-case
+exponents), as the game's serializer does. Each scenario makes a few
+edits and writes the save both ways: json.dumps of the whole data, as
+the editor used to, and SaveDocument.serialize(). For each it prints the
+best time and how many untouched variables and entities no longer have
+their original text.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from citk2.core import SaveDocument  # noqa: E402
+from citk2.patch import parse_document  # noqa: E402
+from generate_save import generate  # noqa: E402
+
+EDITED = 100
+_FLOAT = re.compile(r'(?<=:)(-?)(\d+)\.(\d+)(?=[,}\]])')
+
+
+def game_numbers(text):
+    """Rewrite every 5th float with a trailing zero and every 11th in E notation"""
+    count = [0]
+
+    def rewrite(match):
+        count[0] += 1
+        sign, whole, fraction = match.groups()
+        if count[0] % 11 == 0 and whole != "0":
+            # Same digits, decimal point moved: the value is unchanged
+            digits = (whole + fraction).lstrip("0") or "0"
+            exponent = len(whole.lstrip("0")) - 1
+            return f"{sign}{digits[0]}.{digits[1:] or '0'}E+{exponent:02d}"
+        if count[0] % 5 == 0:
+            return match.group(0) + "0"
+        return match.group(0)
+    return _FLOAT.sub(rewrite, text)
+
+
+def edit_variable(doc):
+    doc.set_variable("politicalPower", 12.5)
+    return [("politicalPower",)]
+
+
+def edit_characters(doc):
+    names = doc.character_names()[:EDITED]
+    for name in names:
+        doc.set_character_field(name, "power", 1)
+    return [("characters", name) for name in names]
+
+
+def add_keys(doc):
+    names = doc.character_names()[:EDITED]
+    for name in names:
+        doc.set(("characters", name, "editedBy"), "citk2")
+    return [("characters", name) for name in names]
+
+
+def add_variable(doc):
+    doc.set(("editorVersion",), 2)
+    return [("editorVersion",)]
+
+
+SCENARIOS = [
+    ("one variable", edit_variable),
+    (f"{EDITED} characters", edit_characters),
+    (f"new key on {EDITED} characters", add_keys),
+    ("new top-level key", add_variable),
+]
+
+
+def stdlib_dump(doc):
+    """The editor's old save path: dump everything"""
+    return json.dumps(doc.data, separators=(',', ':'), ensure_ascii=False)
+
+
+def changed_untouched(original, output, edited):
+    """Count indexed values outside the edited paths whose text changed"""
+    _, old_index = parse_document(original)
+    _, new_index = parse_document(output)
+    changed = 0
+    for path, (start, end) in old_index.spans.items():
+        if not path or any(path[:len(e)] == e or e[:len(path)] == path for e in edited):
+            continue
+        span = new_index.spans.get(path)
+        if span is None or output[span[0]:span[1]] != original[start:end]:
+            changed += 1
+    return changed
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(path, repeat):
+    original = SaveDocument.load(path).index.text
+    print(f"{os.path.basename(path)}: {len(original) / 2**20:.2f} MiB")
+    print(f"{'scenario':<32} {'writer':<8} {'time (ms)':>10} {'untouched changed':>18}")
+    for label, edit in SCENARIOS:
+        doc = SaveDocument.load(path)
+        edited = edit(doc)
+        for writer, func in (("stdlib", lambda: stdlib_dump(doc)), ("citk2", doc.render_json)):
+            seconds = best_time(func, repeat)
+            changed = changed_untouched(original, func(), edited)
+            print(f"{label:<32} {writer:<8} {seconds * 1000:>10.1f} {changed:>18}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("saves", nargs="*")
+    parser.add_argument("--characters", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.saves:
+        for path in args.saves:
+            run(path, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "game-numbers.citk2save")
+        text = json.dumps(generate(characters=args.characters), separators=(',', ':'), ensure_ascii=False)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(game_numbers(text))
+        run(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
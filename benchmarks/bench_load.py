@@ -0,0 +1,75 @@
+"""Compare the old regex loader against the editor's loading path.
+
+Usage: python benchmarks/bench_load.py SAVE [SAVE ...] [--repeat N]
+
+For each save prints the best wall time and the tracemalloc peak of the
+regex + json.loads load the editor used to do and of what
+SaveDocument.load() runs now: read_save() followed by parse_document().
+Pages of the mapped file live in the OS page cache and are not counted by
+tracemalloc, which is the point: only the decoded JSON str and the parsed
+objects are Python allocations. The regex path copies the JSON out of the
+file content only when the save has a header or trailer around it, as the
+game's saves and generate_save.py's do.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from citk2.loader import read_save  # noqa: E402
+from citk2.patch import parse_document  # noqa: E402
+
+
+def load_regex(path):
+    """The loader CITK2SaveEditor.open_file used before citk2.loader"""
+    with open(path, "r", encoding="utf-8") as f:
+        content = f.read()
+    match = re.search(r"({.*})", content, re.DOTALL)
+    return content, json.loads(match.group(1))
+
+
+def load_document(path):
+    """The read and parse behind SaveDocument.load()"""
+    prefix, json_text, suffix = read_save(path)
+    return prefix, parse_document(json_text), suffix
+
+
+def measure(func, path, repeat):
+    """Return (best seconds, peak bytes) for func(path)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        elapsed = time.perf_counter() - start
+        del result
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    result = func(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("saves", nargs="+")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'save':<40} {'loader':<7} {'time (ms)':>10} {'peak (MiB)':>11}")
+    for path in args.saves:
+        name = os.path.basename(path)
+        for label, func in (("regex", load_regex), ("citk2", load_document)):
+            seconds, peak = measure(func, path, args.repeat)
+            print(f"{name:<40} {label:<7} {seconds * 1000:>10.1f} {peak / 2**20:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Benchmark the editor's hot paths across synthetic save sizes.
+
+Usage: python benchmarks/bench_suite.py [--tiers small,medium,large] [--repeat N]
+           [--output results.json] [--compare baseline.json] [--threshold PCT] [--gui]
+
+Each tier generates a save with generate_save.py and times open, save,
+filter and every quick action on it. Results are written as JSON; with
+--compare the run is checked against an earlier results file and exits
+with status 1 if any benchmark got slower by more than --threshold
+percent. --gui also times list population, entity selection and
+filtering in the real window, which needs a display.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from citk2.cache import ParseCache  # noqa: E402
+from citk2.core import SaveDocument  # noqa: E402
+from citk2.search import SearchIndex  # noqa: E402
+from generate_save import write_save  # noqa: E402
+
+TIERS = {
+    "small": dict(countries=50, characters=200, tech_categories=6, techs_per_category=8),
+    "medium": dict(countries=200, characters=2000, tech_categories=10, techs_per_category=20),
+    "large": dict(countries=1000, characters=20000, tech_categories=20, techs_per_category=50),
+}
+
+QUICK_ACTIONS = [
+    "loyal_to_cause", "clear_debt", "fall_of_usa", "scientific_breakthrough",
+    "diplomatic_superparty", "mass_alignment", "liberalization_vector_0",
+    "liberalization_vector_100", "supreme_leader"
+]
+
+# Keystrokes of a user searching the character list
+TYPED_QUERY = "Mikhail Gor"
+
+
+def measure(func, repeat, setup=None):
+    """Time func(setup()) repeat times, returns summary stats in ms"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg)
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "best_ms": round(min(times), 3),
+        "mean_ms": round(sum(times) / len(times), 3),
+        "runs": repeat
+    }
+
+
+def bench_core(path, workdir, repeat):
+    results = {}
+    out_path = os.path.join(workdir, "out.citk2save")
+
+    def fresh():
+        return SaveDocument.load(path)
+
+    results["open"] = measure(lambda _: SaveDocument.load(path), repeat)
+    results["open_lazy"] = measure(lambda _: SaveDocument.load(path, lazy=True), repeat)
+
+    cache = ParseCache(os.path.join(workdir, "cache"))
+    cache.load(path)
+    results["open_cached"] = measure(lambda _: cache.load(path), repeat)
+    lazy_cache = ParseCache(os.path.join(workdir, "lazy-cache"))
+    lazy_cache.load(path, lazy=True)
+    results["open_cached_lazy"] = measure(lambda _: lazy_cache.load(path, lazy=True), repeat)
+
+    results["save_unchanged"] = measure(lambda doc: doc.save(out_path, 1), repeat, fresh)
+
+    def edit_one():
+        doc = fresh()
+        doc.set_variable("defcon", 1)
+        return doc
+    results["save_one_field"] = measure(lambda doc: doc.save(out_path, 1), repeat, edit_one)
+
+    def edit_bulk():
+        doc = fresh()
+        doc.supreme_leader()
+        return doc
+    results["save_after_bulk"] = measure(lambda doc: doc.save(out_path, 1), repeat, edit_bulk)
+
+    names = fresh().character_names()
+    results["filter_index"] = measure(lambda _: SearchIndex(names), repeat)
+
+    def type_query(index):
+        for i in range(1, len(TYPED_QUERY) + 1):
+            index.search(TYPED_QUERY[:i])
+    results["filter_typing"] = measure(type_query, repeat, lambda: SearchIndex(names))
+
+    for action in QUICK_ACTIONS:
+        results[f"action.{action}"] = measure(lambda doc: getattr(doc, action)(), repeat, fresh)
+    return results
+
+
+class _QuietMessagebox:
+    """Stands in for tkinter.messagebox so benchmarks never block on a dialog"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: True
+
+
+def bench_gui(path, repeat):
+    """Time the Tk side of the editor, returns None without a display"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+    root.withdraw()
+
+    spec = importlib.util.spec_from_file_location("citk2_editor", os.path.join(ROOT, "CitK2-Save-Editor.py"))
+    editor = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(editor)
+    editor.messagebox = _QuietMessagebox()
+    app = editor.CITK2SaveEditor(root)
+    doc = SaveDocument.load(path)
+
+    def settle():
+        # Let chunked list population and debounced filters finish
+        while app.country_filter.pending or app.character_filter.pending:
+            root.update()
+
+    results = {}
+    results["populate"] = measure(lambda _: (app.on_file_loaded(path, doc), settle()), repeat)
+
+    def select(listbox, handler):
+        def run(_):
+            for i in (0, 1, 0, 1):
+                listbox.selection_clear(0, tk.END)
+                listbox.selection_set(i)
+                handler(None)
+            root.update_idletasks()
+        return run
+    results["select_country"] = measure(select(app.country_listbox, app.on_country_select), repeat)
+    results["select_character"] = measure(select(app.character_listbox, app.on_character_select), repeat)
+
+    def type_query(_):
+        for i in range(1, len(TYPED_QUERY) + 1):
+            app.character_filter.apply(TYPED_QUERY[:i])
+        app.character_filter.apply("")
+    results["filter_listbox"] = measure(type_query, repeat)
+    root.destroy()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print per-benchmark changes, returns the names that regressed"""
+    regressions = []
+    for tier, tier_results in results["tiers"].items():
+        old_tier = baseline.get("tiers", {}).get(tier)
+        if not old_tier:
+            continue
+        for name, stats in tier_results["results"].items():
+            old = old_tier["results"].get(name)
+            if not old or not old["best_ms"]:
+                continue
+            change = (stats["best_ms"] - old["best_ms"]) / old["best_ms"] * 100
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{tier}/{name}")
+            print(f"{tier:<8} {name:<36} {old['best_ms']:>10.2f} -> {stats['best_ms']:>10.2f} ms ({change:+.1f}%){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tiers", default="small,medium,large")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--threshold", type=float, default=20.0)
+    parser.add_argument("--gui", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "tiers": {}
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for tier in args.tiers.split(","):
+            counts = TIERS[tier]
+            path = os.path.join(workdir, f"{tier}.citk2save")
+            size = write_save(path, **counts)
+            print(f"{tier}: {size / 2**20:.2f} MiB", file=sys.stderr)
+            tier_results = bench_core(path, workdir, args.repeat)
+            if args.gui:
+                gui_results = bench_gui(path, args.repeat)
+                if gui_results is None:
+                    print("No display, skipping GUI benchmarks", file=sys.stderr)
+                else:
+                    tier_results.update({f"gui.{k}": v for k, v in gui_results.items()})
+            results["tiers"][tier] = {"counts": counts, "bytes": size, "results": tier_results}
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
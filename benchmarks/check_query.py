@@ -0,0 +1,91 @@
+"""Check that cross-save queries match exactly what the rules match.
+
+Usage: python benchmarks/check_query.py [--characters N] [--seed N]
+
+QueryEngine pre-filters with SQL and re-checks with the rules'
+predicates, so the SQL must never drop a row the predicates keep. This
+writes a generated save whose characters have null, missing and
+mixed-type values (numbers as text, bools, floats, dicts) in the fields
+below, runs every pushed-down comparison against it through the index,
+and compares the matches with rules.matching() on the decoded save.
+Exits with status 1 on any difference.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from citk2.query import PUSHDOWN_OPS, Query, QueryEngine  # noqa: E402
+from citk2.rules import matching  # noqa: E402
+from citk2.saveindex import SaveIndex  # noqa: E402
+from generate_save import generate, write_data  # noqa: E402
+
+# Field -> values compared against it
+CHECKS = {
+    "desiredPosition": ["GRU", "", 0],
+    "power": [50, 50.5, "50"],
+    "age": [60, "60"],
+    "relationsToPlayer": [0, 0.0, "x"],
+    "customCharacterInfo.pictureNumber": [30, "30"]
+}
+
+# Values mixed into the fields above; MISSING removes the field
+MISSING = object()
+ODD_VALUES = [None, MISSING, "50", True, False, 50.0, {"a": 1}, "GRU", ""]
+
+
+def mix(data, seed):
+    """Replace about a fifth of the checked values with odd ones"""
+    rng = random.Random(seed)
+    for character in data["characters"].values():
+        for field in CHECKS:
+            if rng.random() >= 0.2:
+                continue
+            *parents, key = field.split(".")
+            node = character
+            for parent in parents:
+                node = node[parent]
+            value = rng.choice(ODD_VALUES)
+            if parents and isinstance(value, dict):
+                # Only dicts of scalars are indexed, see query.indexed_fields()
+                continue
+            if value is MISSING:
+                node.pop(key, None)
+            else:
+                node[key] = value
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--characters", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    data = mix(generate(countries=20, characters=args.characters, seed=args.seed), args.seed)
+    with tempfile.TemporaryDirectory() as folder:
+        write_data(os.path.join(folder, "check.citk2save"), data)
+        engine = QueryEngine(SaveIndex(os.path.join(folder, "index.sqlite3")), processes=1)
+        failures = 0
+        for field, values in CHECKS.items():
+            for op in PUSHDOWN_OPS:
+                for value in values:
+                    where = [[field, op, value]]
+                    found = {match.key for match in engine.search(Query("characters", where), folder)}
+                    expected = set(matching(data["characters"], where))
+                    if found != expected:
+                        failures += 1
+                        print(f"{field} {op} {value!r}: {len(found)} from the index, {len(expected)} expected")
+        if engine.errors:
+            print(f"Could not index: {engine.errors}")
+            failures += 1
+    print("OK" if not failures else f"{failures} mismatches")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
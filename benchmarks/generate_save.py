@@ -0,0 +1,143 @@
+"""Generate synthetic .citk2save files for benchmarking.
+
+Usage: python benchmarks/generate_save.py OUT [--countries N] [--characters N]
+           [--tech-categories N] [--techs-per-category N] [--traits N] [--seed N]
+           [--bare]
+
+The saves contain every key the editor reads: all main variables, active
+and inactive countries with pointOfInfluence, characters with traits,
+knownTraitors and the complex attributes, and technology categories with
+investedCost. Like the game's saves, the JSON is wrapped in a text header
+and trailer, which the loader strips and keeps; --bare writes the JSON
+alone.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from citk2.core import (  # noqa: E402
+    VARIABLES, INT_VARS, COMPLEX_COUNTRY_ATTRS, COMPLEX_CHARACTER_ATTRS,
+    COUNTRY_OPTIONS, POSITION_OPTIONS, STATUS_OPTIONS, TRAIT_OPTIONS, TECH_POINT_TYPES
+)
+
+# Text around the JSON; only its layout matters, the loader keeps it as is
+SAVE_HEADER = "CitK2 save\nversion: 1.0\nslot: benchmark\n"
+SAVE_TRAILER = "\n"
+
+FIRST_NAMES = ["Mikhail", "Boris", "Yegor", "Nikolai", "Eduard", "Vladimir", "Anatoly", "Gennady", "Alexander", "Viktor", "Юрий", "Пётр"]
+LAST_NAMES = ["Gorbachev", "Yeltsin", "Ligachev", "Ryzhkov", "Shevardnadze", "Kryuchkov", "Lukyanov", "Yanayev", "Yakovlev", "Pavlov", "Соколов", "Громыко"]
+COUNTRY_TAGS = ["USA", "FRA", "GBR", "CHN", "GDR", "POL", "CUB", "VNM", "IND", "AFG", "CZE", "HUN", "ROM", "BUL", "MNG", "YUG"]
+
+
+def _float(rng, low=0.0, high=100.0):
+    # Mimic the game's float output with a varying number of decimals
+    return round(rng.uniform(low, high), rng.choice([1, 2, 6, 14]))
+
+
+def generate(countries=200, characters=500, tech_categories=8, techs_per_category=10,
+             traits=3, seed=0):
+    """Return a save dict with the requested entity counts"""
+    rng = random.Random(seed)
+    data = {}
+    for var_id in VARIABLES:
+        data[var_id] = rng.randint(0, 300) if var_id in INT_VARS else _float(rng)
+
+    data["countries"] = {}
+    for i in range(countries):
+        tag = COUNTRY_TAGS[i] if i < len(COUNTRY_TAGS) else f"C{i:04d}"
+        country = {
+            "activeInGame": rng.random() < 0.7,
+            "relationshipWithPlayer": _float(rng, -100, 100),
+            "foreignPolicyVector": _float(rng, -100, 100),
+            "liberalizationVector": _float(rng),
+            "stability": rng.randint(0, 100),
+            "governmentType": rng.choice(["Socialist", "Democratic", "Authoritarian"]),
+            "leaderId": rng.randint(0, max(characters - 1, 0)),
+            "isAlly": rng.random() < 0.2,
+            "lastCrisis": None
+        }
+        for complex_attr, sub_attrs in COMPLEX_COUNTRY_ATTRS.items():
+            country[complex_attr] = {sub: _float(rng) for sub in sub_attrs}
+        data["countries"][tag] = country
+
+    data["characters"] = {}
+    for i in range(characters):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        character = {
+            "id": i,
+            "status": rng.choice(STATUS_OPTIONS),
+            "power": rng.randint(0, 100),
+            "relationsToPlayer": _float(rng, -100, 100),
+            "homeLand": rng.choice(COUNTRY_OPTIONS),
+            "desiredPosition": rng.choice(POSITION_OPTIONS),
+            "age": rng.randint(35, 85),
+            "isTraitor": rng.random() < 0.1,
+            "traits": rng.sample(TRAIT_OPTIONS, min(traits, len(TRAIT_OPTIONS))),
+            "knownTraitors": sorted(rng.sample(range(characters), min(rng.randint(0, 4), characters)))
+        }
+        for complex_attr, sub_attrs in COMPLEX_CHARACTER_ATTRS.items():
+            if complex_attr == "customCharacterInfo":
+                character[complex_attr] = {
+                    "politicName": name.split()[0],
+                    "politicSurname": name.split()[1],
+                    "pictureNumber": rng.randint(0, 60),
+                    "wasEnoughPoints": rng.random() < 0.5
+                }
+            else:
+                character[complex_attr] = {sub: rng.randint(0, 10) for sub in sub_attrs}
+        data["characters"][name] = character
+
+    data["technologies"] = {}
+    for c in range(tech_categories):
+        data["technologies"][f"category{c}"] = [
+            {
+                "level": level,
+                "researched": rng.random() < 0.5,
+                "investedCost": {point: rng.randint(0, 500) for point in TECH_POINT_TYPES}
+            }
+            for level in range(techs_per_category)
+        ]
+    return data
+
+
+def write_data(path, data, bare=False):
+    """Write save data the way the game does, returns the file size"""
+    content = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    if not bare:
+        content = SAVE_HEADER + content + SAVE_TRAILER
+    content = content.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(content)
+    return len(content)
+
+
+def write_save(path, bare=False, **counts):
+    """Generate a save and write it, returns its size"""
+    return write_data(path, generate(**counts), bare=bare)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out")
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--characters", type=int, default=500)
+    parser.add_argument("--tech-categories", type=int, default=8)
+    parser.add_argument("--techs-per-category", type=int, default=10)
+    parser.add_argument("--traits", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bare", action="store_true", help="write the JSON without header and trailer")
+    args = parser.parse_args(argv)
+    size = write_save(
+        args.out, bare=args.bare, countries=args.countries, characters=args.characters,
+        tech_categories=args.tech_categories, techs_per_category=args.techs_per_category,
+        traits=args.traits, seed=args.seed
+    )
+    print(f"Wrote {args.out} ({size / 2**20:.2f} MiB)")
+
+
+if __name__ == "__main__":
+    main()
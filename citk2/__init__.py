@@ -0,0 +1,4 @@
+"""Save-file engine for the Crisis in the Kremlin 2 Save Editor"""
+from .core import SaveDocument, SaveFormatError, default_saved_games_path
+
+__all__ = ["SaveDocument", "SaveFormatError", "default_saved_games_path"]
@@ -0,0 +1,95 @@
+"""Load saves on a worker thread without blocking the Tk main loop.
+
+Tk may only be touched from the thread running mainloop, so the worker
+never calls into it. It posts progress and results to a queue, and the
+main thread drains the queue from a root.after poll. Starting a new load
+cancels the previous one: the old worker stops at its next progress
+report and nothing it produced is delivered.
+"""
+import queue
+import threading
+
+from .core import SaveDocument
+
+POLL_MS = 50
+
+
+class LoadCancelled(Exception):
+    """Raised inside a worker whose load was superseded"""
+
+
+class LoadJob:
+    """One save being loaded on a worker thread"""
+
+    def __init__(self, path, load=SaveDocument.load):
+        self.path = path
+        self.load = load
+        self.cancelled = threading.Event()
+        self.messages = queue.Queue()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def report(self, fraction):
+        """Progress callback run on the worker thread"""
+        if self.cancelled.is_set():
+            raise LoadCancelled()
+        self.messages.put(("progress", fraction))
+
+    def run(self):
+        try:
+            self.report(0.0)
+            doc = self.load(self.path, progress=self.report)
+        except LoadCancelled:
+            return
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self.messages.put(("done", doc))
+
+
+class BackgroundLoader:
+    """Starts LoadJobs and delivers their messages on the Tk thread"""
+
+    def __init__(self, root, poll_ms=POLL_MS):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.job = None
+
+    def load(self, path, on_done, on_error, on_progress=None, load=SaveDocument.load):
+        """Load path in the background, cancelling any load in progress"""
+        self.cancel()
+        job = LoadJob(path, load)
+        self.job = job
+        threading.Thread(target=job.run, name="citk2-load", daemon=True).start()
+        self.root.after(self.poll_ms, self._poll, job, on_done, on_error, on_progress)
+        return job
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+
+    def busy(self):
+        return self.job is not None
+
+    def _poll(self, job, on_done, on_error, on_progress):
+        while True:
+            # A superseded job's messages are dropped
+            if job is not self.job:
+                return
+            try:
+                kind, payload = job.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                if on_progress is not None:
+                    on_progress(payload)
+                continue
+            self.job = None
+            if kind == "done":
+                on_done(payload)
+            else:
+                on_error(payload)
+            return
+        self.root.after(self.poll_ms, self._poll, job, on_done, on_error, on_progress)
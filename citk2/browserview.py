@@ -0,0 +1,167 @@
+"""Window listing the saves in the saved_games folder.
+
+Like diffview.py this module needs tkinter. The saves known to the
+SaveIndex are listed as soon as the window opens; the folder is then
+rescanned on a worker thread and the list is redrawn when it is done.
+"""
+import datetime
+import os
+import tkinter as tk
+from tkinter import ttk
+
+from .background import BackgroundLoader
+
+# Treeview column, heading and summary field, in display order
+COLUMNS = (
+    ("population", "Population", "population"),
+    ("defcon", "DEFCON", "defcon"),
+    ("power", "Political Power", "politicalPower"),
+    ("reserve", "Reserve", "reserve"),
+    ("corruption", "Corruption", "corruptionLevel"),
+)
+
+
+def format_field(value):
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def format_mtime(mtime_ns):
+    return datetime.datetime.fromtimestamp(mtime_ns / 1e9).strftime("%Y-%m-%d %H:%M")
+
+
+class SaveBrowser:
+    """Toplevel listing the saves of a folder with their summaries"""
+
+    def __init__(self, root, index, folder, on_open, on_browse):
+        self.index = index
+        self.folder = folder
+        self.on_open = on_open
+        self.on_browse = on_browse
+        self.summaries = []
+        self.sort_column = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Saves in {folder}")
+        self.window.geometry("1000x500")
+        self.window.configure(bg="#8B0000")
+
+        self.status_var = tk.StringVar(value="Scanning...")
+        ttk.Label(
+            self.window,
+            textvariable=self.status_var,
+            style="Gold.TLabel"
+        ).pack(fill=tk.X, padx=10, pady=(10, 5))
+
+        frame = ttk.Frame(self.window, style="Red.TFrame")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        columns = [column for column, _, _ in COLUMNS] + ["modified", "status"]
+        self.tree = ttk.Treeview(frame, columns=columns, selectmode="browse")
+        self.tree.heading("#0", text="Save", command=lambda: self.sort("#0"))
+        self.tree.column("#0", width=240)
+        for column, heading, _ in COLUMNS:
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort(c))
+            self.tree.column(column, width=110)
+        self.tree.heading("modified", text="Modified", command=lambda: self.sort("modified"))
+        # Why a save could not be read, empty for readable ones
+        self.tree.heading("status", text="Status", command=lambda: self.sort("status"))
+        self.tree.column("status", width=200)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", self.open_selected)
+        self.tree.bind("<Return>", self.open_selected)
+
+        button_frame = ttk.Frame(self.window, style="Gold.TFrame")
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        for text, command in (("Open", self.open_selected), ("Other File...", self.browse),
+                              ("Rescan", self.rescan), ("Close", self.close)):
+            ttk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                style="Gold.TButton"
+            ).pack(side="left", padx=10, pady=5, expand=True)
+
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.loader = BackgroundLoader(self.window)
+        self.show(self.index.cached(folder))
+        self.rescan()
+
+    def rescan(self):
+        self.status_var.set(f"{len(self.summaries)} saves, scanning...")
+        self.loader.load(
+            self.folder,
+            on_done=self.on_scanned,
+            on_error=self.on_scan_failed,
+            on_progress=self.on_progress,
+            load=self.index.scan
+        )
+
+    def on_progress(self, fraction):
+        self.status_var.set(f"{len(self.summaries)} saves, scanning... {fraction:.0%}")
+
+    def on_scanned(self, summaries):
+        self.show(summaries)
+
+    def on_scan_failed(self, error):
+        self.status_var.set(f"{len(self.summaries)} saves, scan failed: {error}")
+
+    def show(self, summaries):
+        """Redraw the list, keeping the selected save selected"""
+        selected = self.tree.selection()
+        self.summaries = summaries
+        self.tree.delete(*self.tree.get_children())
+        for summary in self.sorted(summaries):
+            values = [format_field(summary.fields.get(field)) for _, _, field in COLUMNS]
+            values.append(format_mtime(summary.mtime_ns))
+            values.append(summary.error or "")
+            self.tree.insert("", tk.END, iid=summary.path, text=os.path.basename(summary.path), values=values)
+        kept = [iid for iid in selected if self.tree.exists(iid)]
+        if kept:
+            self.tree.selection_set(kept)
+        unreadable = sum(1 for summary in summaries if summary.error)
+        self.status_var.set(
+            f"{len(summaries)} saves" + (f", {unreadable} unreadable" if unreadable else "")
+        )
+
+    def sorted(self, summaries):
+        column = self.sort_column
+        if column is None or column == "modified":
+            # The index returns newest first
+            return summaries
+        if column == "#0":
+            return sorted(summaries, key=lambda summary: os.path.basename(summary.path).lower())
+        if column == "status":
+            # Unreadable saves first
+            return sorted(summaries, key=lambda summary: not summary.error)
+        field = next(field for name, _, field in COLUMNS if name == column)
+        # Missing values last, numbers and text each in their own order
+        return sorted(summaries, key=lambda summary: (
+            field not in summary.fields,
+            isinstance(summary.fields.get(field), str),
+            summary.fields.get(field) if summary.fields.get(field) is not None else 0
+        ))
+
+    def sort(self, column):
+        self.sort_column = column
+        self.show(self.summaries)
+
+    def open_selected(self, event=None):
+        selected = self.tree.selection()
+        if not selected:
+            return
+        self.close()
+        self.on_open(selected[0])
+
+    def browse(self):
+        self.close()
+        self.on_browse()
+
+    def close(self):
+        self.loader.cancel()
+        self.window.destroy()
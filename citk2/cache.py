@@ -0,0 +1,197 @@
+"""Persistent cache of parsed saves.
+
+Re-opening a save normally decodes its whole JSON again. ParseCache
+stores the decoded data and value offsets with marshal, keyed by the
+save's absolute path. Saves opened lazily (see lazy.py) are stored with
+their sections still pending, so a hit is as lazy as the first load. An
+entry is only used if the save still has the same size and either the
+same mtime or the same content hash, so a save rewritten by the game is
+parsed afresh automatically. The check and the read that follows go
+through one open file, and a save whose size, mtime or inode changed
+while it was being read is treated as a miss; a parse that raced with a
+rewrite is never stored. The cache folder is bounded in size and evicts
+the least recently used entries first.
+"""
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+
+from .core import SaveDocument, SaveFormatError
+from .lazy import LazyData
+from .loader import read_save_file
+from .patch import SpanIndex
+from .profiling import profiler
+
+# 2: strings are interned by the loader
+# 3: entries record the sections a lazy load left pending
+CACHE_VERSION = 3
+CACHE_SUFFIX = ".parsed"
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+def default_cache_dir():
+    """Return the per-user folder for cache files"""
+    base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "CitK2-Save-Editor", "parse-cache")
+
+
+def file_digest(path):
+    """Hash the content of a file without reading it into memory"""
+    with open(path, "rb") as f:
+        return _digest(f)
+
+
+def _digest(f):
+    digest = hashlib.blake2b(digest_size=20)
+    try:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            digest.update(mm)
+    except ValueError:
+        # Empty files cannot be mapped
+        pass
+    return digest.hexdigest()
+
+
+def _same_file(before, after):
+    """True if two stats describe the same, unchanged file"""
+    return (before.st_ino, before.st_size, before.st_mtime_ns) == (
+        after.st_ino, after.st_size, after.st_mtime_ns
+    )
+
+
+class ParseCache:
+    """On-disk cache of SaveDocument parse results"""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, path):
+        key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    @profiler.timed("ParseCache.load")
+    def load(self, path, progress=None, lazy=False):
+        """Return a SaveDocument for path, from the cache when it is still valid.
+
+        lazy is passed on to SaveDocument.load(); without it, sections a
+        lazy entry left pending are decoded before returning.
+        """
+        entry = self.entry_path(path)
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            cached = self._read(f, entry, stat)
+            if cached is not None:
+                parts = read_save_file(f)
+                # Rewritten in place between the check and the read
+                if not _same_file(stat, os.fstat(f.fileno())):
+                    cached = digest = None
+            else:
+                digest = _digest(f)
+
+        if cached is None:
+            self.misses += 1
+            header = (CACHE_VERSION, sys.version_info[:2], stat.st_size, stat.st_mtime_ns, digest)
+            doc = SaveDocument.load(path, progress, lazy=lazy)
+            # Replaced or rewritten since it was hashed: the entry would lie
+            if _same_file(stat, os.stat(path)):
+                self._write(entry, header, doc)
+            return doc
+
+        self.hits += 1
+        if parts is None:
+            raise SaveFormatError("Invalid save file format")
+        prefix, json_text, suffix = parts
+        data, spans, pending = cached
+        index = SpanIndex(json_text, spans)
+        if pending:
+            data = LazyData(data, index, pending)
+            if not lazy:
+                data.decode_all()
+        if progress is not None:
+            progress(1.0)
+        return SaveDocument(data, prefix, suffix, path, index)
+
+    def _read(self, f, entry, stat):
+        """Return the cached (data, spans, pending) if entry still describes the open save f"""
+        try:
+            with open(entry, "rb") as f:
+                version, python, size, mtime_ns, digest = marshal.load(f)
+                if (version, python, size) != (CACHE_VERSION, sys.version_info[:2], stat.st_size):
+                    return None
+                # Same size but touched since: only the content hash can tell
+                if mtime_ns != stat.st_mtime_ns and digest != _digest(f):
+                    return None
+                cached = marshal.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError):
+            # Truncated or written by another Python version, drop it
+            self._remove(entry)
+            return None
+        # Mark the entry as recently used for eviction
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return cached
+
+    def _write(self, entry, header, doc):
+        """Store a freshly parsed document; failures only cost the cache"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    marshal.dump(header, f)
+                    data = doc.data
+                    if isinstance(data, LazyData):
+                        marshal.dump((data.raw(), doc.index.spans, sorted(data.pending)), f)
+                    else:
+                        marshal.dump((data, doc.index.spans, ()), f)
+                os.replace(tmp_path, entry)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+            self.evict()
+        except (OSError, ValueError):
+            pass
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for item in it:
+                if item.name.endswith(CACHE_SUFFIX):
+                    stat = item.stat()
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def invalidate(self, path):
+        """Forget the entry for a save"""
+        self._remove(self.entry_path(path))
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_SUFFIX):
+                self._remove(os.path.join(self.directory, name))
@@ -0,0 +1,222 @@
+"""Columnar view of the country table for bulk edits.
+
+Bulk actions used to walk every country dict, check activeInGame and set
+one field through SaveDocument.set. CountryTable instead keeps one
+column per numeric field (value, presence and int-ness of every
+country) and applies set/scale/clamp "where mask" in a single pass over
+the column. set() writes every country that has the field whatever its
+value, as the per-country loops did, so a null becomes the new number;
+scale() and clamp() only touch values that are numbers. Edits stay in
+the columns until SaveDocument writes them back with flush_columns(),
+which it does before anything reads the country dicts or the document
+is serialized. Only countries whose value
+actually changed are written back, so unchanged values keep their
+original text in the patch writer.
+
+NumPy is used when it is installed. Without it the columns are
+array("d") and bytearray masks and the same operations run as plain
+loops, which is still a single pass per edit.
+"""
+import operator
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge
+}
+
+
+def is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class Column:
+    """One numeric field of every country"""
+    __slots__ = ("values", "present", "keyed", "ints", "changed")
+
+    def __init__(self, values, present, keyed, ints, changed):
+        self.values = values
+        # Country has the field as a number
+        self.present = present
+        # Country has the field at all, e.g. as null
+        self.keyed = keyed
+        # Write the value back as an int if it is still integral
+        self.ints = ints
+        # Edited since the last flush
+        self.changed = changed
+
+
+class CountryTable:
+    """Numeric columns over data["countries"], built on first use"""
+
+    def __init__(self, countries):
+        self.countries = countries
+        self.tags = list(countries)
+        self.columns = {}
+        # True while some column holds edits not yet written back
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.tags)
+
+    def column(self, field):
+        col = self.columns.get(field)
+        if col is None:
+            col = self.columns[field] = self._build(field)
+        return col
+
+    def _build(self, field):
+        values = []
+        present = []
+        keyed = []
+        ints = []
+        for tag in self.tags:
+            country = self.countries[tag]
+            value = country.get(field)
+            number = is_number(value)
+            values.append(float(value) if number else 0.0)
+            present.append(number)
+            keyed.append(number or field in country)
+            ints.append(number and isinstance(value, int))
+        if np is not None:
+            return Column(
+                np.array(values, dtype=np.float64), np.array(present, dtype=bool),
+                np.array(keyed, dtype=bool), np.array(ints, dtype=bool),
+                np.zeros(len(values), dtype=bool)
+            )
+        return Column(
+            array("d", values), bytearray(present), bytearray(keyed), bytearray(ints),
+            bytearray(len(values))
+        )
+
+    # ====== MASKS ======
+
+    def truthy(self, field):
+        """Mask of countries whose field is truthy, e.g. truthy("activeInGame")"""
+        col = self.columns.get(field)
+        bits = []
+        for i, tag in enumerate(self.tags):
+            if col is not None and col.present[i]:
+                bits.append(col.values[i] != 0)
+            else:
+                bits.append(bool(self.countries[tag].get(field)))
+        return self._mask(bits)
+
+    def compare(self, field, op, value):
+        """Mask of countries where the numeric field compares true against value"""
+        col = self.column(field)
+        test = COMPARISONS[op]
+        if np is not None:
+            return col.present & test(col.values, value)
+        return bytearray(p and test(v, value) for v, p in zip(col.values, col.present))
+
+    def both(self, *masks):
+        """Mask where every given mask holds"""
+        if np is not None:
+            result = np.ones(len(self.tags), dtype=bool)
+            for mask in masks:
+                result &= np.asarray(mask, dtype=bool)
+            return result
+        return bytearray(all(bits) for bits in zip(*masks))
+
+    def _mask(self, bits):
+        if np is not None:
+            return np.array(bits, dtype=bool)
+        return bytearray(bits)
+
+    # ====== EDITS ======
+
+    def set(self, field, value, where=None):
+        """Set field to value where it exists (and where holds), returns the count.
+
+        Countries holding the field as null or another non-number get it too.
+        """
+        as_int = is_number(value) and isinstance(value, int)
+        value = float(value)
+        if np is not None:
+            return self._apply(field, where, lambda values: np.full_like(values, value), as_int, True)
+        return self._apply(field, where, lambda v: value, as_int, True)
+
+    def scale(self, field, factor, where=None):
+        """Multiply field by factor, returns the count"""
+        return self._apply(field, where, lambda values: values * factor)
+
+    def clamp(self, field, low=None, high=None, where=None):
+        """Limit field to [low, high], either bound may be None, returns the count"""
+        low = float("-inf") if low is None else low
+        high = float("inf") if high is None else high
+        if np is not None:
+            return self._apply(field, where, lambda values: np.clip(values, low, high))
+        return self._apply(field, where, lambda v: min(max(v, low), high))
+
+    def _apply(self, field, where, compute, as_int=None, keyed=False):
+        """Run compute over the selected rows of a column.
+
+        With NumPy compute maps the whole value array, otherwise one float.
+        as_int, if not None, replaces the int-ness of rows that change.
+        keyed also selects rows whose value is not a number; they always
+        change and hold a number afterwards.
+        """
+        col = self.column(field)
+        if np is not None:
+            base = col.keyed if keyed else col.present
+            rows = base if where is None else base & np.asarray(where, dtype=bool)
+            new = compute(col.values)
+            moved = rows & ((new != col.values) | ~col.present)
+            col.values[moved] = new[moved]
+            col.present |= moved
+            if as_int is not None:
+                col.ints[moved] = as_int
+            col.changed |= moved
+            self.dirty = self.dirty or bool(moved.any())
+            return int(rows.sum())
+
+        values, present, changed, ints = col.values, col.present, col.changed, col.ints
+        base = col.keyed if keyed else present
+        count = 0
+        for i in range(len(values)):
+            if not base[i] or (where is not None and not where[i]):
+                continue
+            count += 1
+            new = compute(values[i])
+            if new != values[i] or not present[i]:
+                values[i] = new
+                present[i] = 1
+                changed[i] = 1
+                if as_int is not None:
+                    ints[i] = as_int
+                self.dirty = True
+        return count
+
+    # ====== WRITE BACK ======
+
+    def pending(self):
+        """Yield (tag, field, value) for every edited value and clear the edits"""
+        if not self.dirty:
+            return
+        self.dirty = False
+        for field, col in self.columns.items():
+            if np is not None:
+                rows = np.flatnonzero(col.changed).tolist()
+                col.changed[:] = False
+            else:
+                rows = [i for i, bit in enumerate(col.changed) if bit]
+                col.changed[:] = bytearray(len(col.changed))
+            for i in rows:
+                value = float(col.values[i])
+                if col.ints[i] and value.is_integer():
+                    value = int(value)
+                yield self.tags[i], field, value
+
+    def forget(self, field):
+        """Drop a column after its field was edited outside the table"""
+        self.columns.pop(field, None)
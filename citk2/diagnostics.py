@@ -0,0 +1,121 @@
+"""Diagnostics window showing the profiler's hot-path timings.
+
+Like forms.py this module needs tkinter.
+"""
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+COLUMNS = [
+    ("calls", "Calls", 60),
+    ("total_ms", "Total (ms)", 90),
+    ("mean_ms", "Mean (ms)", 90),
+    ("max_ms", "Max (ms)", 90),
+    ("last_ms", "Last (ms)", 90),
+    ("peak_kib", "Peak (KiB)", 90)
+]
+
+
+class DiagnosticsWindow:
+    """Toplevel listing timings, with toggles and a JSON export"""
+
+    def __init__(self, root, profiler):
+        self.profiler = profiler
+        self.window = tk.Toplevel(root)
+        self.window.title("Diagnostics")
+        self.window.geometry("900x500")
+        self.window.configure(bg="#8B0000")
+
+        # Collector toggles
+        options_frame = ttk.Frame(self.window, style="Gold.TFrame")
+        options_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+
+        self.enabled_var = tk.BooleanVar(value=profiler.enabled)
+        self.cprofile_var = tk.BooleanVar(value=profiler.use_cprofile)
+        self.tracemalloc_var = tk.BooleanVar(value=profiler.use_tracemalloc)
+        for text, var in (
+            ("Record timings", self.enabled_var),
+            ("cProfile slowest call", self.cprofile_var),
+            ("tracemalloc peak", self.tracemalloc_var)
+        ):
+            ttk.Checkbutton(
+                options_frame,
+                text=text,
+                variable=var,
+                command=self.apply_options,
+                style="Gold.TCheckbutton"
+            ).pack(side="left", padx=5, pady=5)
+
+        # Timings table
+        paned = ttk.PanedWindow(self.window, orient=tk.VERTICAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        self.tree = ttk.Treeview(paned, columns=[c[0] for c in COLUMNS], height=10)
+        self.tree.heading("#0", text="Hot path")
+        self.tree.column("#0", width=260)
+        for key, title, width in COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width, anchor="e")
+        self.tree.bind("<<TreeviewSelect>>", self.show_profile)
+        paned.add(self.tree, weight=2)
+
+        # cProfile listing of the selected hot path
+        self.profile_text = tk.Text(paned, height=10, font=("Courier", 9), wrap="none")
+        paned.add(self.profile_text, weight=1)
+
+        button_frame = ttk.Frame(self.window, style="Gold.TFrame")
+        button_frame.pack(fill=tk.X, padx=10, pady=(5, 10))
+        for text, command in (
+            ("Refresh", self.refresh),
+            ("Reset", self.reset),
+            ("Save Report", self.save_report)
+        ):
+            ttk.Button(
+                button_frame,
+                text=text,
+                command=command,
+                style="Gold.TButton"
+            ).pack(side="left", padx=20, pady=5, expand=True)
+
+        self.refresh()
+
+    def apply_options(self):
+        self.profiler.enabled = self.enabled_var.get()
+        self.profiler.use_cprofile = self.cprofile_var.get()
+        self.profiler.use_tracemalloc = self.tracemalloc_var.get()
+
+    def refresh(self):
+        self.stats = self.profiler.report()["stats"]
+        self.tree.delete(*self.tree.get_children())
+        for name, stat in self.stats.items():
+            values = ["" if stat[key] is None else stat[key] for key, _, _ in COLUMNS]
+            self.tree.insert("", tk.END, iid=name, text=name, values=values)
+
+    def show_profile(self, event=None):
+        self.profile_text.delete("1.0", tk.END)
+        selection = self.tree.selection()
+        if not selection:
+            return
+        stat = self.stats.get(selection[0], {})
+        self.profile_text.insert(
+            tk.END, stat.get("profile") or "Enable cProfile to capture the slowest call."
+        )
+
+    def reset(self):
+        self.profiler.reset()
+        self.refresh()
+
+    def save_report(self):
+        path = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension=".json",
+            initialfile="citk2-diagnostics.json",
+            filetypes=[("JSON", "*.json"), ("All Files", "*.*")]
+        )
+        if not path:
+            return
+        try:
+            self.profiler.dump(path)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save report:\n{str(e)}", parent=self.window)
+            return
+        messagebox.showinfo("Diagnostics", f"Report saved to {path}", parent=self.window)
@@ -0,0 +1,147 @@
+"""Structural diff between two saves.
+
+diff_documents() compares the top-level variables, countries, characters
+and technologies of two SaveDocuments. Every section and every entity in
+it (a country, a character, a technology category) is first compared by
+a digest of its subtree. Digests of values the user has not edited are
+taken straight from the original JSON text using the patch writer's
+spans, so nothing is walked or re-encoded for them. Entities with equal
+digests are skipped; the ones that differ, and the ones edited since
+load (which have no usable span), are walked field by field.
+
+Compacted sections (see records.py) are walked the same way through
+their Records, and sections of lazily loaded saves (see lazy.py) are only
+decoded if their digests differ.
+
+Digests can differ for equal values written with different number
+formatting (1.0 vs 1.00); such entities are simply walked and produce no
+changes.
+"""
+from .history import MISSING
+from .records import Record, RecordTable
+
+SECTIONS = ("countries", "characters", "technologies")
+MAPPINGS = (dict, Record, RecordTable)
+CONTAINERS = MAPPINGS + (list,)
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+class Change:
+    """A value at path that was added, removed or changed"""
+    __slots__ = ("path", "kind", "old", "new")
+
+    def __init__(self, path, kind, old=MISSING, new=MISSING):
+        self.path = path
+        self.kind = kind
+        self.old = old
+        self.new = new
+
+    def __repr__(self):
+        return f"Change({self.path!r}, {self.kind!r}, {self.old!r}, {self.new!r})"
+
+
+class SubtreeHasher:
+    """Digests of a document's subtrees, cached by path"""
+
+    def __init__(self, doc):
+        doc.flush_columns()
+        index = doc.index
+        self.text = index.text if index is not None else None
+        self.spans = index.spans if index is not None else {}
+        # A span is stale if anything at or below it was edited
+        self.stale = set()
+        for path in doc.dirty_paths:
+            for n in range(1, len(path) + 1):
+                self.stale.add(path[:n])
+        self.cache = {}
+
+    def digest(self, path):
+        """Digest of the unedited value at path, or None if it has no clean span"""
+        found = self.cache.get(path)
+        if found is not None:
+            return found
+        span = self.spans.get(path)
+        if span is None or path in self.stale:
+            # Dumping it to hash would cost as much as walking it
+            return None
+        start, end = span
+        # 64-bit string hash plus the length, computed in C over the slice
+        found = self.cache[path] = (end - start, hash(self.text[start:end]))
+        return found
+
+    def same(self, other, path):
+        """True if path is known to hold the same subtree in both documents"""
+        mine = self.digest(path)
+        return mine is not None and mine == other.digest(path)
+
+
+def diff_values(path, old, new, changes):
+    """Append the changes between two JSON values, walking dicts and lists"""
+    if old is new:
+        return
+    if old is MISSING:
+        changes.append(Change(path, ADDED, new=new))
+    elif new is MISSING:
+        changes.append(Change(path, REMOVED, old=old))
+    elif isinstance(old, MAPPINGS) and isinstance(new, MAPPINGS):
+        for key, value in old.items():
+            if key not in new:
+                changes.append(Change(path + (key,), REMOVED, old=value))
+        for key, value in new.items():
+            old_value = old.get(key, MISSING)
+            # Inline the common case of an unchanged scalar
+            if old_value is value or (
+                type(old_value) is type(value) and type(value) not in CONTAINERS and old_value == value
+            ):
+                continue
+            diff_values(path + (key,), old_value, value, changes)
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i, (a, b) in enumerate(zip(old, new)):
+            diff_values(path + (i,), a, b, changes)
+    elif type(old) is not type(new) or old != new:
+        changes.append(Change(path, CHANGED, old, new))
+
+
+def diff_documents(old_doc, new_doc, sections=SECTIONS):
+    """Return the Changes that turn old_doc into new_doc, in document order.
+
+    Only the given sections are compared; the others are left out entirely.
+    """
+    old_hashes = SubtreeHasher(old_doc)
+    new_hashes = SubtreeHasher(new_doc)
+    old_data = old_doc.data
+    new_data = new_doc.data
+    changes = []
+
+    # Top-level variables; sections a lazy load has not decoded stay so
+    for key in old_data:
+        if key not in new_data and key not in SECTIONS:
+            changes.append(Change((key,), REMOVED, old=old_data[key]))
+    for key in new_data:
+        if key not in SECTIONS:
+            diff_values((key,), old_data.get(key, MISSING), new_data[key], changes)
+
+    for section in sections:
+        if old_hashes.same(new_hashes, (section,)):
+            continue
+        old_entities = old_data.get(section, MISSING)
+        new_entities = new_data.get(section, MISSING)
+        if not (isinstance(old_entities, MAPPINGS) and isinstance(new_entities, MAPPINGS)):
+            diff_values((section,), old_entities, new_entities, changes)
+            continue
+        for key, value in old_entities.items():
+            if key not in new_entities:
+                changes.append(Change((section, key), REMOVED, old=value))
+        for key, value in new_entities.items():
+            path = (section, key)
+            old_value = old_entities.get(key, MISSING)
+            if old_value is MISSING:
+                changes.append(Change(path, ADDED, new=value))
+            elif old_value is value:
+                continue
+            elif not old_hashes.same(new_hashes, path):
+                diff_values(path, old_value, value, changes)
+    return changes
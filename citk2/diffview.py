@@ -0,0 +1,90 @@
+"""Window listing the changes between two saves.
+
+Like forms.py this module needs tkinter. Changes are grouped by entity;
+an entity's field rows are only inserted when it is expanded, so diffs
+touching thousands of characters open instantly.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from .diff import SECTIONS
+from .history import MISSING
+
+# Longest value text shown in a cell
+VALUE_WIDTH = 80
+
+
+def format_value(value):
+    if value is MISSING:
+        return ""
+    text = "null" if value is None else str(value)
+    if len(text) > VALUE_WIDTH:
+        text = text[:VALUE_WIDTH - 3] + "..."
+    return text
+
+
+def group_changes(changes):
+    """Split changes into (title, [(field, change)]) per entity, in order"""
+    groups = {}
+    for change in changes:
+        path = change.path
+        if path[0] in SECTIONS and len(path) > 1:
+            key, field = path[:2], path[2:]
+            title = f"{path[0]}: {path[1]}"
+        else:
+            key, field = ("variables",), path
+            title = "Main variables"
+        if key not in groups:
+            groups[key] = (title, [])
+        groups[key][1].append((".".join(map(str, field)) or "(whole entry)", change))
+    return list(groups.values())
+
+
+class DiffWindow:
+    """Toplevel with one expandable row per changed entity"""
+
+    def __init__(self, root, changes, old_name, new_name):
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Changes from {old_name} to {new_name}")
+        self.window.geometry("1000x600")
+        self.window.configure(bg="#8B0000")
+
+        self.groups = group_changes(changes)
+        ttk.Label(
+            self.window,
+            text=f"{len(changes)} changes in {len(self.groups)} entries",
+            style="Gold.TLabel"
+        ).pack(fill=tk.X, padx=10, pady=(10, 5))
+
+        frame = ttk.Frame(self.window, style="Red.TFrame")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(frame, columns=("kind", "old", "new"))
+        self.tree.heading("#0", text="Entry / field")
+        self.tree.heading("kind", text="Change")
+        self.tree.heading("old", text=old_name)
+        self.tree.heading("new", text=new_name)
+        self.tree.column("#0", width=320)
+        self.tree.column("kind", width=80)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<<TreeviewOpen>>", self.on_open)
+
+        # Parent rows with a placeholder child so they can be expanded
+        self.pending = {}
+        for title, fields in self.groups:
+            iid = self.tree.insert("", tk.END, text=title, values=(f"{len(fields)} fields", "", ""))
+            self.tree.insert(iid, tk.END, text="...")
+            self.pending[iid] = fields
+
+    def on_open(self, event=None):
+        iid = self.tree.focus()
+        fields = self.pending.pop(iid, None)
+        if fields is None:
+            return
+        self.tree.delete(*self.tree.get_children(iid))
+        for field, change in fields:
+            self.tree.insert(iid, tk.END, text=field, values=(
+                change.kind, format_value(change.old), format_value(change.new)
+            ))
@@ -0,0 +1,92 @@
+"""Crash-safe writing of save files with rotating backups.
+
+A save is written to a temporary file next to the target, fsynced and
+then renamed over the original, so a crash never leaves a half-written
+save behind. Backups are made by hardlinking the old file before it is
+replaced, which costs no extra I/O.
+"""
+import os
+import shutil
+import tempfile
+
+ENCODING = "utf-8"
+
+# Number of backups kept: save.bak, save.bak.1, ... save.bak.4
+BACKUP_GENERATIONS = 5
+
+
+def backup_path(path, generation=0):
+    """Return the name of a backup; generation 0 is the newest"""
+    if generation == 0:
+        return path + ".bak"
+    return f"{path}.bak.{generation}"
+
+
+def rotate_backups(path, generations=BACKUP_GENERATIONS):
+    """Shift existing backups one generation older, dropping the oldest"""
+    oldest = backup_path(path, generations - 1)
+    if os.path.exists(oldest):
+        os.remove(oldest)
+    for generation in range(generations - 2, -1, -1):
+        src = backup_path(path, generation)
+        if os.path.exists(src):
+            os.replace(src, backup_path(path, generation + 1))
+
+
+def _fsync_dir(directory):
+    """Make a rename durable; directories cannot be opened on Windows"""
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, content, generations=BACKUP_GENERATIONS):
+    """Write content to path atomically, returns the new backup path or None.
+
+    With generations=0 no backup is kept.
+    """
+    path = os.path.abspath(path)
+    directory = os.path.dirname(path)
+    exists = os.path.exists(path)
+
+    fd, tmp_path = tempfile.mkstemp(
+        prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content.encode(ENCODING))
+            f.flush()
+            os.fsync(f.fileno())
+        if exists:
+            shutil.copymode(path, tmp_path)
+
+        backup = None
+        moved = False
+        if exists and generations > 0:
+            rotate_backups(path, generations)
+            backup = backup_path(path)
+            try:
+                # The backup shares the old file's data, the rename below leaves it intact
+                os.link(path, backup)
+            except OSError:
+                # No hardlinks on this filesystem, move the old file aside instead
+                os.replace(path, backup)
+                moved = True
+
+        try:
+            os.replace(tmp_path, path)
+        except BaseException:
+            if moved:
+                # Never leave the save path empty: put the old save back
+                os.replace(backup, path)
+            raise
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+    return backup
@@ -0,0 +1,142 @@
+"""Pooled attribute forms for the country and character panels.
+
+Selecting an entity used to destroy and rebuild every Frame, Label and
+Entry of the panel. AttributeForm keeps its rows alive between
+selections: a row is reused whenever the new entity needs the same kind
+of widget at the same position, and only its label and value are
+rewritten. Switching between two entities with the same fields creates
+no widgets at all.
+
+Unlike the rest of the package this module needs tkinter.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+
+class RowSpec:
+    """One row of a form: what widget to show and what to put in it"""
+    __slots__ = ("kind", "label", "value", "options", "indent")
+
+    # Row kinds
+    TITLE = "title"
+    HEADER = "header"
+    ENTRY = "entry"
+    CHECK = "check"
+    COMBO = "combo"
+    # Read-only text
+    INFO = "info"
+
+    def __init__(self, kind, label, value=None, options=None, indent=False):
+        self.kind = kind
+        self.label = label
+        self.value = value
+        self.options = options
+        self.indent = indent
+
+    @property
+    def shape(self):
+        """Rows with the same shape can reuse each other's widgets"""
+        return self.kind, self.indent
+
+
+class _Row:
+    """Widgets backing one row of an AttributeForm"""
+
+    def __init__(self, parent, spec, grid_row):
+        self.shape = spec.shape
+        self.options = None
+        kind = spec.kind
+
+        if kind == RowSpec.TITLE or kind == RowSpec.HEADER:
+            self.frame = ttk.Frame(parent, style="Gold.TFrame")
+            font = ("Arial", 11, "bold") if kind == RowSpec.TITLE else ("Arial", 10, "bold")
+            self.label = ttk.Label(self.frame, style="Gold.TLabel", font=font)
+            if kind == RowSpec.TITLE:
+                self.label.pack()
+            else:
+                self.label.pack(anchor="w")
+            self.widget = None
+            self.frame.grid(row=grid_row, column=0, sticky="ew", padx=5, pady=5)
+            return
+
+        self.frame = ttk.Frame(parent, style="Red.TFrame")
+        self.label = ttk.Label(
+            self.frame, width=20 if spec.indent else 25, anchor="e", style="Gold.TLabel"
+        )
+        self.label.pack(side=tk.LEFT, padx=(0, 5))
+
+        if kind == RowSpec.CHECK:
+            var = tk.BooleanVar()
+            self.widget = ttk.Checkbutton(self.frame, variable=var, style="Gold.TCheckbutton")
+            self.widget.var = var  # Store var for later access
+        elif kind == RowSpec.COMBO:
+            self.widget = ttk.Combobox(self.frame, width=18, style="Gold.TCombobox")
+        elif kind == RowSpec.INFO:
+            self.widget = ttk.Label(self.frame, anchor="w", wraplength=400, style="Gold.TLabel")
+        else:
+            self.widget = ttk.Entry(self.frame, width=15 if spec.indent else 20, style="Gold.TEntry")
+        self.widget.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.frame.grid(
+            row=grid_row, column=0, sticky="ew", padx=20 if spec.indent else 5, pady=2
+        )
+
+    def update(self, spec):
+        """Rewrite the label and value in place"""
+        if self.label.cget("text") != spec.label:
+            self.label.configure(text=spec.label)
+        if self.widget is None:
+            return
+        if spec.kind == RowSpec.CHECK:
+            self.widget.var.set(bool(spec.value))
+        elif spec.kind == RowSpec.INFO:
+            self.widget.configure(text=spec.value)
+        elif spec.kind == RowSpec.COMBO:
+            if self.options is not spec.options:
+                self.widget['values'] = spec.options
+                self.options = spec.options
+            self.widget.set(spec.value)
+        else:
+            self.widget.delete(0, tk.END)
+            self.widget.insert(0, spec.value)
+
+
+class AttributeForm:
+    """A form whose rows are reused across entity selections"""
+
+    def __init__(self, container):
+        self.frame = ttk.Frame(container, style="Red.TFrame")
+        self.frame.pack(fill="both", expand=True)
+        self.frame.columnconfigure(0, weight=1)
+        self.rows = []
+        self.visible = 0
+        # Widgets created over the form's lifetime, handy when profiling
+        self.created = 0
+
+    def show(self, specs):
+        """Display specs, returns the value widget of each row (None for headers)"""
+        widgets = []
+        for i, spec in enumerate(specs):
+            if i < len(self.rows) and self.rows[i].shape == spec.shape:
+                row = self.rows[i]
+                if i >= self.visible:
+                    row.frame.grid()
+            else:
+                row = _Row(self.frame, spec, i)
+                self.created += 1
+                if i < len(self.rows):
+                    self.rows[i].frame.destroy()
+                    self.rows[i] = row
+                else:
+                    self.rows.append(row)
+            row.update(spec)
+            widgets.append(row.widget)
+
+        # Hide rows the new entity does not need; they stay around for reuse
+        for row in self.rows[len(specs):self.visible]:
+            row.frame.grid_remove()
+        self.visible = len(specs)
+        return widgets
+
+    def clear(self):
+        """Hide every row"""
+        self.show([])
@@ -0,0 +1,177 @@
+"""Who knows about which traitor, indexed both ways.
+
+Each character has an "id" and a "knownTraitors" list of other
+characters' ids. TraitorGraph keeps that adjacency in both directions,
+so these are all dict lookups instead of scans over every character:
+
+- known_by(id): the characters whose knownTraitors list id;
+- dead_referrers(): the characters that know about a dead character;
+- cluster(name): the characters linked to name by mutual knowledge
+  (A knows B and B knows A), transitively.
+
+The graph is built from the characters section once and then updated
+one character at a time: SaveDocument._assign() calls refresh() for
+every write to a character's id, status or knownTraitors (edits, undo
+and redo alike). A refresh only re-links that character and recomputes
+the clusters it was or now is part of.
+"""
+
+# Character fields the graph is built from
+GRAPH_FIELDS = ("id", "status", "knownTraitors")
+
+DEAD = "Dead"
+
+# Names listed before "and N more"
+NAMES_SHOWN = 8
+
+
+def format_names(names, limit=NAMES_SHOWN):
+    """Comma-separated names, cut short after limit"""
+    names = list(names)
+    if not names:
+        return "none"
+    text = ", ".join(names[:limit])
+    if len(names) > limit:
+        text += f" and {len(names) - limit} more"
+    return text
+
+
+class TraitorGraph:
+    """Adjacency index over one save's characters"""
+
+    def __init__(self, characters):
+        self.characters = characters
+        # id -> name and back
+        self.names = {}
+        self.ids = {}
+        # name -> ids in its knownTraitors
+        self.knows = {}
+        # id -> names whose knownTraitors contain it
+        self.knowers = {}
+        # ids of dead characters
+        self.dead = set()
+        # name -> how many dead characters it knows about, only if any
+        self.dead_counts = {}
+        # name -> names it shares mutual knowledge with
+        self.mutual = {}
+        # name -> frozenset of its cluster, only for names in one
+        self.clusters = {}
+        for name, character in characters.items():
+            self._link(name, character)
+        self._recluster(list(self.mutual))
+
+    # ====== QUERIES ======
+
+    def known_by(self, traitor_id):
+        """Names of the characters that know about traitor_id"""
+        return set(self.knowers.get(traitor_id, ()))
+
+    def known_traitors(self, name):
+        """[(id, name or None)] of the traitors a character knows about"""
+        return [(traitor_id, self.names.get(traitor_id)) for traitor_id in sorted(self.knows.get(name, ()))]
+
+    def knows_dead(self, name):
+        """Names of the dead characters a character knows about"""
+        return sorted(
+            self.names.get(traitor_id, str(traitor_id))
+            for traitor_id in self.knows.get(name, ()) if traitor_id in self.dead
+        )
+
+    def dead_referrers(self):
+        """Names of the characters that know about at least one dead character"""
+        return set(self.dead_counts)
+
+    def cluster(self, name):
+        """Names linked to name by mutual knowledge, including name itself"""
+        return self.clusters.get(name, frozenset((name,)))
+
+    def all_clusters(self):
+        """Every cluster of two or more characters"""
+        return set(self.clusters.values())
+
+    # ====== UPDATES ======
+
+    def refresh(self, name):
+        """Re-read one character after it was edited, added or removed"""
+        affected = [name]
+        affected.extend(self._unlink(name))
+        character = self.characters.get(name)
+        if character is not None:
+            self._link(name, character)
+            affected.extend(self.mutual.get(name, ()))
+        self._recluster(affected)
+
+    def _link(self, name, character):
+        traitor_id = character.get("id")
+        known = character.get("knownTraitors")
+        known = {item for item in known if type(item) is int} if isinstance(known, list) else set()
+        self.knows[name] = known
+        for item in known:
+            self.knowers.setdefault(item, set()).add(name)
+        count = sum(1 for item in known if item in self.dead)
+        if count:
+            self.dead_counts[name] = count
+        if type(traitor_id) is not int:
+            return
+        self.ids[name] = traitor_id
+        self.names[traitor_id] = name
+        if character.get("status") == DEAD:
+            self.dead.add(traitor_id)
+            for knower in self.knowers.get(traitor_id, ()):
+                self.dead_counts[knower] = self.dead_counts.get(knower, 0) + 1
+        for item in known:
+            other = self.names.get(item)
+            if other is not None and other != name and traitor_id in self.knows.get(other, ()):
+                self.mutual.setdefault(name, set()).add(other)
+                self.mutual.setdefault(other, set()).add(name)
+
+    def _unlink(self, name):
+        """Forget everything about name, returns its former mutual partners"""
+        traitor_id = self.ids.pop(name, None)
+        if traitor_id is not None:
+            if self.names.get(traitor_id) == name:
+                del self.names[traitor_id]
+            if traitor_id in self.dead:
+                self.dead.discard(traitor_id)
+                for knower in self.knowers.get(traitor_id, ()):
+                    self._uncount(knower)
+        for item in self.knows.pop(name, ()):
+            knowers = self.knowers[item]
+            knowers.discard(name)
+            if not knowers:
+                del self.knowers[item]
+        self.dead_counts.pop(name, None)
+        partners = self.mutual.pop(name, set())
+        for other in partners:
+            self.mutual[other].discard(name)
+            if not self.mutual[other]:
+                del self.mutual[other]
+        return partners
+
+    def _uncount(self, name):
+        count = self.dead_counts.get(name, 0) - 1
+        if count > 0:
+            self.dead_counts[name] = count
+        else:
+            self.dead_counts.pop(name, None)
+
+    def _recluster(self, names):
+        """Recompute the clusters containing names, walking only those clusters"""
+        done = set()
+        for start in names:
+            if start in done:
+                continue
+            members = {start}
+            stack = [start]
+            while stack:
+                for other in self.mutual.get(stack.pop(), ()):
+                    if other not in members:
+                        members.add(other)
+                        stack.append(other)
+            done |= members
+            if len(members) > 1:
+                cluster = frozenset(members)
+                for member in members:
+                    self.clusters[member] = cluster
+            else:
+                self.clusters.pop(start, None)
@@ -0,0 +1,116 @@
+"""Undo/redo journal for SaveDocument edits.
+
+Every SaveDocument.set() reports the path, the value it replaced and the
+new value. Edits made inside SaveDocument.step() are grouped into one
+Step, so a bulk action over thousands of characters is undone at once.
+A Step only holds the changed paths and references to the old and new
+values, never copies of the document, so memory grows with the number
+of values edited rather than with the size of the save.
+"""
+from contextlib import contextmanager
+
+# Old value of a key that did not exist before the edit
+MISSING = object()
+
+
+class Step:
+    """One undoable unit: the changes in the order they were made"""
+    # Parallel lists instead of a tuple per change, a bulk step can hold
+    # hundreds of thousands of them
+    __slots__ = ("label", "paths", "old", "new")
+
+    def __init__(self, label):
+        self.label = label
+        self.paths = []
+        self.old = []
+        self.new = []
+
+    def __len__(self):
+        return len(self.paths)
+
+    def add(self, path, old, new):
+        self.paths.append(path)
+        self.old.append(old)
+        self.new.append(new)
+
+
+class History:
+    """Undo and redo stacks of Steps"""
+
+    def __init__(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.current = None
+        self.depth = 0
+        # Top of the undo stack when the document was last saved
+        self.saved = None
+        # Called whenever the stacks or the save point change
+        self.on_change = None
+
+    @contextmanager
+    def group(self, label):
+        """Collect the changes recorded inside into one step; nesting merges"""
+        if self.depth == 0:
+            self.current = Step(label)
+        self.depth += 1
+        try:
+            yield self.current
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                step, self.current = self.current, None
+                self._push(step)
+
+    def record(self, path, old, new):
+        if self.current is not None:
+            self.current.add(path, old, new)
+            return
+        step = Step(None)
+        step.add(path, old, new)
+        self._push(step)
+
+    def _push(self, step):
+        if step.paths:
+            self.undo_stack.append(step)
+            self.redo_stack.clear()
+            self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def mark_saved(self):
+        self.saved = self.undo_stack[-1] if self.undo_stack else None
+        self._changed()
+
+    def at_saved(self):
+        """True if undo/redo brought the document back to its saved state"""
+        return (self.undo_stack[-1] if self.undo_stack else None) is self.saved
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo_label(self):
+        return self.undo_stack[-1].label if self.undo_stack else None
+
+    def redo_label(self):
+        return self.redo_stack[-1].label if self.redo_stack else None
+
+    def pop_undo(self):
+        step = self.undo_stack.pop()
+        self.redo_stack.append(step)
+        self._changed()
+        return step
+
+    def pop_redo(self):
+        step = self.redo_stack.pop()
+        self.undo_stack.append(step)
+        self._changed()
+        return step
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
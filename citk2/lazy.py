@@ -0,0 +1,116 @@
+"""Decoding the big sections of a save on first access.
+
+Countries, characters and technologies make up nearly all of a save,
+but the main variables tab needs none of them. parse_lazy() decodes the
+top-level variables and only locates the sections with
+patch.skip_value(), recording their spans. LazyData, the top-level dict,
+decodes a section the first time it is read, through the same
+parse_indexed() call a full load would have made, so the patch writer
+and diff see exactly the same spans either way.
+
+Until then the underlying dict holds None for the section and its key
+is in LazyData.pending. Reading a value through the dict API decodes it;
+iterating over the keys, len() and "in" do not. Malformed JSON inside a
+section is only reported when the section is decoded.
+"""
+from .patch import INDEX_DEPTH, parse_document, parse_indexed
+
+LAZY_SECTIONS = ("countries", "characters", "technologies")
+
+
+class LazyData(dict):
+    """Top-level save object whose pending sections are decoded on first read"""
+
+    def __init__(self, items, index, pending):
+        super().__init__(items)
+        self.index = index
+        self.pending = set(pending)
+        # Called as on_decode(key, value) after a section is decoded, returns what to store
+        self.on_decode = None
+
+    def decode(self, key):
+        start, _ = self.index.spans[(key,)]
+        value, _, _ = parse_indexed(
+            self.index.text, INDEX_DEPTH - 1, start, (key,), self.index.spans
+        )
+        if self.on_decode is not None:
+            value = self.on_decode(key, value)
+        self.pending.discard(key)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def decode_all(self):
+        for key in list(self.pending):
+            self.decode(key)
+
+    def raw(self):
+        """Plain dict of the decoded values, None for pending sections"""
+        return dict(dict.items(self))
+
+    def __getitem__(self, key):
+        if key in self.pending:
+            return self.decode(key)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        if key in self.pending:
+            return self.decode(key)
+        return dict.get(self, key, default)
+
+    def __setitem__(self, key, value):
+        self.pending.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        self.pending.discard(key)
+        dict.__delitem__(self, key)
+
+    def pop(self, key, *default):
+        self.pending.discard(key)
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if key in self.pending:
+            return self.decode(key)
+        return dict.setdefault(self, key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def items(self):
+        self.decode_all()
+        return dict.items(self)
+
+    def values(self):
+        self.decode_all()
+        return dict.values(self)
+
+    def copy(self):
+        self.decode_all()
+        return dict(dict.items(self))
+
+    def __eq__(self, other):
+        self.decode_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        self.decode_all()
+        return dict.__ne__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        self.decode_all()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        # Pickled and deep-copied as the plain dict it stands for
+        return (dict, (self.copy(),))
+
+
+def parse_lazy(text, progress=None, sections=LAZY_SECTIONS):
+    """Decode the top level of a JSON document, returns (data, SpanIndex)"""
+    skipped = []
+    data, index = parse_document(text, progress, lazy=sections, skipped=skipped)
+    return LazyData(data, index, skipped), index
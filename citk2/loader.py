@@ -0,0 +1,70 @@
+"""Bounded-copy loading of save files.
+
+The game wraps its JSON in a short header and trailer. Instead of reading
+the whole file into a str and running a regex over it, the file is
+memory-mapped, the JSON span is located on the raw bytes and only that
+slice is decoded.
+"""
+import json
+import mmap
+
+ENCODING = "utf-8"
+
+
+def find_json_span(buf):
+    """Return (start, end) of the JSON object in buf, or None.
+
+    Matches what re.search(r"({.*})", content, re.DOTALL) used to find:
+    from the first "{" to the last "}". Both searches run in C over the
+    buffer, so nothing is backtracked or copied.
+    """
+    start = buf.find(b"{")
+    if start < 0:
+        return None
+    end = buf.rfind(b"}")
+    if end < start:
+        return None
+    return start, end + 1
+
+
+def read_save(path):
+    """Read a save file, returns (prefix, json_text, suffix) or None.
+
+    The JSON text is decoded straight from the mapped file, so at peak the
+    process holds one decoded str of the JSON and nothing else.
+    """
+    with open(path, "rb") as f:
+        return read_save_file(f)
+
+
+def read_save_file(f):
+    """read_save() for a file already open in binary mode"""
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # Empty files cannot be mapped
+        return None
+    try:
+        span = find_json_span(mm)
+        if span is None:
+            return None
+        start, end = span
+        view = memoryview(mm)
+        try:
+            prefix = str(view[:start], ENCODING)
+            json_text = str(view[start:end], ENCODING)
+            suffix = str(view[end:], ENCODING)
+        finally:
+            view.release()
+    finally:
+        mm.close()
+    return prefix, json_text, suffix
+
+
+def load_json(path):
+    """Read a save file, returns (prefix, data, suffix) or None"""
+    parts = read_save(path)
+    if parts is None:
+        return None
+    prefix, json_text, suffix = parts
+    return prefix, json.loads(json_text), suffix
@@ -0,0 +1,340 @@
+"""Surgical save writer that only re-serializes edited values.
+
+At load time parse_indexed() decodes the JSON while recording the
+(start, end) offsets of every value down to INDEX_DEPTH levels, i.e. each
+top-level variable and each country, character and technology category.
+Anything deeper is decoded in one go by the C scanner.
+
+When an edited path lies below the indexed levels, SpanIndex refines the
+enclosing value on demand, so only entities that were actually edited are
+ever scanned twice. On save splice() re-dumps just the edited values and
+joins them with the untouched slices of the original text, so number
+formatting and key order of everything else stay byte-identical. Adding
+or removing a key does not re-dump the object holding it either: the
+object is rebuilt from the original text of its other members, and new
+keys go last. Only values that were edited ever go through float repr.
+
+All keys and short string values are interned while decoding. A save
+repeats the same few hundred keys and enum values (traits, statuses,
+positions, country tags) across thousands of entities, and every save
+of a campaign repeats them again, so with interning each distinct
+string is stored once per process however many saves are open. marshal
+keeps the interning when documents go through the parse cache.
+"""
+import json
+import json.decoder
+import json.scanner
+import re
+import sys
+from collections.abc import Mapping
+
+from .records import to_json_value
+
+# Offsets recorded at load time: top-level keys and their direct children
+INDEX_DEPTH = 2
+
+# Longer strings (free text, generated names) are rarely shared
+INTERN_MAX = 40
+
+# How splice() writes a target path
+REPLACE = "replace"
+REBUILD = "rebuild"
+
+# Marks a path that no longer exists
+MISSING = object()
+
+
+def _intern_pairs(pairs, intern=sys.intern):
+    """object_pairs_hook building dicts with interned keys and short strings"""
+    obj = {}
+    for key, value in pairs:
+        kind = type(value)
+        if kind is str:
+            if len(value) <= INTERN_MAX:
+                value = intern(value)
+        elif kind is list and value and type(value[0]) is str:
+            # Lists of enum values such as traits
+            value[:] = [
+                intern(item) if type(item) is str and len(item) <= INTERN_MAX else item
+                for item in value
+            ]
+        obj[intern(key)] = value
+    return obj
+
+
+_scan_once = json.scanner.make_scanner(json.JSONDecoder(object_pairs_hook=_intern_pairs))
+_scanstring = json.decoder.scanstring
+_WHITESPACE = json.decoder.WHITESPACE.match
+_WHITESPACE_CHARS = ' \t\n\r'
+
+
+# Deepest nesting inside a value that skip_value() can step over
+SKIP_DEPTH = 6
+
+
+def _skip_pattern(depth):
+    """Regex matching an object or array nested at most depth levels deep"""
+    string = r'"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    other = r'[^{}\[\]"]++'
+    inner = '(?:' + other + '|' + string + ')*+'
+    for _ in range(depth):
+        inner = '(?:' + other + '|' + string + r'|\{' + inner + r'\}|\[' + inner + r'\])*+'
+    return re.compile(r'\{' + inner + r'\}|\[' + inner + r'\]')
+
+
+_SKIP = _skip_pattern(SKIP_DEPTH)
+
+
+def skip_value(text, idx):
+    """End offset of the object or array at text[idx], found without decoding it.
+
+    Only brackets and string boundaries are matched, in C, which is several
+    times faster than decoding. Returns None for deeper nesting or
+    anything that is not an object or array.
+    """
+    match = _SKIP.match(text, idx)
+    return match.end() if match else None
+
+
+def dump_value(value):
+    """Serialize one value the way the game writes it"""
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False, default=to_json_value)
+
+
+def parse_indexed(text, max_depth=INDEX_DEPTH, start=0, base_path=(), spans=None, progress=None,
+                  lazy=(), skipped=None):
+    """Decode the value at text[start:], recording offsets of nested values.
+
+    Returns (value, end, spans) where spans maps key paths, prefixed with
+    base_path, to (start, end) offsets into text. If given, progress is
+    called with the fraction of text decoded, about every percent.
+
+    Top-level keys in lazy are only located, not decoded: their value is
+    None and the key is appended to skipped.
+    """
+    if spans is None:
+        spans = {}
+    intern = sys.intern
+    scan_once = _scan_once
+    scanstring = _scanstring
+    step = max(len(text) // 100, 1)
+    next_report = [step]
+
+    def skip(idx):
+        # The game writes compact JSON, so the regex is rarely needed
+        if text[idx:idx + 1] in _WHITESPACE_CHARS:
+            return _WHITESPACE(text, idx).end()
+        return idx
+
+    def error(msg, idx):
+        return json.JSONDecodeError(msg, text, idx)
+
+    def parse_value(idx, path, depth):
+        char = text[idx:idx + 1]
+        if depth < max_depth and char == '{':
+            value, end = parse_object(idx + 1, path, depth + 1)
+        elif depth < max_depth and char == '[':
+            value, end = parse_array(idx + 1, path, depth + 1)
+        else:
+            try:
+                value, end = scan_once(text, idx)
+            except StopIteration as err:
+                raise error("Expecting value", err.value) from None
+        spans[path] = (idx, end)
+        if progress is not None and end >= next_report[0]:
+            next_report[0] = end + step
+            progress(end / len(text))
+        return value, end
+
+    def parse_object(idx, path, depth):
+        obj = {}
+        idx = skip(idx)
+        if text[idx:idx + 1] == '}':
+            return obj, idx + 1
+        while True:
+            if text[idx:idx + 1] != '"':
+                raise error("Expecting property name enclosed in double quotes", idx)
+            key, idx = scanstring(text, idx + 1)
+            key = intern(key)
+            idx = skip(idx)
+            if text[idx:idx + 1] != ':':
+                raise error("Expecting ':' delimiter", idx)
+            idx = skip(idx + 1)
+            end = skip_value(text, idx) if key in lazy and not path else None
+            if end is not None:
+                obj[key] = None
+                spans[(key,)] = (idx, end)
+                skipped.append(key)
+                idx = end
+            else:
+                obj[key], idx = parse_value(idx, path + (key,), depth)
+            idx = skip(idx)
+            char = text[idx:idx + 1]
+            if char == '}':
+                return obj, idx + 1
+            if char != ',':
+                raise error("Expecting ',' delimiter", idx)
+            idx = skip(idx + 1)
+
+    def parse_array(idx, path, depth):
+        arr = []
+        idx = skip(idx)
+        if text[idx:idx + 1] == ']':
+            return arr, idx + 1
+        while True:
+            value, idx = parse_value(idx, path + (len(arr),), depth)
+            arr.append(value)
+            idx = skip(idx)
+            char = text[idx:idx + 1]
+            if char == ']':
+                return arr, idx + 1
+            if char != ',':
+                raise error("Expecting ',' delimiter", idx)
+            idx = skip(idx + 1)
+
+    value, end = parse_value(skip(start), tuple(base_path), 0)
+    return value, end, spans
+
+
+def parse_document(text, progress=None, lazy=(), skipped=None):
+    """Decode a whole JSON document, returns (data, SpanIndex)"""
+    data, end, spans = parse_indexed(text, progress=progress, lazy=lazy, skipped=skipped)
+    if _WHITESPACE(text, end).end() != len(text):
+        raise json.JSONDecodeError("Extra data", text, end)
+    return data, SpanIndex(text, spans)
+
+
+class SpanIndex:
+    """Offsets of values inside the original JSON text of a save"""
+
+    def __init__(self, text, spans):
+        self.text = text
+        self.spans = spans
+        # Paths whose children have already been indexed
+        self.refined = set()
+
+    def locate(self, path):
+        """Return the longest prefix of path with known offsets, refining as needed"""
+        while True:
+            found = path
+            while found and found not in self.spans:
+                found = found[:-1]
+            if found == path or found in self.refined:
+                return found
+            self.refine(found)
+
+    def refine(self, path):
+        """Index the direct children of the value at path"""
+        self.refined.add(path)
+        # The top level is always indexed down to its children
+        if not path:
+            return
+        start, _ = self.spans[path]
+        if self.text[start] in '{[':
+            parse_indexed(self.text, 1, start, path, self.spans)
+
+    def members(self, paths):
+        """Keys and paths of the members of the original objects at paths, in text order"""
+        found = {}
+        for path in paths:
+            if path not in self.refined and len(path) >= INDEX_DEPTH:
+                self.refine(path)
+            found[path] = []
+        # One pass over the index for all of them
+        for child in self.spans:
+            if child and child[:-1] in found:
+                found[child[:-1]].append(child)
+        for children in found.values():
+            children.sort(key=lambda child: self.spans[child][0])
+        return found
+
+    def plan(self, data, dirty_paths):
+        """Decide how each edited path is written, returns {path: REPLACE or REBUILD}.
+
+        An edited value is replaced. An object that gained or lost keys is
+        rebuilt from its members, so its untouched members keep their text.
+        """
+        targets = {}
+
+        def mark(path, kind):
+            if targets.get(path) is not REPLACE:
+                targets[path] = kind
+
+        for path in dirty_paths:
+            found = self.locate(path)
+            if found == path and _lookup(data, path) is not MISSING:
+                mark(path, REPLACE)
+                continue
+            if found == path:
+                # Removed from its container
+                found = path[:-1]
+            # else a key the original text does not have, below found
+            value = _lookup(data, found)
+            while value is MISSING:
+                found = found[:-1]
+                value = _lookup(data, found)
+            mark(found, REBUILD if isinstance(value, Mapping) else REPLACE)
+
+        # Targets below a replaced value are written with it
+        return {
+            path: kind for path, kind in targets.items()
+            if not any(targets.get(path[:n]) is REPLACE for n in range(len(path)))
+        }
+
+    def splice(self, data, dirty_paths):
+        """Return the text with dirty values replaced"""
+        targets = self.plan(data, dirty_paths)
+        # Containers holding targets, to find them without walking everything
+        below = {}
+        for path in targets:
+            for n in range(len(path)):
+                below.setdefault(path[:n], set()).add(path[:n + 1])
+        text = self.text
+        spans = self.spans
+        members = self.members([path for path, kind in targets.items() if kind is REBUILD])
+
+        def render(path):
+            kind = targets.get(path)
+            if kind is REPLACE:
+                return dump_value(_lookup(data, path))
+            if kind is REBUILD:
+                return rebuild(path)
+            start, end = spans[path]
+            if path not in below:
+                return text[start:end]
+            pieces = []
+            pos = start
+            for child in sorted(below[path], key=lambda child: spans[child][0]):
+                child_start, child_end = spans[child]
+                pieces.append(text[pos:child_start])
+                pieces.append(render(child))
+                pos = child_end
+            pieces.append(text[pos:end])
+            return "".join(pieces)
+
+        def rebuild(path):
+            container = _lookup(data, path)
+            pieces = []
+            original = set()
+            for child in members[path]:
+                key = child[-1]
+                original.add(key)
+                if key in container:
+                    pieces.append(dump_value(key) + ":" + render(child))
+            for key in container:
+                if key not in original:
+                    pieces.append(dump_value(key) + ":" + dump_value(container[key]))
+            return "{" + ",".join(pieces) + "}"
+
+        start, end = spans[()]
+        return text[:start] + render(()) + text[end:]
+
+
+def _lookup(data, path):
+    node = data
+    try:
+        for key in path:
+            node = node[key]
+    except (KeyError, IndexError, TypeError):
+        return MISSING
+    return node
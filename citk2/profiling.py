@@ -0,0 +1,152 @@
+"""Opt-in instrumentation of the editor's hot paths.
+
+Methods decorated with @profiler.timed("name") record wall time and call
+counts while profiling is enabled, and optionally a cProfile listing and
+the tracemalloc peak of their slowest call. When profiling is off the
+decorator costs one attribute check per call.
+
+Profiling is enabled from the diagnostics window or by starting the
+editor with CITK2_PROFILE=1 (add "cprofile" and/or "tracemalloc", comma
+separated, for the heavier collectors). report() returns everything as a
+JSON-ready dict that users can attach to "it's slow on my save" reports.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+# Lines of cProfile output kept per hot path
+PROFILE_LINES = 25
+
+
+class _Stat:
+    __slots__ = ("calls", "total", "max", "last", "profile", "peak")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.profile = None
+        self.peak = None
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total * 1000 / self.calls, 3) if self.calls else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+            "last_ms": round(self.last * 1000, 3),
+            "peak_kib": None if self.peak is None else round(self.peak / 1024, 1),
+            "profile": self.profile
+        }
+
+
+class Profiler:
+    """Collects timings for functions wrapped with timed()"""
+
+    def __init__(self, enabled=False, use_cprofile=False, use_tracemalloc=False):
+        self.enabled = enabled
+        self.use_cprofile = use_cprofile
+        self.use_tracemalloc = use_tracemalloc
+        self.stats = {}
+        self.context = {}
+        self.lock = threading.Lock()
+        # Only the outermost instrumented call on a thread runs the collectors
+        self.local = threading.local()
+
+    @classmethod
+    def from_environment(cls, variable="CITK2_PROFILE"):
+        value = os.environ.get(variable, "")
+        options = {part.strip().lower() for part in value.split(",") if part.strip()}
+        enabled = bool(options) and options != {"0"}
+        return cls(enabled, "cprofile" in options, "tracemalloc" in options)
+
+    def timed(self, name):
+        """Decorator recording calls to func under name"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                return self._call(name, func, args, kwargs)
+            return wrapper
+        return decorate
+
+    def _call(self, name, func, args, kwargs):
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        outermost = depth == 0
+        profile = cProfile.Profile() if outermost and self.use_cprofile else None
+        tracing = outermost and self.use_tracemalloc and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            peak = None
+            if tracing:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            self.local.depth = depth
+            self._record(name, elapsed, profile, peak)
+
+    def _record(self, name, elapsed, profile, peak):
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = _Stat()
+            stat.calls += 1
+            stat.total += elapsed
+            stat.last = elapsed
+            slowest = elapsed >= stat.max
+            stat.max = max(stat.max, elapsed)
+            # Keep the detail of the slowest call, that is the one users complain about
+            if slowest and profile is not None:
+                stat.profile = self._format_profile(profile)
+            if peak is not None:
+                stat.peak = max(peak, stat.peak or 0)
+
+    @staticmethod
+    def _format_profile(profile):
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        return out.getvalue()
+
+    def reset(self):
+        with self.lock:
+            self.stats.clear()
+
+    def report(self):
+        """Return all collected data as a JSON-ready dict"""
+        with self.lock:
+            stats = {name: stat.as_dict() for name, stat in sorted(self.stats.items())}
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version,
+            "platform": platform.platform(),
+            "collectors": {"cprofile": self.use_cprofile, "tracemalloc": self.use_tracemalloc},
+            "context": dict(self.context),
+            "stats": stats
+        }
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+
+# Shared by the core and the editor window
+profiler = Profiler.from_environment()
@@ -0,0 +1,291 @@
+"""Structured queries over every save in a folder.
+
+A Query names a target (the main variables, the countries or the
+characters), optionally one entity by name, and conditions in the rule
+syntax of rules.py, e.g.
+
+    Query("characters", [["status", "==", "Dead"]], key="Boris Yeltsin")
+    Query("variables", [["corruptionLevel", ">", 50]])
+
+Queries run against the entity table of the SaveIndex database: one row
+per entity per save, holding its scalar fields and dicts of scalars as
+JSON (lists such as traits are not indexed). Comparisons with a number
+or a string are pushed down to SQLite with json_extract(), and every
+candidate is checked again with the rules' own predicates, so a query
+matches exactly what the same "where" would match in a preset. The SQL
+only has to keep every row the predicates would keep: "!=" lets JSON
+nulls, arrays and objects through, since SQL's NULL != x is not true.
+benchmarks/check_query.py compares the two on null, missing and
+mixed-type fields.
+
+QueryEngine.search() is a generator. It first yields the matches of the
+saves whose rows are up to date, then parses the saves that are new or
+changed in a process pool and yields their matches as each one is
+indexed. Closing the generator stops the pool. If the pool breaks (a
+worker killed, or workers that cannot start), the saves not parsed yet
+are parsed in this process instead. A program frozen with PyInstaller
+must call multiprocessing.freeze_support() first thing in its main
+block, as the editor does, or every worker starts the program again.
+"""
+import functools
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from .core import SaveFormatError
+from .loader import load_json
+from .rules import BINARY_OPS, UNARY_OPS, RuleError, compile_condition, field_keys
+from .saveindex import SaveIndex
+from .watcher import scan_folder
+
+QUERY_TARGETS = ("variables", "countries", "characters")
+
+# Key of the single row holding a save's main variables
+VARIABLES_KEY = ""
+
+# Comparisons SQLite can pre-filter on
+PUSHDOWN_OPS = ("==", "!=", "<", "<=", ">", ">=")
+
+
+def _scalar(value):
+    return value is None or isinstance(value, (str, int, float))
+
+
+def indexed_fields(entity):
+    """The scalar fields and dicts of scalars of an entity"""
+    fields = {}
+    for key, value in entity.items():
+        if _scalar(value):
+            fields[key] = value
+        elif isinstance(value, dict) and all(_scalar(item) for item in value.values()):
+            fields[key] = value
+    return fields
+
+
+def extract_entities(path):
+    """(section, key, JSON) rows of a save; runs in a worker process"""
+    parts = load_json(path)
+    if parts is None:
+        raise SaveFormatError("Invalid save file format")
+    _, data, _ = parts
+    if not isinstance(data, dict):
+        raise SaveFormatError("Invalid save file format")
+    dump = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    rows = [("variables", VARIABLES_KEY, dump(indexed_fields(data)))]
+    for section in QUERY_TARGETS[1:]:
+        entities = data.get(section)
+        if not isinstance(entities, dict):
+            continue
+        for key, entity in entities.items():
+            if isinstance(entity, dict):
+                rows.append((section, key, dump(indexed_fields(entity))))
+    return rows
+
+
+def json_path(keys):
+    return "$" + "".join('."' + key.replace('"', '\\"') + '"' for key in keys)
+
+
+def parse_conditions(text):
+    """Conditions typed as 'status == Dead and power > 50' in rule syntax.
+
+    Values are read as JSON where they parse, as plain text otherwise.
+    """
+    conditions = []
+    for part in text.split(" and "):
+        part = part.strip()
+        if not part:
+            continue
+        field, _, rest = part.partition(" ")
+        rest = rest.strip()
+        if rest in UNARY_OPS:
+            conditions.append([field, rest])
+            continue
+        # Longest first, so "<=" is not read as "<"
+        for op in sorted(BINARY_OPS, key=len, reverse=True):
+            if rest.startswith(op + " "):
+                raw = rest[len(op):].strip()
+                try:
+                    value = json.loads(raw)
+                except ValueError:
+                    value = raw
+                conditions.append([field, op, value])
+                break
+        else:
+            raise RuleError(f"Invalid condition {part!r}")
+    return conditions
+
+
+class Query:
+    """Entities of target, or the one named key, matching every condition"""
+
+    def __init__(self, target, where=(), key=None):
+        if target not in QUERY_TARGETS:
+            raise RuleError(f"Unknown target {target!r}")
+        self.target = target
+        self.where = [list(condition) for condition in where]
+        self.key = VARIABLES_KEY if target == "variables" else key
+        self.predicates = [compile_condition(condition) for condition in self.where]
+
+    def fields(self):
+        """Fields the conditions look at, for showing with each match"""
+        return list(dict.fromkeys(condition[0] for condition in self.where))
+
+    def sql(self):
+        """WHERE clause and parameters selecting a superset of the matches"""
+        clauses = ["path = ?", "section = ?"]
+        params = [self.target]
+        if self.key is not None:
+            clauses.append("key = ?")
+            params.append(self.key)
+        for field, op, *rest in self.where:
+            path = json_path(field_keys(field))
+            if op == "has":
+                clauses.append("json_type(data, ?) IS NOT NULL")
+                params.append(path)
+            elif op in PUSHDOWN_OPS and isinstance(rest[0], (str, int, float)) and not isinstance(rest[0], bool):
+                if op == "!=":
+                    # NULL != x is not true in SQL, and json_extract() gives arrays
+                    # and objects as JSON text, which may equal x; Python's != is
+                    # true for all of them
+                    clauses.append(
+                        "(json_extract(data, ?) != ? OR json_type(data, ?) IN ('null', 'array', 'object'))"
+                    )
+                    params.extend((path, rest[0], path))
+                else:
+                    clauses.append(f"json_extract(data, ?) {'=' if op == '==' else op} ?")
+                    params.extend((path, rest[0]))
+        return " AND ".join(clauses), params
+
+    def matches(self, entity):
+        for predicate in self.predicates:
+            if not predicate(entity):
+                return False
+        return True
+
+
+class Match:
+    """An entity of a save that matched a query"""
+    __slots__ = ("path", "section", "key", "entity")
+
+    def __init__(self, path, section, key, entity):
+        self.path = path
+        self.section = section
+        self.key = key
+        # Indexed fields of the entity
+        self.entity = entity
+
+    def __repr__(self):
+        return f"Match({self.path!r}, {self.section!r}, {self.key!r})"
+
+
+class QueryEngine:
+    """Runs Queries over a folder, keeping the entity index up to date"""
+
+    def __init__(self, index=None, processes=None):
+        self.index = index or SaveIndex()
+        self.processes = processes or os.cpu_count() or 1
+        # Path -> why the last search could not index it
+        self.errors = {}
+
+    def search(self, query, folder, progress=None):
+        """Yield Matches from every save in folder, up-to-date saves first.
+
+        progress, if given, is called with the fraction of saves searched.
+        """
+        folder = os.path.abspath(folder)
+        files = scan_folder(folder)
+        self.errors = {}
+        with self.index.connect() as db:
+            known = {
+                path: ((mtime_ns, size), error)
+                for path, mtime_ns, size, error in db.execute(
+                    "SELECT path, mtime_ns, size, error FROM indexed WHERE folder = ?", (folder,)
+                )
+            }
+            gone = [(path,) for path in known if path not in files]
+            db.executemany("DELETE FROM entities WHERE path = ?", gone)
+            db.executemany("DELETE FROM indexed WHERE path = ?", gone)
+            db.commit()
+
+            fresh = []
+            stale = []
+            for path, stat in sorted(files.items(), key=lambda item: item[1], reverse=True):
+                entry = known.get(path)
+                if entry is not None and entry[0] == stat:
+                    fresh.append(path)
+                    if entry[1]:
+                        self.errors[path] = entry[1]
+                else:
+                    stale.append(path)
+
+            done = 0
+            for path in fresh:
+                yield from self._matches(db, query, path)
+                done += 1
+                if progress is not None:
+                    progress(done / len(files))
+            if not stale:
+                return
+
+            # Parsing is CPU-bound, so the saves are parsed in separate processes
+            left = set(stale)
+            pool = ProcessPoolExecutor(
+                max_workers=min(self.processes, len(stale)),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            try:
+                futures = {pool.submit(extract_entities, path): path for path in stale}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    rows, error = self._rows(path, future.result)
+                    left.discard(path)
+                    self._store(db, folder, path, files[path], rows, error)
+                    yield from self._matches(db, query, path)
+                    done += 1
+                    if progress is not None:
+                        progress(done / len(files))
+            except BrokenProcessPool:
+                # A worker died or could not start, the loop below takes over
+                pass
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            # Only left over if the pool broke: parse the rest here
+            for path in [path for path in stale if path in left]:
+                rows, error = self._rows(path, functools.partial(extract_entities, path))
+                self._store(db, folder, path, files[path], rows, error)
+                yield from self._matches(db, query, path)
+                done += 1
+                if progress is not None:
+                    progress(done / len(files))
+
+    def _rows(self, path, parse):
+        """(rows, error) of one save, from parse() or why it failed"""
+        try:
+            return parse(), None
+        except (OSError, ValueError) as e:
+            error = self.errors[path] = str(e)
+            return [], error
+
+    def _store(self, db, folder, path, stat, rows, error):
+        db.execute("DELETE FROM entities WHERE path = ?", (path,))
+        db.executemany(
+            "INSERT INTO entities VALUES (?, ?, ?, ?)",
+            [(path, section, key, data) for section, key, data in rows]
+        )
+        # The stat from before parsing: a save rewritten meanwhile is parsed again next time
+        db.execute(
+            "INSERT OR REPLACE INTO indexed VALUES (?, ?, ?, ?, ?)", (path, folder, *stat, error)
+        )
+        db.commit()
+
+    def _matches(self, db, query, path):
+        where, params = query.sql()
+        rows = db.execute(f"SELECT key, data FROM entities WHERE {where}", [path] + params).fetchall()
+        for key, data in rows:
+            entity = json.loads(data)
+            if query.matches(entity):
+                yield Match(path, query.target, key, entity)
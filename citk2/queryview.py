@@ -0,0 +1,202 @@
+"""Window searching every save in the saved_games folder.
+
+Like diffview.py this module needs tkinter. QueryEngine.search() runs on
+a worker thread and puts each match on a queue as it is found; the main
+thread drains the queue from a root.after poll, as in background.py, so
+matches appear while stale saves are still being parsed.
+"""
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk
+
+from .background import POLL_MS, LoadCancelled
+from .diffview import format_value
+from .query import QUERY_TARGETS, Query, parse_conditions
+from .rules import MISSING, RuleError, lookup, field_keys
+
+# Matches inserted per poll, so a flood of them does not freeze the window
+INSERT_CHUNK = 500
+
+
+class SearchJob:
+    """One search running on a worker thread"""
+
+    def __init__(self, engine, query, folder):
+        self.engine = engine
+        self.query = query
+        self.folder = folder
+        self.cancelled = threading.Event()
+        self.messages = queue.Queue()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        results = self.engine.search(self.query, self.folder, self.report)
+        try:
+            for match in results:
+                if self.cancelled.is_set():
+                    return
+                self.messages.put(("match", match))
+        except LoadCancelled:
+            return
+        except Exception as e:
+            self.messages.put(("error", e))
+        else:
+            self.messages.put(("done", None))
+        finally:
+            results.close()
+
+    def report(self, fraction):
+        """Progress callback run on the worker thread, also between saves without matches"""
+        if self.cancelled.is_set():
+            raise LoadCancelled()
+        self.messages.put(("progress", fraction))
+
+
+class QueryWindow:
+    """Toplevel with a query bar and the matches found so far"""
+
+    def __init__(self, root, engine, folder, on_open):
+        self.engine = engine
+        self.folder = folder
+        self.on_open = on_open
+        self.job = None
+        self.fields = []
+        self.found = 0
+        # Treeview row -> save it was found in
+        self.paths = {}
+
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Search saves in {folder}")
+        self.window.geometry("1000x600")
+        self.window.configure(bg="#8B0000")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        bar = ttk.Frame(self.window, style="Gold.TFrame")
+        bar.pack(fill=tk.X, padx=10, pady=(10, 5))
+        ttk.Label(bar, text="Search", style="Gold.TLabel").pack(side="left", padx=5)
+        self.target_var = tk.StringVar(value="characters")
+        ttk.Combobox(
+            bar,
+            textvariable=self.target_var,
+            values=QUERY_TARGETS,
+            state="readonly",
+            width=12,
+            style="Gold.TCombobox"
+        ).pack(side="left", padx=5)
+        ttk.Label(bar, text="named", style="Gold.TLabel").pack(side="left", padx=5)
+        self.key_var = tk.StringVar()
+        ttk.Entry(bar, textvariable=self.key_var, width=24).pack(side="left", padx=5)
+        ttk.Label(bar, text="where", style="Gold.TLabel").pack(side="left", padx=5)
+        self.where_var = tk.StringVar()
+        where_entry = ttk.Entry(bar, textvariable=self.where_var, width=50)
+        where_entry.pack(side="left", padx=5, fill=tk.X, expand=True)
+        where_entry.bind("<Return>", self.search)
+        for text, command in (("Search", self.search), ("Stop", self.stop)):
+            ttk.Button(
+                bar,
+                text=text,
+                command=command,
+                style="Gold.TButton"
+            ).pack(side="left", padx=5)
+
+        self.status_var = tk.StringVar(
+            value='Conditions like: status == "Dead" and power > 50 (any field, dots for nested ones)'
+        )
+        ttk.Label(
+            self.window,
+            textvariable=self.status_var,
+            style="Gold.TLabel"
+        ).pack(fill=tk.X, padx=10, pady=(0, 5))
+
+        frame = ttk.Frame(self.window, style="Red.TFrame")
+        frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.tree = ttk.Treeview(frame, columns=("entity", "values"))
+        self.tree.heading("#0", text="Save")
+        self.tree.heading("entity", text="Entry")
+        self.tree.heading("values", text="Values")
+        self.tree.column("#0", width=240)
+        self.tree.column("entity", width=240)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill=tk.BOTH, expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.tree.bind("<Double-1>", self.open_selected)
+
+    def search(self, event=None):
+        self.stop()
+        try:
+            query = Query(
+                self.target_var.get(), parse_conditions(self.where_var.get()),
+                key=self.key_var.get().strip() or None
+            )
+        except RuleError as e:
+            self.status_var.set(str(e))
+            return
+        self.tree.delete(*self.tree.get_children())
+        self.paths = {}
+        self.fields = query.fields()
+        self.found = 0
+        self.status_var.set("Searching...")
+        job = SearchJob(self.engine, query, self.folder)
+        self.job = job
+        threading.Thread(target=job.run, name="citk2-search", daemon=True).start()
+        self.window.after(POLL_MS, self._poll, job)
+
+    def stop(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.job = None
+            self.status_var.set(f"Stopped, {self.found} matches")
+
+    def _poll(self, job):
+        for _ in range(INSERT_CHUNK):
+            # A superseded job's messages are dropped
+            if job is not self.job:
+                return
+            try:
+                kind, payload = job.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "match":
+                self.add_match(payload)
+            elif kind == "progress":
+                self.status_var.set(f"Searching... {payload:.0%}, {self.found} matches")
+            else:
+                self.job = None
+                self.finish(payload)
+                return
+        self.window.after(POLL_MS, self._poll, job)
+
+    def add_match(self, match):
+        self.found += 1
+        values = []
+        for field in self.fields:
+            value = lookup(match.entity, field_keys(field))
+            if value is not MISSING:
+                values.append(f"{field}={format_value(value)}")
+        iid = self.tree.insert(
+            "", tk.END, text=os.path.basename(match.path),
+            values=(match.key or "(main variables)", ", ".join(values))
+        )
+        self.paths[iid] = match.path
+
+    def finish(self, error):
+        status = f"{self.found} matches"
+        if error is not None:
+            status += f", search failed: {error}"
+        if self.engine.errors:
+            status += f", {len(self.engine.errors)} saves could not be read"
+        self.status_var.set(status)
+
+    def open_selected(self, event=None):
+        path = self.paths.get(self.tree.focus())
+        if path is not None:
+            self.on_open(path)
+
+    def close(self):
+        self.stop()
+        self.window.destroy()
@@ -0,0 +1,408 @@
+"""Compact column store for countries and characters.
+
+A large save holds tens of thousands of characters. As dicts, every one
+of them carries a hash table of about twenty keys, four nested dicts,
+and a separate float or int object for every number. RecordTable stores
+such a section column-wise instead:
+
+- every numeric value is one slot of an array("d") column, plus one
+  byte recording whether the game wrote it as an int or a float;
+- nested dicts of scalars (charLevel, pointOfInfluence, ...) are
+  flattened into a column per nested key;
+- strings, bools, nulls, lists, deeper dicts and anything else go in a
+  plain list column;
+- each entity points to a Shape, its keys in their original order. All
+  entities with the same layout share one Shape, so keys the editor
+  knows nothing about are kept too.
+
+Entities are Record views with __slots__ that read and write the
+columns and behave like the dicts they replace, so SaveDocument.set(),
+undo, the rules and the forms work unchanged. as_dict() and the JSON
+encoding hook give back exactly the original keys, key order and number
+types.
+
+Compacting is optional: SaveDocument.compact() switches a loaded
+document over, and the editor does it for saves of COMPACT_MIN_BYTES or
+more.
+"""
+from array import array
+from collections.abc import MutableMapping
+
+# Sections stored as RecordTables by SaveDocument.compact()
+COMPACT_SECTIONS = ("countries", "characters")
+
+# The editor compacts saves at least this big
+COMPACT_MIN_BYTES = 8 * 1024 * 1024
+
+# What a cell holds
+OBJECT = 0
+INT = 1
+FLOAT = 2
+
+# Larger integers do not survive the trip through a double
+_MAX_EXACT_INT = 2 ** 53
+
+
+def _number_kind(value):
+    kind = type(value)
+    if kind is float:
+        return FLOAT
+    if kind is int and -_MAX_EXACT_INT <= value <= _MAX_EXACT_INT:
+        return INT
+    return OBJECT
+
+
+def _flattens(value):
+    """True for a non-empty dict of scalars, which gets a column per key"""
+    if type(value) is not dict or not value:
+        return False
+    for item in value.values():
+        if isinstance(item, (dict, list)):
+            return False
+    return True
+
+
+class Shape:
+    """Keys of a record in order, mapped to the Shape of flattened ones or None"""
+    __slots__ = ("fields", "signature")
+
+    def __init__(self, fields, signature):
+        self.fields = fields
+        self.signature = signature
+
+
+class Column:
+    """One leaf field of every row"""
+    __slots__ = ("values", "kinds", "objects")
+
+    def __init__(self, size):
+        self.values = array("d", bytes(8 * size))
+        self.kinds = bytearray(size)
+        # Created for the first value that is not a number
+        self.objects = None
+
+    def get(self, row):
+        kind = self.kinds[row]
+        if kind == FLOAT:
+            return self.values[row]
+        if kind == INT:
+            return int(self.values[row])
+        return self.objects[row]
+
+    def put(self, row, value):
+        kind = _number_kind(value)
+        self.kinds[row] = kind
+        if kind:
+            self.values[row] = value
+            if self.objects is not None:
+                self.objects[row] = None
+        else:
+            if self.objects is None:
+                self.objects = [None] * len(self.kinds)
+            self.objects[row] = value
+
+    def clear(self, row):
+        self.kinds[row] = OBJECT
+        if self.objects is not None:
+            self.objects[row] = None
+
+    def grow(self, count):
+        self.values.extend(array("d", bytes(8 * count)))
+        self.kinds.extend(bytes(count))
+        if self.objects is not None:
+            self.objects.extend([None] * count)
+
+
+class RecordTable(MutableMapping):
+    """One section of the save, e.g. data["characters"], stored by column.
+
+    Rows are never reused: replacing a whole entity gives it a new row, so
+    Records held by the undo history keep showing the old value.
+    """
+
+    def __init__(self, entities=None):
+        # Entity key -> row, in document order
+        self.rows = {}
+        # Row -> Shape
+        self.shapes = []
+        # Leaf key path, e.g. ("charLevel", "Diplomacy") -> Column
+        self.columns = {}
+        self.capacity = 0
+        self._shapes = {}
+        # (shape, path, remove) -> Shape after adding or removing a key
+        self._edits = {}
+        if entities:
+            # Allocate the columns once for the whole section
+            self.capacity = len(entities)
+            for key, value in entities.items():
+                self[key] = value
+
+    @classmethod
+    def compactable(cls, section):
+        """True if section is a dict of entity dicts"""
+        return type(section) is dict and all(type(value) is dict for value in section.values())
+
+    def __getitem__(self, key):
+        return Record(self, self.rows[key], ())
+
+    def __setitem__(self, key, value):
+        if isinstance(value, Record):
+            value = value.as_dict()
+        if type(value) is not dict:
+            raise TypeError(f"{key!r}: entities must be dicts, not {type(value).__name__}")
+        row = len(self.shapes)
+        if row >= self.capacity:
+            for column in self.columns.values():
+                column.grow(row + 1 - self.capacity)
+            self.capacity = row + 1
+        self.shapes.append(self._fill(row, (), value))
+        self.rows[key] = row
+
+    def __delitem__(self, key):
+        del self.rows[key]
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __repr__(self):
+        return f"<RecordTable of {len(self.rows)} entities>"
+
+    def get(self, key, default=None):
+        row = self.rows.get(key)
+        return default if row is None else Record(self, row, ())
+
+    def items(self):
+        for key, row in self.rows.items():
+            yield key, Record(self, row, ())
+
+    def values(self):
+        for row in self.rows.values():
+            yield Record(self, row, ())
+
+    def as_dict(self):
+        return {key: self.row_dict(row, self.shapes[row], ()) for key, row in self.rows.items()}
+
+    # ====== ROWS ======
+
+    def column(self, path):
+        column = self.columns.get(path)
+        if column is None:
+            column = self.columns[path] = Column(self.capacity)
+        return column
+
+    def _fill(self, row, prefix, value):
+        """Store a dict in row under prefix, returns its Shape"""
+        fields = {}
+        for key, item in value.items():
+            path = prefix + (key,)
+            if not prefix and _flattens(item):
+                fields[key] = self._fill(row, path, item)
+            else:
+                fields[key] = None
+                self.column(path).put(row, item)
+        return self._shape(fields)
+
+    def _shape(self, fields):
+        signature = tuple(
+            (key, None if sub is None else sub.signature) for key, sub in fields.items()
+        )
+        shape = self._shapes.get(signature)
+        if shape is None:
+            shape = self._shapes[signature] = Shape(fields, signature)
+        return shape
+
+    def has(self, shape, path):
+        for key in path:
+            if shape is None or key not in shape.fields:
+                return False
+            shape = shape.fields[key]
+        return shape is None
+
+    def assign(self, path, value):
+        """Set the leaf at path on every entity that has it, in one column pass.
+
+        Returns (entities that have it, [(key, old value)] of those changed).
+        """
+        column = self.columns.get(path)
+        if column is None:
+            return 0, []
+        shapes = self.shapes
+        having = {}
+        count = 0
+        changed = []
+        for key, row in self.rows.items():
+            shape = shapes[row]
+            has = having.get(shape)
+            if has is None:
+                has = having[shape] = self.has(shape, path)
+            if not has:
+                continue
+            count += 1
+            old = column.get(row)
+            if type(old) is not type(value) or old != value:
+                column.put(row, value)
+                changed.append((key, old))
+        return count, changed
+
+    def reshape(self, row, path, remove=False):
+        """Give row a leaf at path, or remove path from it"""
+        shape = self.shapes[row]
+        edit = (shape, path, remove)
+        new = self._edits.get(edit)
+        if new is None:
+            new = self._edits[edit] = self._edit(shape, path, remove)
+        self.shapes[row] = new
+
+    def _edit(self, shape, path, remove):
+        fields = dict(shape.fields)
+        key = path[0]
+        if len(path) > 1:
+            fields[key] = self._edit(fields[key], path[1:], remove)
+        elif remove:
+            del fields[key]
+        else:
+            # An existing key keeps its position, a new one goes last
+            fields[key] = None
+        return self._shape(fields)
+
+    def leaves(self):
+        """{leaf path: (number types, other values)} over the entities' rows.
+
+        Reads the kind bytes of each column instead of every value, so a
+        whole section is summarised in one pass per column.
+        """
+        by_shape = {}
+        for row in self.rows.values():
+            by_shape.setdefault(self.shapes[row], []).append(row)
+        # Leaf path -> rows of the shapes that have it
+        having = {}
+        for shape, rows in by_shape.items():
+            for path in self._leaf_paths(shape, ()):
+                having.setdefault(path, []).extend(rows)
+        result = {}
+        for path, rows in having.items():
+            column = self.columns[path]
+            kinds = column.kinds
+            if len(rows) == len(kinds):
+                # Every row has it: no replaced or removed entities in the way
+                found = set(kinds)
+                objects = [] if OBJECT not in found else [
+                    value for value, kind in zip(column.objects, kinds) if kind == OBJECT
+                ]
+            else:
+                found = {kinds[row] for row in rows}
+                objects = [] if OBJECT not in found else [
+                    column.objects[row] for row in rows if kinds[row] == OBJECT
+                ]
+            numbers = {number for kind, number in ((INT, int), (FLOAT, float)) if kind in found}
+            result[path] = (numbers, objects)
+        return result
+
+    def _leaf_paths(self, shape, prefix):
+        for key, sub in shape.fields.items():
+            if sub is None:
+                yield prefix + (key,)
+            else:
+                yield from self._leaf_paths(sub, prefix + (key,))
+
+    def row_dict(self, row, shape, prefix):
+        """The value stored in row under prefix, as plain dicts"""
+        columns = self.columns
+        result = {}
+        for key, sub in shape.fields.items():
+            path = prefix + (key,)
+            if sub is None:
+                result[key] = columns[path].get(row)
+            else:
+                result[key] = self.row_dict(row, sub, path)
+        return result
+
+
+class Record(MutableMapping):
+    """Dict-like view of one entity of a RecordTable, or of a flattened dict in it"""
+    __slots__ = ("table", "row", "prefix")
+
+    def __init__(self, table, row, prefix):
+        self.table = table
+        self.row = row
+        self.prefix = prefix
+
+    def shape(self):
+        shape = self.table.shapes[self.row]
+        for key in self.prefix:
+            shape = shape.fields[key]
+        return shape
+
+    def __getitem__(self, key):
+        sub = self.shape().fields[key]
+        path = self.prefix + (key,)
+        if sub is None:
+            return self.table.columns[path].get(self.row)
+        return Record(self.table, self.row, path)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key, value):
+        if isinstance(value, Record):
+            value = value.as_dict()
+        path = self.prefix + (key,)
+        # A new key, or a flattened dict replaced by a plain value
+        if self.shape().fields.get(key, False) is not None:
+            self.table.reshape(self.row, path)
+        self.table.column(path).put(self.row, value)
+
+    def __delitem__(self, key):
+        sub = self.shape().fields[key]
+        path = self.prefix + (key,)
+        self.table.reshape(self.row, path, remove=True)
+        if sub is None:
+            self.table.columns[path].clear(self.row)
+
+    def __contains__(self, key):
+        return key in self.shape().fields
+
+    def __iter__(self):
+        return iter(self.shape().fields)
+
+    def __len__(self):
+        return len(self.shape().fields)
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.as_dict()
+        return self.as_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.as_dict())
+
+    def as_dict(self):
+        return self.table.row_dict(self.row, self.shape(), self.prefix)
+
+
+def compact_section(section, entities):
+    """RecordTable for one of COMPACT_SECTIONS, anything else unchanged"""
+    if section in COMPACT_SECTIONS and RecordTable.compactable(entities):
+        return RecordTable(entities)
+    return entities
+
+
+def to_json_value(value):
+    """json.dumps default hook: RecordTables and Records as plain dicts"""
+    if isinstance(value, RecordTable):
+        # One entity at a time, the whole section is never copied
+        return {key: Record(value, row, ()) for key, row in value.rows.items()}
+    if isinstance(value, Record):
+        return value.as_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
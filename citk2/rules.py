@@ -0,0 +1,321 @@
+"""Declarative quick-action rules.
+
+A rule names the section of the save it targets, optional conditions and
+the assignments to make on every entity that matches, e.g.
+
+    {"name": "Diplomatic Superparty", "target": "countries",
+     "where": [["activeInGame", "truthy"]],
+     "set": {"relationshipWithPlayer": 100}}
+
+compile_rules() turns the conditions into predicates once and groups the
+rules by target, so a whole preset is applied in one traversal of the
+main variables, countries, characters and technologies. Conditions see
+every entity as it was before the preset ran. Like the quick actions,
+assignments only change fields an entity already has, except that main
+variables are always set. Values for main variables must be numbers the
+game's type for them can hold; Rule rejects anything else up front, so a
+preset never stops halfway through. Numeric country assignments go through the
+document's CountryTable. Presets are JSON lists of rule dicts, so one
+file can be applied to any number of saves.
+
+Fields may name nested values with dots, e.g. "pointOfInfluence.USA".
+"""
+import copy
+import json
+import operator
+
+from .columns import is_number
+from .core import (
+    VARIABLES, INT_VARS, LOYALTY_VARS, DEBT_VARS, USA_VARS, TECH_POINT_TYPES
+)
+
+TARGETS = ("variables", "countries", "characters", "technologies")
+
+# Marks a field the entity does not have
+MISSING = object()
+
+
+def _contains(a, b):
+    return a in b
+
+
+def _not_contains(a, b):
+    return a not in b
+
+
+def _has_item(a, b):
+    return b in a
+
+
+def _lacks_item(a, b):
+    return b not in a
+
+
+UNARY_OPS = {
+    "has": lambda v: v is not MISSING,
+    "truthy": lambda v: v is not MISSING and bool(v),
+    "falsy": lambda v: v is MISSING or not v
+}
+BINARY_OPS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": _contains,
+    "not in": _not_contains,
+    # For list fields: ["traits", "contains", "Radical"]
+    "contains": _has_item,
+    "not contains": _lacks_item
+}
+
+
+class RuleError(ValueError):
+    """Raised for a rule that cannot be compiled"""
+
+
+def lookup(entity, keys):
+    """Return the value at keys inside entity, or MISSING"""
+    node = entity
+    for key in keys:
+        try:
+            node = node[key]
+        except (KeyError, IndexError, TypeError):
+            return MISSING
+    return node
+
+
+def field_keys(field):
+    return tuple(field.split("."))
+
+
+def compile_condition(condition):
+    """Turn ["field", "op"] or ["field", "op", value] into a predicate"""
+    field, op, *rest = condition
+    keys = field_keys(field)
+    if op in UNARY_OPS and not rest:
+        test = UNARY_OPS[op]
+        return lambda entity: test(lookup(entity, keys))
+    if op in BINARY_OPS and len(rest) == 1:
+        test = BINARY_OPS[op]
+        value = rest[0]
+
+        def predicate(entity):
+            current = lookup(entity, keys)
+            if current is MISSING:
+                return False
+            try:
+                return test(current, value)
+            except TypeError:
+                # e.g. comparing a string field with a number
+                return False
+        return predicate
+    raise RuleError(f"Invalid condition {condition!r}")
+
+
+def matching(entities, where):
+    """Keys of the entities matching every condition, in document order"""
+    predicates = [compile_condition(condition) for condition in where]
+    return [
+        key for key, entity in entities.items()
+        if all(predicate(entity) for predicate in predicates)
+    ]
+
+
+class Rule:
+    """Assignments to make on every entity of target matching all conditions"""
+
+    def __init__(self, name, target, assign, where=()):
+        if target not in TARGETS:
+            raise RuleError(f"Unknown target {target!r}")
+        if not assign:
+            raise RuleError(f"Rule {name!r} assigns nothing")
+        self.name = name
+        self.target = target
+        self.assign = dict(assign)
+        self.where = [list(condition) for condition in where]
+        if target == "variables":
+            for field, value in self.assign.items():
+                if field in VARIABLES:
+                    _check_variable(name, field, value)
+
+    @classmethod
+    def from_dict(cls, spec):
+        try:
+            return cls(spec["name"], spec["target"], spec["set"], spec.get("where", ()))
+        except (KeyError, TypeError) as e:
+            raise RuleError(f"Invalid rule {spec!r}") from e
+
+    def as_dict(self):
+        spec = {"name": self.name, "target": self.target, "set": dict(self.assign)}
+        if self.where:
+            spec["where"] = [list(condition) for condition in self.where]
+        return spec
+
+
+def _check_variable(name, var_id, value):
+    """Raise RuleError unless SaveDocument.set_variable() accepts value"""
+    cast = int if var_id in INT_VARS else float
+    try:
+        cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise RuleError(f"Rule {name!r}: {var_id} must be a number, not {value!r}") from None
+
+
+class _CompiledRule:
+    __slots__ = ("position", "predicates", "assignments", "columns")
+
+    def __init__(self, position, rule):
+        self.position = position
+        self.predicates = [compile_condition(condition) for condition in rule.where]
+        # (keys, value) written into the entity dicts
+        self.assignments = []
+        # (field, value) written through the country table
+        self.columns = []
+        for field, value in rule.assign.items():
+            keys = field_keys(field)
+            if rule.target == "countries" and len(keys) == 1 and is_number(value):
+                self.columns.append((field, value))
+            else:
+                self.assignments.append((keys, value))
+
+    def matches(self, entity):
+        for predicate in self.predicates:
+            if not predicate(entity):
+                return False
+        return True
+
+
+class CompiledRules:
+    """A rule set ready to be applied to any number of documents"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self.sections = {target: [] for target in TARGETS}
+        for position, rule in enumerate(self.rules):
+            self.sections[rule.target].append(_CompiledRule(position, rule))
+
+    def apply(self, doc):
+        """Apply every rule to doc, returns {rule name: entities changed}"""
+        counts = [0] * len(self.rules)
+        self._apply_variables(doc, counts)
+        self._apply_countries(doc, counts)
+        sections = (
+            ("characters", self._characters(doc)),
+            ("technologies", self._technologies(doc))
+        )
+        for target, entities in sections:
+            if self.sections[target]:
+                self._apply_entities(doc, self.sections[target], entities, counts)
+
+        result = {}
+        for rule, count in zip(self.rules, counts):
+            result[rule.name] = result.get(rule.name, 0) + count
+        return result
+
+    def _apply_variables(self, doc, counts):
+        matched = [rule for rule in self.sections["variables"] if rule.matches(doc.data)]
+        for rule in matched:
+            for keys, value in rule.assignments:
+                if len(keys) == 1 and keys[0] in VARIABLES:
+                    doc.set_variable(keys[0], value)
+                elif lookup(doc.data, keys) is not MISSING:
+                    doc.set(keys, _fresh(value))
+                else:
+                    continue
+                counts[rule.position] += 1
+
+    def _apply_countries(self, doc, counts):
+        section = self.sections["countries"]
+        if not section or not doc.has_countries():
+            return
+        doc.flush_columns()
+        table = doc.country_table()
+        countries = doc.data["countries"]
+        masks = {rule.position: bytearray(len(table)) for rule in section if rule.columns}
+        entities = (
+            (i, ("countries", tag), countries[tag]) for i, tag in enumerate(table.tags)
+        )
+        self._apply_entities(doc, section, entities, counts, masks)
+        for rule in section:
+            for field, value in rule.columns:
+                table.set(field, value, where=masks[rule.position])
+
+    @staticmethod
+    def _characters(doc):
+        for i, (name, character) in enumerate(doc.data.get("characters", {}).items()):
+            yield i, ("characters", name), character
+
+    @staticmethod
+    def _technologies(doc):
+        i = 0
+        for category, techs in doc.data.get("technologies", {}).items():
+            for index, tech in enumerate(techs):
+                yield i, ("technologies", category, index), tech
+                i += 1
+
+    @staticmethod
+    def _apply_entities(doc, section, entities, counts, masks=None):
+        """The single pass over one section's entities"""
+        for i, base, entity in entities:
+            # Check every condition before the first write to this entity
+            matched = [rule for rule in section if not rule.predicates or rule.matches(entity)]
+            for rule in matched:
+                changed = False
+                for field, _ in rule.columns:
+                    if field in entity:
+                        masks[rule.position][i] = 1
+                        changed = True
+                for keys, value in rule.assignments:
+                    if lookup(entity, keys) is not MISSING:
+                        doc.set(base + keys, _fresh(value))
+                        changed = True
+                if changed:
+                    counts[rule.position] += 1
+
+
+def _fresh(value):
+    # Every entity gets its own copy of a list or dict value
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+def compile_rules(rules):
+    """Compile Rule objects or rule dicts"""
+    return CompiledRules(
+        rule if isinstance(rule, Rule) else Rule.from_dict(rule) for rule in rules
+    )
+
+
+def load_rules(path):
+    """Read a JSON preset file"""
+    with open(path, encoding="utf-8") as f:
+        specs = json.load(f)
+    if not isinstance(specs, list):
+        raise RuleError("A preset must be a list of rules")
+    return [Rule.from_dict(spec) for spec in specs]
+
+
+def save_rules(path, rules):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump([rule.as_dict() for rule in rules], f, indent=2, ensure_ascii=False)
+
+
+# The editor's quick actions as rules, in button order
+ACTIVE = [["activeInGame", "truthy"]]
+QUICK_ACTION_RULES = [
+    Rule("Loyal to the Cause", "variables", {var: 100 for var in LOYALTY_VARS}),
+    Rule("Clear Debt", "variables", {var: 0 for var in DEBT_VARS}),
+    Rule("Fall of the USA", "variables", {var: 0 for var in USA_VARS}),
+    Rule(
+        "Scientific Breakthrough", "technologies",
+        {"investedCost": {point: 1000 for point in TECH_POINT_TYPES}}
+    ),
+    Rule("Diplomatic Superparty", "countries", {"relationshipWithPlayer": 100}, ACTIVE),
+    Rule("Mass Alignment", "countries", {"foreignPolicyVector": 100}, ACTIVE),
+    Rule("Liberalization Vector 0", "countries", {"liberalizationVector": 0}, ACTIVE),
+    Rule("Liberalization Vector 100", "countries", {"liberalizationVector": 100}, ACTIVE),
+    Rule("Supreme Leader", "characters", {"relationsToPlayer": 100})
+]
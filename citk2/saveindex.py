@@ -0,0 +1,270 @@
+"""Summaries of every save in a folder, kept in a SQLite index.
+
+read_summary() pulls a few of the main variables (population, DEFCON,
+...) out of a save without decoding it: the file is read in growing
+chunks and the top-level members are walked with the same scanner as
+patch.py, stepping over countries and characters with skip_value(). It
+stops as soon as every field is found, so for most saves only the first
+chunk is read.
+
+SaveIndex stores one row per save with the size and mtime it had when
+it was summarised. scan() only summarises files that are new or whose
+size or mtime changed, on a thread pool, and drops rows of files that
+are gone, so listing a folder of hundreds of saves is one query once
+they have been seen.
+"""
+import codecs
+import contextlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import default_cache_dir
+from .core import SaveFormatError
+from .loader import ENCODING
+from .patch import _WHITESPACE, _scan_once, _scanstring, skip_value
+from .profiling import profiler
+from .watcher import scan_folder
+
+# Main variables shown for each save, all keys of core.VARIABLES
+SUMMARY_FIELDS = ("population", "defcon", "politicalPower", "reserve", "corruptionLevel")
+
+# First read, doubled on each further read
+READ_CHUNK = 64 * 1024
+SCAN_WORKERS = 8
+
+# Bump when the schema or SUMMARY_FIELDS change; older indexes are rebuilt
+# 2: entity fields for cross-save queries, see query.py
+# 3: summaries hold keys the game writes, not gameDate and playerName
+INDEX_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS saves (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    fields TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS saves_folder ON saves (folder);
+CREATE TABLE IF NOT EXISTS indexed (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS entities (
+    path TEXT NOT NULL,
+    section TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (path, section, key)
+) WITHOUT ROWID;
+"""
+
+
+def default_index_path():
+    return os.path.join(os.path.dirname(default_cache_dir()), "save-index.sqlite3")
+
+
+class _Incomplete(Exception):
+    """The text read so far ends inside the member being decoded"""
+
+
+class _Prefix:
+    """The start of a file, decoded as far as it has been read"""
+
+    def __init__(self, f, chunk):
+        self.file = f
+        self.chunk = chunk
+        self.decoder = codecs.getincrementaldecoder(ENCODING)()
+        self.text = ""
+        self.eof = False
+
+    def more(self):
+        """Read the next chunk, returns False at the end of the file"""
+        if self.eof:
+            return False
+        data = self.file.read(self.chunk)
+        self.chunk *= 2
+        self.eof = not data
+        self.text += self.decoder.decode(data, final=self.eof)
+        return True
+
+
+def _skip(text, idx):
+    return _WHITESPACE(text, idx).end()
+
+
+def _member(text, idx, wanted, complete):
+    """Decode the top-level member at idx.
+
+    Returns (key, value, end); value is None for keys not in wanted and
+    key is None at the closing brace. Anything unexpected raises
+    _Incomplete: it is an error only once the whole file has been read.
+    """
+    idx = _skip(text, idx)
+    if text[idx:idx + 1] == ',':
+        idx = _skip(text, idx + 1)
+    char = text[idx:idx + 1]
+    if char == '}':
+        return None, None, idx + 1
+    if char != '"':
+        raise _Incomplete()
+    key, idx = _scanstring(text, idx + 1)
+    idx = _skip(text, idx)
+    if text[idx:idx + 1] != ':':
+        raise _Incomplete()
+    idx = _skip(text, idx + 1)
+    value = None
+    end = None
+    if key not in wanted and text[idx:idx + 1] in ('{', '['):
+        end = skip_value(text, idx)
+        if end is None and not complete:
+            # Either cut off or nested too deep to skip; decode once it is all read
+            raise _Incomplete()
+    if end is None:
+        value, end = _scan_once(text, idx)
+        if key not in wanted:
+            value = None
+    if end >= len(text) and not complete:
+        # A number or literal may continue in the next chunk
+        raise _Incomplete()
+    return key, value, end
+
+
+@profiler.timed("saveindex.read_summary")
+def read_summary(path, fields=SUMMARY_FIELDS, chunk=READ_CHUNK):
+    """{field: value} of the top-level fields present in a save"""
+    wanted = set(fields)
+    found = {}
+    with open(path, "rb") as f:
+        prefix = _Prefix(f, chunk)
+        while prefix.text.find("{") < 0:
+            if not prefix.more():
+                raise SaveFormatError("Invalid save file format")
+        idx = prefix.text.find("{") + 1
+        while len(found) < len(wanted):
+            try:
+                key, value, end = _member(prefix.text, idx, wanted, prefix.eof)
+            except (_Incomplete, StopIteration, ValueError):
+                # json.JSONDecodeError is a ValueError
+                if not prefix.more():
+                    raise SaveFormatError("Invalid save file format") from None
+                continue
+            if key is None:
+                break
+            if key in wanted:
+                found[key] = value
+            idx = end
+    return {field: found[field] for field in fields if field in found}
+
+
+class SaveSummary:
+    """What the index knows about one save"""
+    __slots__ = ("path", "mtime_ns", "size", "fields", "error")
+
+    def __init__(self, path, mtime_ns, size, fields, error=None):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.fields = fields
+        # Why the save could not be read, or None
+        self.error = error
+
+    def __repr__(self):
+        return f"SaveSummary({self.path!r}, {self.fields!r}, error={self.error!r})"
+
+
+def summarize(path):
+    """Returns (fields, error) for a save; unreadable saves are listed too"""
+    try:
+        return read_summary(path), None
+    except (OSError, ValueError) as e:
+        return {}, str(e)
+
+
+class SaveIndex:
+    """SQLite index of save summaries, one row per save file.
+
+    Connections are opened per call, so any thread may scan.
+    """
+
+    def __init__(self, db_path=None, workers=SCAN_WORKERS):
+        self.db_path = db_path or default_index_path()
+        self.workers = workers
+
+    @contextlib.contextmanager
+    def connect(self):
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        db = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            if db.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+                tables = db.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+                for (name,) in tables:
+                    db.execute(f'DROP TABLE IF EXISTS "{name}"')
+                db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+            db.executescript(SCHEMA)
+            yield db
+            db.commit()
+        finally:
+            db.close()
+
+    def cached(self, folder):
+        """Summaries stored for folder, newest save first, without touching the saves"""
+        with self.connect() as db:
+            return self._rows(db, os.path.abspath(folder))
+
+    def _rows(self, db, folder):
+        rows = db.execute(
+            "SELECT path, mtime_ns, size, fields, error FROM saves WHERE folder = ? "
+            "ORDER BY mtime_ns DESC", (folder,)
+        )
+        return [
+            SaveSummary(path, mtime_ns, size, json.loads(fields), error)
+            for path, mtime_ns, size, fields, error in rows
+        ]
+
+    @profiler.timed("SaveIndex.scan")
+    def scan(self, folder, progress=None):
+        """Bring the index of folder up to date and return its summaries.
+
+        progress, if given, is called with the fraction of changed saves
+        summarised so far.
+        """
+        folder = os.path.abspath(folder)
+        files = scan_folder(folder)
+        with self.connect() as db:
+            known = {
+                path: (mtime_ns, size)
+                for path, mtime_ns, size in db.execute(
+                    "SELECT path, mtime_ns, size FROM saves WHERE folder = ?", (folder,)
+                )
+            }
+            db.executemany(
+                "DELETE FROM saves WHERE path = ?", [(path,) for path in known if path not in files]
+            )
+            stale = [path for path, stat in files.items() if known.get(path) != stat]
+            if stale:
+                pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="citk2-scan")
+                try:
+                    for done, (path, (fields, error)) in enumerate(
+                        zip(stale, pool.map(summarize, stale)), 1
+                    ):
+                        # The stat from before reading: a save rewritten meanwhile is rescanned next time
+                        mtime_ns, size = files[path]
+                        db.execute(
+                            "INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?, ?, ?)",
+                            (path, folder, mtime_ns, size, json.dumps(fields, ensure_ascii=False), error)
+                        )
+                        if progress is not None:
+                            progress(done / len(stale))
+                finally:
+                    # A cancelled scan keeps the rows written so far
+                    db.commit()
+                    pool.shutdown(cancel_futures=True)
+            return self._rows(db, folder)
@@ -0,0 +1,225 @@
+"""Field types of countries and characters, inferred from the save.
+
+The forms show every value as text, so saving has to turn text back into
+the JSON value the game expects. Guessing from the text alone ("100" is
+an int, "1.5" a float) turns a float field into an int as soon as a
+round number is typed. infer_schema() instead walks a section once and
+records, for every field and every key of a nested dict of scalars,
+which JSON types occur in it. FieldSchema.convert() then reads typed
+text as that type:
+
+- a field holding floats stays float whatever is typed ("100" -> 100.0);
+- a field holding only ints rejects "1.5";
+- "null" is accepted only where the save already has nulls;
+- a field with a known set of values (status, homeLand, ...) rejects
+  anything that is neither one of them nor already in the save, and an
+  empty entry of such a field becomes null if the field may be null.
+
+Fields the schema has not seen, or that hold several kinds of value,
+fall back to parse_value(). SaveDocument passes every later write in the
+section to Schema.note(), so a new field or a new kind of value is
+known as soon as it is written; kinds are never forgotten.
+"""
+
+# JSON kinds as recorded in FieldSchema.kinds
+NULL = "null"
+BOOL = "bool"
+INT = "int"
+FLOAT = "float"
+STR = "str"
+LIST = "list"
+DICT = "dict"
+
+_KINDS = {type(None): NULL, bool: BOOL, int: INT, float: FLOAT, str: STR, list: LIST, dict: DICT}
+
+TRUE_TEXT = ("true", "1")
+FALSE_TEXT = ("false", "0")
+
+
+def kind_of(value):
+    """JSON kind of a decoded value; Records count as dicts"""
+    kind = _KINDS.get(type(value))
+    if kind is None:
+        return DICT if hasattr(value, "items") else STR
+    return kind
+
+
+def parse_value(value_str):
+    """Convert text typed into an entry back into a JSON value"""
+    if value_str == "null":
+        return None
+    if value_str.lower() == "true":
+        return True
+    if value_str.lower() == "false":
+        return False
+    try:
+        return int(value_str)
+    except ValueError:
+        try:
+            return float(value_str)
+        except ValueError:
+            return value_str
+
+
+class SchemaError(ValueError):
+    """Raised when typed text does not fit the field it is meant for"""
+
+
+class FieldSchema:
+    """The kinds of value one field holds across a section"""
+    __slots__ = ("name", "kinds", "options")
+
+    def __init__(self, name):
+        self.name = name
+        self.kinds = set()
+        # Allowed values, only for fields with a known set of them
+        self.options = None
+
+    def __repr__(self):
+        return f"FieldSchema({self.name!r}, {sorted(self.kinds)!r}, options={self.options!r})"
+
+    def convert(self, text):
+        """The JSON value text stands for, raises SchemaError if it does not fit"""
+        nullable = NULL in self.kinds
+        if text == "null":
+            if nullable:
+                return None
+            raise SchemaError(f"{self.name} cannot be null")
+        if self.options is not None:
+            value = None if text == "" and nullable else text
+            if value is not None and value not in self.options:
+                raise SchemaError(f"{self.name}: {text!r} is not one of its values")
+            return value
+        kinds = self.kinds - {NULL}
+        if kinds == {BOOL}:
+            lowered = text.strip().lower()
+            if lowered in TRUE_TEXT:
+                return True
+            if lowered in FALSE_TEXT:
+                return False
+            raise SchemaError(f"{self.name} must be true or false, not {text!r}")
+        if kinds == {FLOAT} or kinds == {INT, FLOAT}:
+            try:
+                return float(text)
+            except ValueError:
+                raise SchemaError(f"{self.name} must be a number, not {text!r}") from None
+        if kinds == {INT}:
+            try:
+                return int(text)
+            except ValueError:
+                raise SchemaError(f"{self.name} must be a whole number, not {text!r}") from None
+        if kinds == {STR}:
+            return text
+        return parse_value(text)
+
+
+class Schema:
+    """FieldSchemas of one section, keyed by field path: (attr,) or (attr, key)"""
+
+    def __init__(self, fields, options=None):
+        self.fields = fields
+        # attr -> known values, for fields that appear later
+        self.options = options or {}
+
+    def __contains__(self, path):
+        return tuple(path) in self.fields
+
+    def field(self, path):
+        return self.fields.get(tuple(path))
+
+    def convert(self, path, text):
+        """Read text as the value of the field at path"""
+        field = self.fields.get(tuple(path))
+        if field is None:
+            return parse_value(text)
+        return field.convert(text)
+
+    def note(self, path, value):
+        """Take in a value written at path, relative to the section"""
+        path = tuple(path)
+        if len(path) == 1:
+            # A whole entity
+            if hasattr(value, "items"):
+                for attr, item in value.items():
+                    self._note((attr,), item)
+        elif len(path) == 2:
+            self._note(path[1:], value)
+        elif len(path) == 3:
+            _field(self.fields, path[1:2]).kinds.add(DICT)
+            _field(self.fields, path[1:]).kinds.add(kind_of(value))
+
+    def _note(self, path, value):
+        new = path not in self.fields
+        field = _field(self.fields, path)
+        kind = kind_of(value)
+        field.kinds.add(kind)
+        if new and path[0] in self.options:
+            field.options = set(self.options[path[0]])
+        if field.options is not None:
+            if kind == STR:
+                field.options.add(value)
+            elif kind != NULL:
+                # Options only constrain text fields
+                field.options = None
+        if kind == DICT:
+            for key, item in value.items():
+                _field(self.fields, path + (key,)).kinds.add(kind_of(item))
+
+
+def _field(fields, path):
+    field = fields.get(path)
+    if field is None:
+        field = fields[path] = FieldSchema(".".join(path))
+    return field
+
+
+def _add(fields, allowed, path, value):
+    """Record one value of the field at path, and the keys of a dict value"""
+    kind = kind_of(value)
+    _field(fields, path).kinds.add(kind)
+    if kind == STR and path[0] in allowed and len(path) == 1:
+        allowed[path[0]].add(value)
+    elif kind == DICT and len(path) == 1:
+        for key, item in value.items():
+            _field(fields, path + (key,)).kinds.add(kind_of(item))
+
+
+def infer_schema(entities, options=None):
+    """Walk every entity of a section once and return its Schema.
+
+    options maps attribute names to their known values; values found in
+    the save are allowed too. A RecordTable is read column by column.
+    """
+    options = options or {}
+    fields = {}
+    # attr -> known values plus those found, for the fields in options
+    allowed = {attr: set(known) for attr, known in options.items()}
+    if hasattr(entities, "leaves"):
+        for path, (numbers, objects) in entities.leaves().items():
+            if len(path) > 1:
+                # A flattened dict of scalars
+                _field(fields, path[:1]).kinds.add(DICT)
+            _field(fields, path).kinds.update(_KINDS[number] for number in numbers)
+            for value in objects:
+                _add(fields, allowed, path, value)
+    else:
+        # attr -> kinds seen, the FieldSchemas are made once at the end
+        seen = {}
+        for entity in entities.values():
+            for attr, value in entity.items():
+                kind = _KINDS.get(type(value))
+                if kind is None or kind == DICT or (kind == STR and attr in allowed):
+                    _add(fields, allowed, (attr,), value)
+                else:
+                    kinds = seen.get(attr)
+                    if kinds is None:
+                        kinds = seen[attr] = set()
+                    kinds.add(kind)
+        for attr, kinds in seen.items():
+            _field(fields, (attr,)).kinds.update(kinds)
+    for attr, values in allowed.items():
+        field = fields.get((attr,))
+        # Options only constrain text fields
+        if field is not None and not field.kinds - {NULL, STR}:
+            field.options = values
+    return Schema(fields, options)
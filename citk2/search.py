@@ -0,0 +1,188 @@
+"""Incremental substring search for the country and character lists.
+
+SearchIndex lowercases every name once and keeps a trigram index, so a
+query only verifies names that share all of its trigrams. When the
+query grows, the previous results are narrowed instead of searching
+again. ListboxFilter debounces keystrokes and updates a Listbox with the
+minimal run of deletes and inserts instead of rebuilding it.
+"""
+from .profiling import profiler
+
+NGRAM = 3
+
+# Delay between the last keystroke and the listbox update
+DEBOUNCE_MS = 120
+# Rows inserted per main loop turn when filling a list after loading
+FILL_CHUNK = 500
+
+
+def ngrams(text):
+    return {text[i:i + NGRAM] for i in range(len(text) - NGRAM + 1)}
+
+
+class SearchIndex:
+    """Case-insensitive substring search over a fixed list of names"""
+
+    def __init__(self, items):
+        self.items = list(items)
+        self.lowered = [item.lower() for item in self.items]
+        self.postings = {}
+        for i, name in enumerate(self.lowered):
+            for gram in ngrams(name):
+                self.postings.setdefault(gram, []).append(i)
+        self.last_query = ""
+        self.last_result = list(range(len(self.items)))
+
+    def search(self, text):
+        """Return the positions of matching items, in their original order"""
+        query = text.lower()
+        if not query:
+            result = list(range(len(self.items)))
+        elif self.last_query and self.last_query in query:
+            # The query grew: every match must already be among the last matches
+            result = [i for i in self.last_result if query in self.lowered[i]]
+        elif len(query) >= NGRAM:
+            result = self._search_ngrams(query)
+        else:
+            result = [i for i, name in enumerate(self.lowered) if query in name]
+        self.last_query = query
+        self.last_result = result
+        return result
+
+    def _search_ngrams(self, query):
+        lists = []
+        for gram in ngrams(query):
+            posting = self.postings.get(gram)
+            if posting is None:
+                return []
+            lists.append(posting)
+        lists.sort(key=len)
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return sorted(i for i in candidates if query in self.lowered[i])
+
+
+def diff_ops(old, new):
+    """Turn the sorted position list old into new with batched edits.
+
+    Returns ("delete", index, count) and ("insert", index, positions)
+    operations to apply in order to a list showing old.
+    """
+    ops = []
+    row = 0
+    a = b = 0
+    while a < len(old) or b < len(new):
+        if b == len(new) or (a < len(old) and old[a] < new[b]):
+            start = a
+            while a < len(old) and (b == len(new) or old[a] < new[b]):
+                a += 1
+            ops.append(("delete", row, a - start))
+        elif a == len(old) or new[b] < old[a]:
+            start = b
+            while b < len(new) and (a == len(old) or new[b] < old[a]):
+                b += 1
+            ops.append(("insert", row, new[start:b]))
+            row += b - start
+        else:
+            row += 1
+            a += 1
+            b += 1
+    return ops
+
+
+class ListboxFilter:
+    """Keeps a Listbox in sync with a search query.
+
+    Works with anything offering Tk's Listbox delete/insert and after/
+    after_cancel, so it does not import tkinter itself.
+    """
+
+    def __init__(self, listbox, root, delay_ms=DEBOUNCE_MS):
+        self.listbox = listbox
+        self.root = root
+        self.delay_ms = delay_ms
+        self.index = SearchIndex([])
+        self.shown = []
+        self.pending = None
+
+    def set_items(self, items, query="", chunk_size=FILL_CHUNK):
+        """Replace the searchable names and show those matching query.
+
+        Rows are inserted chunk_size at a time from the event loop so a
+        long list does not freeze the window. A filter request arriving
+        mid-fill takes over from the rows inserted so far.
+        """
+        self.cancel()
+        self.index = SearchIndex(items)
+        self.listbox.delete(0, "end")
+        self.shown = []
+        self._fill(self.index.search(query), 0, chunk_size)
+
+    def _fill(self, positions, start, chunk_size):
+        self.pending = None
+        chunk = positions[start:start + chunk_size]
+        if chunk:
+            self.listbox.insert("end", *[self.index.items[i] for i in chunk])
+            self.shown.extend(chunk)
+        if start + chunk_size < len(positions):
+            self.pending = self.root.after(1, self._fill, positions, start + chunk_size, chunk_size)
+
+    def request(self, query):
+        """Schedule a filter update, dropping any not yet applied"""
+        self.cancel()
+        self.pending = self.root.after(self.delay_ms, self.apply, query)
+
+    def cancel(self):
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+            self.pending = None
+
+    @profiler.timed("ListboxFilter.apply")
+    def apply(self, query):
+        """Filter immediately"""
+        self.pending = None
+        new = self.index.search(query)
+        for op, row, arg in diff_ops(self.shown, new):
+            if op == "delete":
+                self.listbox.delete(row, row + arg - 1)
+            else:
+                self.listbox.insert(row, *[self.index.items[i] for i in arg])
+        self.shown = new
+
+    def select(self, name):
+        """Select name if it is shown, returns whether it was"""
+        for row, i in enumerate(self.shown):
+            if self.index.items[i] == name:
+                self.listbox.selection_clear(0, "end")
+                self.listbox.selection_set(row)
+                self.listbox.see(row)
+                return True
+        return False
+
+    def select_many(self, names):
+        """Select every shown name in names, returns how many were shown"""
+        wanted = set(names)
+        rows = [row for row, i in enumerate(self.shown) if self.index.items[i] in wanted]
+        self.listbox.selection_clear(0, "end")
+        # One call per run of adjacent rows
+        start = None
+        for k, row in enumerate(rows):
+            if start is None:
+                start = row
+            if k + 1 == len(rows) or rows[k + 1] != row + 1:
+                self.listbox.selection_set(start, row)
+                start = None
+        if rows:
+            self.listbox.see(rows[0])
+        return len(rows)
+
+    def selected_items(self):
+        """Names of the selected rows, top to bottom"""
+        return [self.index.items[self.shown[row]] for row in self.listbox.curselection()]
+
+    def shown_items(self):
+        """Names currently in the listbox, top to bottom"""
+        return [self.index.items[i] for i in self.shown]
@@ -0,0 +1,205 @@
+"""Noticing when the game writes to the saved_games folder.
+
+FolderWatcher scans the folder on a worker thread and reports saves that
+were added, modified or removed. A save counts as modified when its size
+or modification time changed, and is only reported once they have stayed
+the same for SETTLE_SECONDS, so a save the game is still writing is never
+reloaded half-written.
+
+On Linux the thread sleeps on inotify and rescans as soon as something in
+the folder changes. Elsewhere, or if inotify is unavailable (a missing
+folder, a network share, the watch limit reached), it rescans every
+POLL_SECONDS. Either way the thread never touches Tk: reports go to a
+queue that the main thread drains, as with background.py.
+"""
+import ctypes
+import ctypes.util
+import os
+import queue
+import select
+import sys
+import threading
+
+from .core import SAVE_EXTENSION
+
+ADDED = "added"
+MODIFIED = "modified"
+REMOVED = "removed"
+
+POLL_SECONDS = 2.0
+# With inotify a rescan is only a safety net
+INOTIFY_SECONDS = 30.0
+SETTLE_SECONDS = 1.0
+
+# inotify(7)
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def file_stat(path):
+    """(mtime in ns, size) of a file, or None if it is gone"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def scan_folder(folder, extension=SAVE_EXTENSION):
+    """{path: (mtime in ns, size)} of the saves in folder"""
+    found = {}
+    try:
+        entries = os.scandir(folder)
+    except OSError:
+        return found
+    with entries:
+        for entry in entries:
+            if not entry.name.endswith(extension):
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            found[entry.path] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+class PollWaker:
+    """Sleeps for the whole timeout unless woken by stop()"""
+
+    timeout = POLL_SECONDS
+
+    def __init__(self):
+        self.event = threading.Event()
+
+    def wait(self, timeout):
+        self.event.wait(timeout)
+
+    def wake(self):
+        self.event.set()
+
+    def close(self):
+        pass
+
+
+class InotifyWaker:
+    """Sleeps until something in the folder changes, or the timeout passes"""
+
+    timeout = INOTIFY_SECONDS
+
+    def __init__(self, libc, folder):
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, "inotify_add_watch failed", folder)
+        # stop() writes to the pipe to end a wait early
+        self.wake_read, self.wake_write = os.pipe()
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd, self.wake_read], [], [], timeout)
+        if self.fd in ready:
+            # Which file changed does not matter, the folder is rescanned
+            try:
+                while os.read(self.fd, 65536):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def wake(self):
+        os.write(self.wake_write, b"\0")
+
+    def close(self):
+        for fd in (self.fd, self.wake_read, self.wake_write):
+            os.close(fd)
+
+
+def make_waker(folder):
+    """InotifyWaker where the platform and folder allow it, else PollWaker"""
+    if sys.platform.startswith("linux"):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            return InotifyWaker(libc, folder)
+        except (OSError, AttributeError):
+            pass
+    return PollWaker()
+
+
+class FolderWatcher:
+    """Reports (kind, path) for saves added, modified or removed in folder"""
+
+    def __init__(self, folder, settle=SETTLE_SECONDS, waker=None):
+        self.folder = folder
+        self.settle = settle
+        self.waker = waker
+        self.changes = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.waker is None:
+            self.waker = make_waker(self.folder)
+        # Saves already there are not reported
+        known = scan_folder(self.folder)
+        self.thread = threading.Thread(target=self.run, args=(known,), name="citk2-watch", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.waker is not None:
+            self.waker.wake()
+
+    def uses_inotify(self):
+        return isinstance(self.waker, InotifyWaker)
+
+    def drain(self):
+        """Changes reported since the last call, oldest first"""
+        changes = []
+        while True:
+            try:
+                changes.append(self.changes.get_nowait())
+            except queue.Empty:
+                return changes
+
+    def run(self, known):
+        # Path -> stat seen at the last scan but not yet reported
+        unsettled = {}
+        try:
+            while not self.stopped.is_set():
+                if unsettled:
+                    # Give the game time to finish writing before looking again
+                    self.stopped.wait(self.settle)
+                else:
+                    self.waker.wait(self.waker.timeout)
+                if self.stopped.is_set():
+                    break
+                self.check(known, unsettled, scan_folder(self.folder))
+        finally:
+            self.waker.close()
+
+    def check(self, known, unsettled, current):
+        """Compare one scan with the last, reporting what has settled"""
+        for path, stat in current.items():
+            if stat == known.get(path):
+                unsettled.pop(path, None)
+            elif unsettled.get(path) == stat:
+                self.changes.put((MODIFIED if path in known else ADDED, path))
+                known[path] = stat
+                del unsettled[path]
+            else:
+                unsettled[path] = stat
+        for path in [path for path in known if path not in current]:
+            del known[path]
+            unsettled.pop(path, None)
+            self.changes.put((REMOVED, path))
+        for path in [path for path in unsettled if path not in current]:
+            del unsettled[path]
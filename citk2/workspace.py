@@ -0,0 +1,79 @@
+"""Several saves open in one process.
+
+A Workspace keeps every opened SaveDocument in memory, so switching to
+another save is just changing which one is active. Keys and enum-like
+values are interned by the loader (see patch.py), so a second save of
+the same campaign shares all of them with the first one and only adds
+its own numbers, names and original text.
+"""
+import os
+
+from .core import SaveDocument
+
+
+def workspace_key(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+class Workspace:
+    """Open documents by path, in the order they were opened"""
+
+    def __init__(self, load=SaveDocument.load):
+        self.load = load
+        self.docs = {}
+        self.active = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, path):
+        return workspace_key(path) in self.docs
+
+    def open(self, path, progress=None):
+        """Return the document for path, loading it unless it is already open"""
+        key = workspace_key(path)
+        doc = self.docs.get(key)
+        if doc is None:
+            doc = self.load(path, progress=progress)
+        return self.add(path, doc)
+
+    def add(self, path, doc):
+        """Register a document loaded elsewhere and make it active"""
+        key = workspace_key(path)
+        self.docs[key] = doc
+        self.active = key
+        return doc
+
+    def get(self, path):
+        """The open document for path, or None"""
+        return self.docs.get(workspace_key(path))
+
+    def replace(self, path, doc):
+        """Put a reloaded document in place of an open one, active or not"""
+        self.docs[workspace_key(path)] = doc
+        return doc
+
+    def switch(self, path):
+        """Make an open document active and return it"""
+        key = workspace_key(path)
+        doc = self.docs[key]
+        self.active = key
+        return doc
+
+    def close(self, path):
+        """Forget a document, returns the one that becomes active or None"""
+        key = workspace_key(path)
+        del self.docs[key]
+        if self.active == key:
+            self.active = next(reversed(self.docs), None)
+        return self.current()
+
+    def current(self):
+        return self.docs.get(self.active)
+
+    def paths(self):
+        return [doc.path or key for key, doc in self.docs.items()]
+
+    def modified(self):
+        """Paths of open documents with unsaved edits"""
+        return [doc.path or key for key, doc in self.docs.items() if doc.is_modified()]